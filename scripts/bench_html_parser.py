@@ -0,0 +1,87 @@
+"""
+Micro-benchmark: html.parser vs the shared fast parsing layer (lxml).
+Runs offline over the saved fixtures (data/snippet_actiontoys.html, dev_tools/*.html):
+parse the page once, select the product containers and run the matching
+`_parse_html_item`. Also checks that both backends extract the same offers.
+
+Usage: python scripts/bench_html_parser.py [--rounds 20]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.append(os.getcwd())
+
+from bs4 import BeautifulSoup
+
+from src.infrastructure.scrapers.parsing import HTML_PARSER
+from src.infrastructure.scrapers.action_toys_scraper import ActionToysScraper
+from src.infrastructure.scrapers.fantasia_scraper import FantasiaScraper
+from src.infrastructure.scrapers.frikiverso_scraper import FrikiversoScraper
+from src.infrastructure.scrapers.electropolis_scraper import ElectropolisScraper
+
+FIXTURES = ["data/snippet_actiontoys.html"] + sorted(glob.glob("dev_tools/*.html"))
+
+# Container selector -> scraper that owns it (first match wins)
+LAYOUTS = [
+    ("li.product", ActionToysScraper),
+    ("article.product-miniature", FantasiaScraper),
+    ("article.js-product-miniature, article.ajax_block_product", FrikiversoScraper),
+    (".product-item-info", ElectropolisScraper),
+]
+
+
+def extract(html: str, backend: str, selector: str, scraper) -> list:
+    soup = BeautifulSoup(html, backend)
+    offers = [scraper._parse_html_item(item) for item in soup.select(selector)]
+    return [(o.product_name, o.price, str(o.url)) for o in offers if o]
+
+
+def bench(html: str, backend: str, selector: str, scraper, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        extract(html, backend, selector, scraper)
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML parser micro-benchmark")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    if HTML_PARSER == "html.parser":
+        print("⚠️ lxml is not installed: nothing to compare against.")
+        return
+
+    print(f"{'fixture':<40} {'items':>5} {'html.parser ms':>15} {'lxml ms':>9} {'speedup':>8}  same offers")
+    total_slow = total_fast = 0.0
+    for path in FIXTURES:
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            html = f.read()
+
+        probe = BeautifulSoup(html, HTML_PARSER)
+        layout = next(((sel, cls) for sel, cls in LAYOUTS if probe.select(sel)), None)
+        if not layout:
+            print(f"{os.path.basename(path):<40} (no known product layout, skipped)")
+            continue
+        selector, scraper_cls = layout
+        scraper = scraper_cls()
+
+        slow = bench(html, "html.parser", selector, scraper, args.rounds)
+        fast = bench(html, HTML_PARSER, selector, scraper, args.rounds)
+        same = extract(html, "html.parser", selector, scraper) == extract(html, HTML_PARSER, selector, scraper)
+        items = len(probe.select(selector))
+        total_slow += slow
+        total_fast += fast
+        print(f"{os.path.basename(path):<40} {items:>5} {slow:>15.2f} {fast:>9.2f} {slow / fast:>7.1f}x  {'✅' if same else '❌'}")
+
+    if total_fast:
+        print(f"\nTotal: html.parser {total_slow:.1f} ms vs {HTML_PARSER} {total_fast:.1f} ms ({total_slow / total_fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
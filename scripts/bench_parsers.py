@@ -0,0 +1,170 @@
+"""
+Offline parser benchmark suite (no network).
+Runs every shop parser against recorded HTML/JSON fixtures and reports:
+  - items/sec (page parse + container select + per-item parse)
+  - peak allocations (tracemalloc, KB)
+  - accuracy against the expected offers in data/fixtures/expected/
+Results are compared with data/fixtures/parsers_baseline.json so parser
+regressions show up without hitting the live shops.
+
+Usage:
+  python scripts/bench_parsers.py                     # compare with baseline
+  python scripts/bench_parsers.py --save-baseline     # store current results as baseline
+  python scripts/bench_parsers.py --update-expected   # re-record expected offers (after a verified parser change)
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.getcwd())
+
+from src.infrastructure.scrapers.parsing import parse_html, HTML_PARSER
+from src.infrastructure.scrapers.action_toys_scraper import ActionToysScraper
+from src.infrastructure.scrapers.fantasia_scraper import FantasiaScraper
+from src.infrastructure.scrapers.frikiverso_scraper import FrikiversoScraper
+from src.infrastructure.scrapers.pixelatoy_scraper import PixelatoyScraper
+from src.infrastructure.scrapers.electropolis_scraper import ElectropolisScraper
+from src.scrapers.spiders.actiontoys import ActionToysSpider
+from src.scrapers.spiders.dvdstorespain import DVDStoreSpainSpider
+
+FIXTURES_DIR = os.path.join("data", "fixtures")
+EXPECTED_DIR = os.path.join(FIXTURES_DIR, "expected")
+BASELINE_FILE = os.path.join(FIXTURES_DIR, "parsers_baseline.json")
+
+# name -> (fixture, container selector or None for JSON, parser factory)
+CASES = {
+    "actiontoys_html": ("data/snippet_actiontoys.html", "li.product", lambda: ActionToysScraper()._parse_html_item),
+    "actiontoys_api": (os.path.join(FIXTURES_DIR, "actiontoys_api.json"), None, lambda: ActionToysSpider()._parse_api_item),
+    "fantasia_html": ("dev_tools/fantasia.html", "article.product-miniature", lambda: FantasiaScraper()._parse_html_item),
+    "fantasia_standard_html": ("dev_tools/fantasia_standard.html", "article.product-miniature", lambda: FantasiaScraper()._parse_html_item),
+    "frikiverso_html": ("dev_tools/debug_frikiverso_failed.html", "article.js-product-miniature, article.ajax_block_product", lambda: FrikiversoScraper()._parse_html_item),
+    "pixelatoy_html": (os.path.join(FIXTURES_DIR, "pixelatoy_listing.html"), "article.product-miniature, article.js-product-miniature", lambda: PixelatoyScraper()._parse_html_item),
+    "electropolis_html": (os.path.join(FIXTURES_DIR, "electropolis_listing.html"), ".product-item-info", lambda: ElectropolisScraper()._parse_html_item),
+    "dvdstorespain_html": (os.path.join(FIXTURES_DIR, "dvdstorespain_listing.html"), ".product-miniature", lambda: DVDStoreSpainSpider()._parse_item),
+}
+
+
+def run_case(raw: str, selector, parse_item) -> list:
+    if selector is None:
+        items = json.loads(raw)
+    else:
+        items = parse_html(raw).select(selector)
+    offers = [parse_item(item) for item in items]
+    return [
+        {"product_name": o.product_name, "price": o.price, "url": str(o.url), "is_available": o.is_available}
+        for o in offers if o
+    ]
+
+
+def accuracy(parsed: list, expected: list) -> float:
+    if not expected and not parsed:
+        return 1.0
+    remaining = [json.dumps(e, sort_keys=True) for e in expected]
+    hits = 0
+    for offer in parsed:
+        key = json.dumps(offer, sort_keys=True)
+        if key in remaining:
+            remaining.remove(key)
+            hits += 1
+    return hits / max(len(expected), len(parsed))
+
+
+def measure(raw: str, selector, parse_item, rounds: int) -> dict:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        parsed = run_case(raw, selector, parse_item)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    median = timings[len(timings) // 2]
+
+    tracemalloc.start()
+    run_case(raw, selector, parse_item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "items": len(parsed),
+        "items_per_sec": round(len(parsed) / median, 1) if median else 0.0,
+        "median_ms": round(median * 1000, 3),
+        "peak_kb": round(peak / 1024, 1),
+        "parsed": parsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline parser benchmark suite")
+    parser.add_argument("--rounds", type=int, default=15)
+    parser.add_argument("--cases", nargs="*", help="Subset of cases to run")
+    parser.add_argument("--save-baseline", action="store_true", help="Store current results as the new baseline")
+    parser.add_argument("--update-expected", action="store_true", help="Re-record expected offers from the current parsers")
+    parser.add_argument("--tolerance", type=float, default=0.30, help="Allowed items/sec drop vs baseline (timing noise)")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, encoding="utf-8") as f:
+            baseline = json.load(f).get("cases", {})
+
+    results = {}
+    regressions = []
+    print(f"Backend: {HTML_PARSER} | rounds: {args.rounds}\n")
+    print(f"{'case':<24} {'items':>5} {'items/s':>10} {'ms':>9} {'peak KB':>9} {'accuracy':>9}  vs baseline")
+
+    for name, (fixture, selector, factory) in CASES.items():
+        if args.cases and name not in args.cases:
+            continue
+        if not os.path.exists(fixture):
+            print(f"{name:<24} (fixture missing: {fixture})")
+            continue
+        with open(fixture, encoding="utf-8", errors="ignore") as f:
+            raw = f.read()
+
+        result = measure(raw, selector, factory(), args.rounds)
+        parsed = result.pop("parsed")
+
+        expected_file = os.path.join(EXPECTED_DIR, f"{name}.json")
+        if args.update_expected or not os.path.exists(expected_file):
+            os.makedirs(EXPECTED_DIR, exist_ok=True)
+            with open(expected_file, "w", encoding="utf-8") as f:
+                json.dump(parsed, f, ensure_ascii=False, indent=2)
+        with open(expected_file, encoding="utf-8") as f:
+            result["accuracy"] = round(accuracy(parsed, json.load(f)), 4)
+        results[name] = result
+
+        # Regression check
+        notes = []
+        base = baseline.get(name)
+        if base:
+            if result["accuracy"] < base["accuracy"]:
+                notes.append(f"❌ accuracy {base['accuracy']} -> {result['accuracy']}")
+            if result["items"] != base["items"]:
+                notes.append(f"❌ items {base['items']} -> {result['items']}")
+            if result["items_per_sec"] < base["items_per_sec"] * (1 - args.tolerance):
+                notes.append(f"⚠️ slower ({base['items_per_sec']} items/s)")
+            if notes:
+                regressions.append(name)
+        else:
+            notes.append("(no baseline)")
+
+        print(
+            f"{name:<24} {result['items']:>5} {result['items_per_sec']:>10.1f} {result['median_ms']:>9.2f} "
+            f"{result['peak_kb']:>9.1f} {result['accuracy']:>9.2%}  {' '.join(notes) or '✅'}"
+        )
+
+    if args.save_baseline:
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump({"backend": HTML_PARSER, "rounds": args.rounds, "cases": results}, f, indent=2)
+        print(f"\n💾 Baseline saved to {BASELINE_FILE}")
+        return
+
+    if regressions:
+        print(f"\n🚨 Regressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+
+class AlertEntry(NamedTuple):
+    target_price: float
+    alert_id: int
+    user_id: int
+
+
+class AlertIndex:
+    """
+    In-memory Centinela index, loaded once per batch:
+    product_id -> active alerts sorted by target price, plus their
+    last-notified times. A price update triggers every alert whose target is
+    >= the new price, found with one bisect per offer instead of a
+    PriceAlertModel query. Notified alerts are stamped in memory (so a second
+    offer of the same product in the batch does not re-trigger them) and
+    written back with a single bulk UPDATE in `flush`.
+    """
+    def __init__(self, cooldown_hours: float = 12):
+        self.cooldown = timedelta(hours=cooldown_hours)
+        self._targets: Dict[int, List[float]] = {}
+        self._entries: Dict[int, List[AlertEntry]] = {}
+        self._last_notified: Dict[int, Optional[datetime]] = {}
+        self._pending: List[int] = []
+        self._now = datetime.utcnow()
+
+    @classmethod
+    def load(cls, db: Session, product_ids: Optional[Iterable[int]] = None, cooldown_hours: float = 12) -> "AlertIndex":
+        from src.domain.models import PriceAlertModel
+        index = cls(cooldown_hours)
+        query = db.query(
+            PriceAlertModel.id, PriceAlertModel.product_id, PriceAlertModel.user_id,
+            PriceAlertModel.target_price, PriceAlertModel.last_notified_at
+        ).filter(PriceAlertModel.is_active == True)
+        if product_ids is not None:
+            ids = list(set(product_ids))
+            if not ids:
+                return index
+            query = query.filter(PriceAlertModel.product_id.in_(ids))
+
+        for alert_id, product_id, user_id, target, last_notified in query.order_by(PriceAlertModel.target_price).all():
+            index._targets.setdefault(product_id, []).append(target)
+            index._entries.setdefault(product_id, []).append(AlertEntry(target, alert_id, user_id))
+            index._last_notified[alert_id] = last_notified
+        return index
+
+    def __len__(self) -> int:
+        return len(self._last_notified)
+
+    def triggered(self, product_id: int, price: float) -> List[AlertEntry]:
+        """
+        Alerts crossed by `price` that are out of their cooldown. They are
+        marked as notified (bulk-written by `flush`).
+        """
+        targets = self._targets.get(product_id)
+        if not targets:
+            return []
+        fired = []
+        for entry in self._entries[product_id][bisect_left(targets, price):]:
+            last = self._last_notified[entry.alert_id]
+            if last and self._now - last < self.cooldown:
+                continue
+            self._last_notified[entry.alert_id] = self._now
+            self._pending.append(entry.alert_id)
+            fired.append(entry)
+        return fired
+
+    def flush(self, db: Session) -> int:
+        """
+        One UPDATE for every alert notified since the last flush. Runs inside
+        the caller's transaction (committed with the batch).
+        """
+        if not self._pending:
+            return 0
+        from src.domain.models import PriceAlertModel
+        ids, self._pending = self._pending, []
+        db.execute(
+            update(PriceAlertModel)
+            .where(PriceAlertModel.id.in_(ids))
+            .values(last_notified_at=self._now)
+            .execution_options(synchronize_session=False)
+        )
+        return len(ids)
@@ -1,12 +1,69 @@
+import gzip
 import json
 import os
+import shutil
 import logging
-from datetime import datetime
+from datetime import datetime, date
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 
 logger = logging.getLogger("backup_manager")
 
+VAULT_FORMAT = "2.0-STREAM"
+VAULT_PREFIX = "eternia_vault_"
+MANIFEST = "manifest.json"
+
+# Vault tables in restore (FK dependency) order
+VAULT_TABLES = [
+    ("users", "UserModel"),
+    ("products", "ProductModel"),
+    ("pending_matches", "PendingMatchModel"),
+    ("offers", "OfferModel"),
+    ("offer_history", "OfferHistoryModel"),
+    ("price_history", "PriceHistoryModel"),
+    ("price_alerts", "PriceAlertModel"),
+    ("collection_items", "CollectionItemModel"),
+    ("blackcluded_items", "BlackcludedItemModel"),
+    ("kaizen_insights", "KaizenInsightModel"),
+    ("scraper_execution_logs", "ScraperExecutionLogModel"),
+]
+
+# Append-only tables exported as deltas (id > watermark) in incremental vaults.
+# Value: column that is NULL while a row can still change (its id stays above the watermark).
+# offer_history is NOT here: the Purgatory undo rewrites action_type in place.
+DELTA_TABLES = {
+    "price_history": None,
+    "scraper_execution_logs": "end_time",
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _has_zstd() -> bool:
+    try:
+        import zstandard  # noqa: F401
+        return True
+    except ImportError:
+        logger.warning("zstandard not installed: vault compressed with gzip.")
+        return False
+
+
+def open_vault_stream(path: Path, mode: str = "rt"):
+    """
+    Text stream over a vault file, compressed according to its extension
+    (.gz built in, .zst needs the optional `zstandard` package).
+    """
+    path = Path(path)
+    if path.suffix == ".zst":
+        import zstandard
+        return zstandard.open(path, mode, encoding="utf-8")
+    return gzip.open(path, mode, encoding="utf-8")
+
+
 class BackupManager:
     """
     The Data Fortress of Eternia.
@@ -24,109 +81,227 @@ class BackupManager:
     def save_raw_snapshot(self, shop_name: str, offers: List[Any]):
         """
         Saves the raw scraped data before any processing.
-        Acts as the 'Flight Recorder' for scrapers.
+        Acts as the 'Flight Recorder' for scrapers: records go to the
+        content-addressed SnapshotStore (each distinct offer stored once,
+        one manifest per run).
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"raw_{shop_name}_{timestamp}.json"
-        
-        # Convert ScrapedOffer objects to dicts if needed
-        serializable_offers = []
-        for o in offers:
-            if hasattr(o, '__dict__'):
-                data = o.__dict__.copy()
-                # Ensure complex objects like URLs are strings
-                if 'url' in data: data['url'] = str(data['url'])
-                serializable_offers.append(data)
-            else:
-                serializable_offers.append(o)
-
-        file_path = self.snapshots_path / filename
+        from src.core.snapshot_store import SnapshotStore
         try:
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(serializable_offers, f, ensure_ascii=False, indent=4)
-            logger.info(f"🛡️ Raw snapshot saved: {filename} ({len(offers)} items)")
-            
-            # Retention: Keep only last 15 snapshots
-            self._rotate_backups(self.snapshots_path, 15)
-            
+            store = SnapshotStore(str(self.snapshots_path / "snapshots.db"))
+            try:
+                return store.save_run(shop_name, offers)
+            finally:
+                store.close()
         except Exception as e:
             logger.error(f"❌ Failed to save raw snapshot: {e}")
+            return None
 
-    def create_database_backup(self, db_session):
+    def create_database_backup(self, db_session, incremental: Optional[bool] = None,
+                               full_every_days: int = 7, compression: str = "gzip", keep_full: int = 4):
         """
-        Exports critical tables to a single JSON 'Vault' file.
-        Tables: products, offers, pending_matches, offer_history.
+        Seals a streaming 'Vault': one directory per vault with a compressed
+        newline-delimited JSON file per table and a manifest.
+        Rows are read with `yield_per` batches (server-side cursor on Postgres)
+        and written line by line, so memory does not grow with the tables.
+
+        Incremental vaults hold only what changed since the last FULL vault
+        (their `base` in the manifest): small mutable tables are copied whole,
+        append-only tables (DELTA_TABLES) keep the rows above the base
+        watermark plus their live id list (deletions). With `incremental=None`
+        a full vault is sealed when the last one is `full_every_days` old.
         """
-        from src.domain.models import ProductModel, OfferModel, PendingMatchModel, OfferHistoryModel
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"eternia_vault_{timestamp}.json"
-        
-        vault = {
-            "metadata": {
-                "timestamp": datetime.now().isoformat(),
-                "version": "1.1-TOTAL"
-            },
-            "data": {
-                "users": [],
-                "products": [],
-                "offers": [],
-                "pending_matches": [],
-                "offer_history": [],
-                "price_alerts": [],
-                "collection_items": [],
-                "blackcluded_items": [],
-                "kaizen_insights": [],
-                "scraper_execution_logs": []
-            }
+        base = self._latest_full()
+        if incremental is None:
+            incremental = base is not None and (datetime.now() - datetime.fromisoformat(base["timestamp"])).days < full_every_days
+        if incremental and base is None:
+            logger.warning("⚠️ No full vault to chain from: sealing a full vault instead.")
+            incremental = False
+        base_manifest = self.load_manifest(base["path"]) if incremental else None
+
+        ext = ".zst" if compression == "zstd" and _has_zstd() else ".gz"
+        timestamp = datetime.now()
+        name = f"{VAULT_PREFIX}{timestamp.strftime('%Y%m%d_%H%M%S')}"
+        work_dir = self.db_backups_path / f"{name}.partial"
+        final_dir = self.db_backups_path / name
+        manifest = {
+            "format": VAULT_FORMAT,
+            "vault": name,
+            "kind": "incremental" if incremental else "full",
+            "base": base["vault"] if incremental else None,
+            "timestamp": timestamp.isoformat(),
+            "tables": {}
         }
 
         try:
-            # Helper to convert model to dict
-            def to_dict(row):
-                d = {}
-                for column in row.__table__.columns:
-                    val = getattr(row, column.name)
-                    if isinstance(val, datetime):
-                        val = val.isoformat()
-                    d[column.name] = val
-                return d
-
-            from src.domain.models import (
-                UserModel, ProductModel, OfferModel, PendingMatchModel, 
-                OfferHistoryModel, PriceAlertModel, CollectionItemModel,
-                BlackcludedItemModel, KaizenInsightModel, ScraperExecutionLogModel
-            )
-
-            # Extract data
-            vault["data"]["users"] = [to_dict(u) for u in db_session.query(UserModel).all()]
-            vault["data"]["products"] = [to_dict(p) for p in db_session.query(ProductModel).all()]
-            vault["data"]["offers"] = [to_dict(o) for o in db_session.query(OfferModel).all()]
-            vault["data"]["pending_matches"] = [to_dict(pm) for pm in db_session.query(PendingMatchModel).all()]
-            vault["data"]["offer_history"] = [to_dict(h) for h in db_session.query(OfferHistoryModel).all()]
-            vault["data"]["price_alerts"] = [to_dict(a) for a in db_session.query(PriceAlertModel).all()]
-            vault["data"]["collection_items"] = [to_dict(ci) for ci in db_session.query(CollectionItemModel).all()]
-            vault["data"]["blackcluded_items"] = [to_dict(bi) for bi in db_session.query(BlackcludedItemModel).all()]
-            vault["data"]["kaizen_insights"] = [to_dict(ki) for ki in db_session.query(KaizenInsightModel).all()]
-            vault["data"]["scraper_execution_logs"] = [to_dict(el) for el in db_session.query(ScraperExecutionLogModel).all()]
-
-            file_path = self.db_backups_path / filename
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(vault, f, ensure_ascii=False, indent=2)
-            
-            logger.info(f"🏰 Database Vault created: {filename}")
-            self._rotate_backups(self.db_backups_path, 7) # Keep 7 days of DB backups
-            
-            return str(file_path)
-            
+            import src.domain.models as models
+
+            work_dir.mkdir(parents=True)
+            for table_name, model_name in VAULT_TABLES:
+                table = getattr(models, model_name).__table__
+                entry = {"file": f"{table_name}.ndjson{ext}", "mode": "full"}
+                where = None
+                if table_name in DELTA_TABLES:
+                    entry["watermark"] = self._watermark(db_session, table, DELTA_TABLES[table_name])
+                    since = base_manifest["tables"].get(table_name, {}).get("watermark") if incremental else None
+                    if since is not None:
+                        entry.update(mode="delta", since=since, ids_file=f"{table_name}.ids{ext}")
+                        where = table.c.id > since
+                        self._write_ids(db_session, table, work_dir / entry["ids_file"])
+                entry["rows"] = self._write_table(db_session, table, work_dir / entry["file"], where)
+                manifest["tables"][table_name] = entry
+
+            with open(work_dir / MANIFEST, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+            # Only complete vaults get their final name
+            work_dir.rename(final_dir)
         except Exception as e:
             logger.error(f"❌ Failed to create DB backup: {e}")
+            shutil.rmtree(work_dir, ignore_errors=True)
             return None
 
-    def _rotate_backups(self, folder: Path, limit: int):
-        """Removes oldest files if limit exceeded."""
-        files = sorted(list(folder.glob("*.json")), key=os.path.getmtime)
-        if len(files) > limit:
-            for f in files[:-limit]:
-                os.remove(f)
-                logger.info(f"🗑️ Rotated old backup: {f.name}")
+        rows = sum(t["rows"] for t in manifest["tables"].values())
+        size = sum(f.stat().st_size for f in final_dir.iterdir()) / 1024
+        logger.info(f"🏰 Database Vault created: {name} ({manifest['kind']}, {rows} rows, {size:.1f} KB)")
+        self._rotate_vaults(keep_full)
+        return str(final_dir)
+
+    @staticmethod
+    def _watermark(db_session, table, open_column: Optional[str]) -> int:
+        """
+        Highest id an incremental vault can skip: rows still open (e.g. a
+        running scraper log) stay above it so their final state is exported.
+        """
+        from sqlalchemy import select, func
+        watermark = db_session.execute(select(func.max(table.c.id))).scalar() or 0
+        if open_column:
+            first_open = db_session.execute(
+                select(func.min(table.c.id)).where(table.c[open_column].is_(None))
+            ).scalar()
+            if first_open is not None:
+                watermark = min(watermark, first_open - 1)
+        return watermark
+
+    @staticmethod
+    def _write_table(db_session, table, path: Path, where=None, batch_size: int = 1000) -> int:
+        from sqlalchemy import select
+        stmt = select(table).order_by(table.c.id).execution_options(yield_per=batch_size)
+        if where is not None:
+            stmt = stmt.where(where)
+        rows = 0
+        with open_vault_stream(path, "wt") as f:
+            for row in db_session.execute(stmt):
+                f.write(json.dumps(dict(row._mapping), ensure_ascii=False, default=_json_default))
+                f.write("\n")
+                rows += 1
+        return rows
+
+    @staticmethod
+    def _write_ids(db_session, table, path: Path, batch_size: int = 5000):
+        from sqlalchemy import select
+        stmt = select(table.c.id).order_by(table.c.id).execution_options(yield_per=batch_size)
+        with open_vault_stream(path, "wt") as f:
+            for (row_id,) in db_session.execute(stmt):
+                f.write(f"{row_id}\n")
+
+    @staticmethod
+    def load_manifest(vault_path) -> Dict[str, Any]:
+        with open(Path(vault_path) / MANIFEST, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def list_vaults(self) -> List[Dict[str, Any]]:
+        """
+        Sealed vaults, newest first. Legacy single-file JSON vaults are listed
+        too (kind 'legacy').
+        """
+        vaults = []
+        for p in self.db_backups_path.iterdir():
+            if p.is_dir() and (p / MANIFEST).exists():
+                try:
+                    m = self.load_manifest(p)
+                except Exception as e:
+                    logger.warning(f"⚠️ Unreadable vault manifest {p.name}: {e}")
+                    continue
+                vaults.append({
+                    "vault": p.name, "path": p, "kind": m.get("kind"), "base": m.get("base"),
+                    "timestamp": m.get("timestamp"), "size": sum(f.stat().st_size for f in p.iterdir())
+                })
+            elif p.is_file() and p.suffix == ".json":
+                vaults.append({
+                    "vault": p.name, "path": p, "kind": "legacy", "base": None,
+                    "timestamp": datetime.fromtimestamp(p.stat().st_mtime).isoformat(), "size": p.stat().st_size
+                })
+        return sorted(vaults, key=lambda v: v["timestamp"], reverse=True)
+
+    def _latest_full(self) -> Optional[Dict[str, Any]]:
+        return next((v for v in self.list_vaults() if v["kind"] == "full"), None)
+
+    def iter_vault(self, vault_path) -> Iterator[Tuple[str, Iterator[Dict[str, Any]]]]:
+        """
+        (table, rows) in restore order for any vault: legacy JSON file, full
+        vault, or incremental vault resolved against its base. Each table's
+        rows must be consumed before moving on to the next table.
+        """
+        vault_path = Path(vault_path)
+        if vault_path.is_file():
+            with open(vault_path, "r", encoding="utf-8") as f:
+                data = json.load(f).get("data", {})
+            for table_name, _ in VAULT_TABLES:
+                if table_name in data:
+                    yield table_name, iter(data[table_name])
+            return
+
+        manifest = self.load_manifest(vault_path)
+        base_path = base_manifest = None
+        if manifest.get("kind") == "incremental":
+            base_path = vault_path.parent / manifest["base"]
+            if not (base_path / MANIFEST).exists():
+                raise FileNotFoundError(f"Base vault {manifest['base']} of {vault_path.name} is missing")
+            base_manifest = self.load_manifest(base_path)
+
+        for table_name, _ in VAULT_TABLES:
+            entry = manifest["tables"].get(table_name)
+            if entry is None:
+                continue
+            if entry["mode"] == "delta":
+                base_entry = base_manifest["tables"][table_name]
+                yield table_name, self._iter_delta(vault_path, entry, base_path / base_entry["file"])
+            else:
+                yield table_name, self._iter_rows(vault_path / entry["file"])
+
+    @staticmethod
+    def _iter_rows(path: Path) -> Iterator[Dict[str, Any]]:
+        with open_vault_stream(path, "rt") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _iter_delta(self, vault_path: Path, entry: Dict[str, Any], base_file: Path) -> Iterator[Dict[str, Any]]:
+        """
+        Base rows up to the watermark that still exist, then the delta rows.
+        """
+        with open_vault_stream(vault_path / entry["ids_file"], "rt") as f:
+            live = {int(line) for line in f if line.strip()}
+        since = entry["since"]
+        for row in self._iter_rows(base_file):
+            if row["id"] <= since and row["id"] in live:
+                yield row
+        yield from self._iter_rows(vault_path / entry["file"])
+
+    def _rotate_vaults(self, keep_full: int):
+        """
+        Keeps the last `keep_full` full vaults and the incrementals chained to
+        them; drops `.partial` directories abandoned for over a day. Legacy
+        JSON vaults are left untouched.
+        """
+        vaults = self.list_vaults()
+        kept_fulls = [v["vault"] for v in vaults if v["kind"] == "full"][:keep_full]
+        for v in vaults:
+            if v["kind"] == "legacy":
+                continue
+            chained_to = v["vault"] if v["kind"] == "full" else v["base"]
+            if chained_to not in kept_fulls:
+                shutil.rmtree(v["path"], ignore_errors=True)
+                logger.info(f"🗑️ Rotated old vault: {v['vault']}")
+        for partial in self.db_backups_path.glob("*.partial"):
+            if datetime.now().timestamp() - partial.stat().st_mtime > 86400:
+                shutil.rmtree(partial, ignore_errors=True)
@@ -0,0 +1,125 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.core.matching import SmartMatcher, _NON_DIGIT_RE
+
+
+class BatchMatcher:
+    """
+    Vectorized SmartMatcher.match for many scraped items against the whole
+    catalog at once (bulk Purgatory re-matching).
+
+    The catalog is encoded once as a sparse token -> product posting matrix
+    (CSR arrays: `_indptr`, `_indices`). For a chunk of items, the shared-token
+    counts of every (item, product) pair are one sparse product computed with
+    a single `np.bincount`; the rules of SmartMatcher.match are then applied to
+    the whole (items x products) matrix:
+
+    - Recall: every DB token present (common == |db tokens|), else 0.
+    - Series hard filter: both sides name a series but none in common, else 0.
+    - Score: Jaccard = common / (|db| + |scraped| - common).
+    - EAN/GTIN precedence exactly as in `match` (1.0 on equal codes, 0.0 on an
+      EAN-13 mismatch).
+
+    Scores are identical to calling `match` pair by pair.
+    """
+    def __init__(self, products: Sequence, matcher: Optional[SmartMatcher] = None, chunk_size: int = 500):
+        self.matcher = matcher or SmartMatcher()
+        self.chunk_size = max(1, chunk_size)
+        self.product_ids = np.array([p.id for p in products], dtype=np.int64)
+
+        # 1. Vocabulary: catalog tokens plus series markers (needed on the scraped side)
+        product_tokens = [self.matcher.normalize(p.name) for p in products]
+        self.vocab: Dict[str, int] = {}
+        for tokens in product_tokens:
+            for t in tokens:
+                self.vocab.setdefault(t, len(self.vocab))
+        for t in sorted(self.matcher.series_tokens):
+            self.vocab.setdefault(t, len(self.vocab))
+        self._is_series = np.zeros(len(self.vocab), dtype=bool)
+        self._is_series[[self.vocab[t] for t in self.matcher.series_tokens]] = True
+
+        # 2. Token -> products posting lists in CSR form
+        token_ids = np.fromiter((self.vocab[t] for tokens in product_tokens for t in tokens), dtype=np.int64)
+        positions = np.repeat(np.arange(len(products), dtype=np.int64), [len(t) for t in product_tokens])
+        order = np.argsort(token_ids, kind="stable")
+        self._indices = positions[order]
+        self._indptr = np.concatenate(([0], np.cumsum(np.bincount(token_ids, minlength=len(self.vocab)))))
+
+        self._p_size = np.array([len(t) for t in product_tokens], dtype=np.int64)
+        self._p_series = np.array([len(t & self.matcher.series_tokens) for t in product_tokens], dtype=np.int64)
+
+        # 3. EAN fingerprints
+        eans = [getattr(p, "ean", None) for p in products]
+        self._p_has_ean = np.array([bool(e) for e in eans], dtype=bool)
+        self._p_ean = np.array([_NON_DIGIT_RE.sub('', str(e)) if e else "" for e in eans], dtype=object)
+        self._p_ean_len = np.array([len(e) for e in self._p_ean], dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.product_ids)
+
+    def _shared_counts(self, token_rows: List[List[int]]) -> np.ndarray:
+        """
+        (items x products) number of shared tokens: sparse item-token matrix
+        times the token-product postings, accumulated with one bincount.
+        """
+        n, m = len(token_rows), len(self.product_ids)
+        rows, cols = [], []
+        for i, ids in enumerate(token_rows):
+            for t in ids:
+                postings = self._indices[self._indptr[t]:self._indptr[t + 1]]
+                if len(postings):
+                    cols.append(postings)
+                    rows.append(np.full(len(postings), i, dtype=np.int64))
+        if not cols:
+            return np.zeros((n, m), dtype=np.int64)
+        flat = np.concatenate(rows) * m + np.concatenate(cols)
+        return np.bincount(flat, minlength=n * m).reshape(n, m)
+
+    def score_matrix(self, items: Sequence) -> np.ndarray:
+        """
+        Scores of `items` (objects with scraped_name, url, ean) against every
+        product: float array of shape (len(items), len(products)).
+        """
+        scraped = [self.matcher.normalize(it.scraped_name) | self.matcher.normalize(it.url) for it in items]
+        s_size = np.array([len(t) for t in scraped], dtype=np.int64)[:, None]
+        token_rows = [[self.vocab[t] for t in tokens if t in self.vocab] for tokens in scraped]
+        series_rows = [[t for t in ids if self._is_series[t]] for ids in token_rows]
+        s_series = np.array([len(ids) for ids in series_rows], dtype=np.int64)[:, None]
+
+        common = self._shared_counts(token_rows)
+        series_common = self._shared_counts(series_rows)
+
+        p_size = self._p_size[None, :]
+        valid = (p_size > 0) & (s_size > 0) & (common == p_size)
+        conflict = (self._p_series[None, :] > 0) & (s_series > 0) & (series_common == 0)
+        union = np.maximum(p_size + s_size - common, 1)
+        scores = np.where(valid & ~conflict, common / union, 0.0)
+
+        # EAN/GTIN precedence (few items carry one: handled row by row)
+        for i, it in enumerate(items):
+            raw = getattr(it, "ean", None)
+            if not raw or not self._p_has_ean.any():
+                continue
+            clean = _NON_DIGIT_RE.sub('', str(raw))
+            equal = self._p_has_ean & (self._p_ean == clean)
+            both_ean13 = self._p_has_ean & (self._p_ean_len == 13) & (len(clean) == 13)
+            scores[i, both_ean13] = equal[both_ean13].astype(float)
+            scores[i, ~both_ean13 & equal & (self._p_ean_len >= 8)] = 1.0
+        return scores
+
+    def top_k(self, items: Sequence, k: int = 5) -> List[List[Tuple[int, float]]]:
+        """
+        Best `k` (product_id, score) per item, best first, zero scores dropped.
+        Ties keep catalog order, like the pipeline's "first best score wins".
+        """
+        results = []
+        if not len(self.product_ids):
+            return [[] for _ in items]
+        for start in range(0, len(items), self.chunk_size):
+            scores = self.score_matrix(items[start:start + self.chunk_size])
+            order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+            for row, cols in zip(scores, order):
+                results.append([(int(self.product_ids[c]), float(row[c])) for c in cols if row[c] > 0])
+        return results
@@ -0,0 +1,189 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sqlalchemy import func, select
+
+from src.domain.models import ProductModel, OfferModel, PriceHistoryModel
+
+NO_PRICE = 999999.0 # Sentinel used by the views for "no offer"
+
+
+class CatalogSnapshot:
+    """
+    Columnar, read-only view of the catalog shared by every user and session.
+
+    - `products`: one row per product with flat typed columns (no nested
+      objects): id, name, category, image_url, best_price, historic_low.
+    - `offers`: active offer per (product, visual shop), newest first, sorted by
+      product_id so a product's offers are an O(log n) slice.
+    - `shop_counts`: offers per shop (Dashboard).
+
+    Price history is NOT part of the snapshot: it is loaded per visible
+    product (`load_price_history`). Ownership is a per-user boolean mask
+    aligned with `products` (`ownership_mask`), so the snapshot itself is
+    user independent.
+    """
+    def __init__(self, version: Tuple, products: pd.DataFrame, offers: pd.DataFrame, shop_counts: pd.Series):
+        self.version = version
+        self.products = products
+        self.offers = offers
+        self.shop_counts = shop_counts
+        self.built_at = datetime.utcnow()
+        self._product_ids = products["id"].to_numpy()
+        self._offer_pids = offers["product_id"].to_numpy()
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    @property
+    def memory_bytes(self) -> int:
+        return int(
+            self.products.memory_usage(deep=True).sum()
+            + self.offers.memory_usage(deep=True).sum()
+            + self.shop_counts.memory_usage(deep=True)
+        )
+
+    @property
+    def categories(self) -> List[str]:
+        return sorted(c for c in self.products["category"].cat.categories if c)
+
+    def ownership_mask(self, owned_ids: Iterable[int]) -> np.ndarray:
+        """
+        Boolean overlay aligned with `products` rows.
+        """
+        return np.isin(self._product_ids, np.fromiter(owned_ids, dtype=np.int64))
+
+    def offers_for(self, product_id: int) -> List[dict]:
+        lo = np.searchsorted(self._offer_pids, product_id, side="left")
+        hi = np.searchsorted(self._offer_pids, product_id, side="right")
+        if lo == hi:
+            return []
+        return self.offers.iloc[lo:hi][["id", "shop_name", "price", "url"]].to_dict("records")
+
+    @classmethod
+    def build(cls, session, version: Tuple) -> "CatalogSnapshot":
+        from src.web.shared import normalize_shop_name
+
+        products = pd.DataFrame(
+            session.execute(
+                select(ProductModel.id, ProductModel.name, ProductModel.category, ProductModel.image_url)
+                .order_by(ProductModel.id)
+            ).all(),
+            columns=["id", "name", "category", "image_url"]
+        )
+        offers = pd.DataFrame(
+            session.execute(
+                select(OfferModel.id, OfferModel.product_id, OfferModel.shop_name, OfferModel.price,
+                       OfferModel.min_price, OfferModel.url)
+            ).all(),
+            columns=["id", "product_id", "shop_name", "price", "min_price", "url"]
+        )
+
+        # Visual shop identity (Kaizen: Identity Union), computed once per distinct name
+        shops = {s: normalize_shop_name(s, mode="visual") for s in offers["shop_name"].dropna().unique()}
+        offers["shop_name"] = offers["shop_name"].map(shops).astype("category")
+
+        # Per-product aggregates over ALL offers (deduplication must not affect prices)
+        best = offers.loc[offers["price"] > 0].groupby("product_id")["price"].min()
+        low = offers.loc[offers["min_price"] > 0].groupby("product_id")["min_price"].min()
+        products["id"] = products["id"].astype(np.int64)
+        products["category"] = products["category"].fillna("MOTU").replace("", "MOTU").astype("category")
+        products["best_price"] = products["id"].map(best).fillna(NO_PRICE).astype(np.float32)
+        products["historic_low"] = products["id"].map(low).fillna(NO_PRICE).astype(np.float32)
+
+        shop_counts = offers["shop_name"].value_counts()
+
+        # Actionable links: newest offer (highest id) per (product, visual shop)
+        active = (
+            offers.sort_values(["product_id", "id"], ascending=[True, False], kind="stable")
+            .drop_duplicates(["product_id", "shop_name"], keep="first")
+            .drop(columns=["min_price"])
+            .reset_index(drop=True)
+        )
+        active["product_id"] = active["product_id"].astype(np.int64)
+        active["price"] = active["price"].astype(np.float32)
+
+        return cls(version, products, active, shop_counts)
+
+
+def catalog_version(session) -> Tuple:
+    """
+    Cheap change token: product/offer counts and high-water marks. Any scan
+    (new offers, price updates bump last_seen), link, unlink or deletion
+    changes it; in-place edits (product fields, offer prices, relinks) call
+    `invalidate_catalog_snapshot`.
+    """
+    p_count, p_max = session.execute(select(func.count(ProductModel.id), func.max(ProductModel.id))).one()
+    o_count, o_max, o_seen = session.execute(
+        select(func.count(OfferModel.id), func.max(OfferModel.id), func.max(OfferModel.last_seen))
+    ).one()
+    return (p_count, p_max, o_count, o_max, str(o_seen), _state["generation"])
+
+
+_lock = threading.Lock()
+_state = {"snapshot": None, "checked_at": 0.0, "generation": 0}
+
+
+def invalidate_catalog_snapshot():
+    """
+    Forces a rebuild on the next read (e.g. after editing a product's name or image).
+    """
+    with _lock:
+        _state["generation"] += 1
+        _state["checked_at"] = 0.0
+
+
+def get_catalog_snapshot(session_factory=None, recheck_seconds: float = 15.0) -> CatalogSnapshot:
+    """
+    Process-wide snapshot, rebuilt only when `catalog_version` changes. The
+    version itself is re-checked at most every `recheck_seconds`.
+    """
+    if session_factory is None:
+        from src.infrastructure.database import SessionLocal
+        session_factory = SessionLocal
+
+    with _lock:
+        snapshot: Optional[CatalogSnapshot] = _state["snapshot"]
+        if snapshot is not None and time.monotonic() - _state["checked_at"] < recheck_seconds:
+            return snapshot
+
+        with session_factory() as session:
+            version = catalog_version(session)
+            if snapshot is None or snapshot.version != version:
+                started = time.perf_counter()
+                snapshot = CatalogSnapshot.build(session, version)
+                logger.info(
+                    f"📚 Catalog snapshot rebuilt: {len(snapshot)} products, {len(snapshot.offers)} active offers, "
+                    f"{snapshot.memory_bytes / 1024:.0f} KB in {(time.perf_counter() - started) * 1000:.0f} ms"
+                )
+        _state["snapshot"] = snapshot
+        _state["checked_at"] = time.monotonic()
+        return snapshot
+
+
+def load_price_history(session, product_ids: Iterable[int]) -> Dict[int, pd.DataFrame]:
+    """
+    Price history of a few products (the visible page) in one query:
+    product_id -> DataFrame(Fecha, Precio, Tienda) sorted by date.
+    """
+    from src.web.shared import normalize_shop_name
+
+    ids = list(set(product_ids))
+    if not ids:
+        return {}
+    rows = session.execute(
+        select(OfferModel.product_id, PriceHistoryModel.recorded_at, PriceHistoryModel.price, OfferModel.shop_name)
+        .join(OfferModel, OfferModel.id == PriceHistoryModel.offer_id)
+        .where(OfferModel.product_id.in_(ids))
+        .order_by(PriceHistoryModel.recorded_at)
+    ).all()
+    if not rows:
+        return {}
+    df = pd.DataFrame(rows, columns=["product_id", "Fecha", "Precio", "Tienda"])
+    df["Tienda"] = df["Tienda"].map(lambda s: normalize_shop_name(s, mode="visual"))
+    return {pid: group.drop(columns=["product_id"]).reset_index(drop=True) for pid, group in df.groupby("product_id")}
@@ -0,0 +1,107 @@
+import json
+import os
+import random
+import threading
+from datetime import datetime
+from typing import Dict
+from urllib.parse import urlparse
+
+from loguru import logger
+
+
+class AdaptiveDelayController:
+    """
+    AIMD per-domain delay (Additive Increase of speed, Multiplicative Decrease).
+    Every healthy response shaves `decrease_step` seconds off the domain's
+    pre-navigation delay; a 403/429, a block page, an error or a slow
+    response multiplies it by `backoff`. The state is saved to disk so each
+    shop starts the next run at its last known safe rate.
+    """
+    DEFAULT_PATH = os.path.join("data", "cache", "delay_state.json")
+
+    def __init__(
+        self,
+        path: str = DEFAULT_PATH,
+        initial_delay: float = 3.5,
+        min_delay: float = 0.5,
+        max_delay: float = 30.0,
+        decrease_step: float = 0.25,
+        backoff: float = 2.0,
+        slow_threshold: float = 8.0
+    ):
+        self.path = path
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.decrease_step = decrease_step
+        self.backoff = backoff
+        self.slow_threshold = slow_threshold
+        self._delays: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def domain_of(url: str) -> str:
+        netloc = urlparse(url).netloc.lower()
+        return netloc[4:] if netloc.startswith("www.") else netloc
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self._delays = {
+                d: min(self.max_delay, max(self.min_delay, float(v["delay"])))
+                for d, v in state.get("domains", {}).items()
+            }
+            logger.info(f"🐢 Delay state loaded: {self._delays}")
+        except Exception as e:
+            logger.warning(f"Could not load delay state ({e}). Starting from defaults.")
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with self._lock:
+                state = {
+                    "updated_at": datetime.now().isoformat(),
+                    "domains": {d: {"delay": round(v, 3)} for d, v in self._delays.items()}
+                }
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=2)
+        except Exception as e:
+            logger.warning(f"Could not save delay state: {e}")
+
+    def current(self, url: str) -> float:
+        with self._lock:
+            return self._delays.get(self.domain_of(url), self.initial_delay)
+
+    def delay_for(self, url: str) -> float:
+        """
+        Seconds to wait before the next request to this domain (±20% jitter).
+        """
+        return self.current(url) * random.uniform(0.8, 1.2)
+
+    def scale(self, url: str) -> float:
+        """
+        How fast this domain currently runs relative to the default pace.
+        Used to shrink the scrapers' own settle pauses (scroll, render waits).
+        """
+        return min(1.0, self.current(url) / self.initial_delay)
+
+    def record(self, url: str, status: int = 200, elapsed: float = 0.0, blocked: bool = False):
+        healthy = not blocked and 200 <= status < 400 and elapsed < self.slow_threshold
+        domain = self.domain_of(url)
+        with self._lock:
+            delay = self._delays.get(domain, self.initial_delay)
+            if healthy:
+                delay = max(self.min_delay, delay - self.decrease_step)
+            else:
+                delay = min(self.max_delay, delay * self.backoff)
+            self._delays[domain] = delay
+        if not healthy:
+            logger.warning(f"🐢 Backing off {domain}: next delay {delay:.2f}s (status={status}, {elapsed:.1f}s, blocked={blocked})")
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {d: round(v, 2) for d, v in self._delays.items()}
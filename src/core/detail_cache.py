@@ -0,0 +1,79 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from loguru import logger
+
+
+class DetailCache:
+    """
+    PRECISION KAIZEN: Persistent URL -> detail fields cache for the Deep Harvest.
+    An EAN never changes for a product page, so once `_scrape_detail` has found it
+    we keep it on disk (local SQLite file) and skip the navigation on later runs.
+    Entries expire after `ttl_days` so a re-listed URL is eventually re-checked.
+    Only successful extractions are stored: an empty result can also mean a
+    failed navigation.
+    """
+    DEFAULT_PATH = os.path.join("data", "cache", "detail_cache.db")
+
+    def __init__(self, path: str = DEFAULT_PATH, ttl_days: float = 90):
+        self.path = path
+        self.ttl_seconds = ttl_days * 86400
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "stored": 0}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS detail_cache ("
+            "url TEXT PRIMARY KEY, data TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, url: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, fetched_at FROM detail_cache WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            data, fetched_at = row
+            if time.time() - fetched_at > self.ttl_seconds:
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+        try:
+            return json.loads(data)
+        except ValueError:
+            return None
+
+    def put(self, url: str, data: dict):
+        if not data:
+            return
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO detail_cache (url, data, fetched_at) VALUES (?, ?, ?)",
+                    (url, json.dumps(data, ensure_ascii=False), time.time())
+                )
+                self._conn.commit()
+                self.stats["stored"] += 1
+            except sqlite3.Error as e:
+                logger.warning(f"Detail cache write failed for {url}: {e}")
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM detail_cache WHERE fetched_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            self._conn.commit()
+            return cur.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
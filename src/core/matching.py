@@ -1,35 +1,91 @@
 import re
+import threading
 import unicodedata
-from typing import Set, Tuple, List
+from collections import defaultdict, OrderedDict
+from typing import FrozenSet, Tuple, List, Dict, Optional
 from urllib.parse import urlparse
 from src.domain.schemas import Product
 
+# Precompiled once at import (normalize() runs thousands of times per scan)
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]')
+_NON_DIGIT_RE = re.compile(r'[^0-9]')
+
 class SmartMatcher:
-    def __init__(self):
+    # Bounded LRU token cache shared by every instance in the process, so the
+    # pipeline and the Purgatory renders reuse each other's work. Keys include
+    # the matcher configuration: differently configured matchers never share entries.
+    CACHE_MAX_SIZE = 20000
+    _token_cache: "OrderedDict[Tuple[tuple, str], FrozenSet[str]]" = OrderedDict()
+    _cache_lock = threading.Lock()
+    _cache_hits = 0
+    _cache_misses = 0
+
+    def __init__(self, stop_words: Optional[FrozenSet[str]] = None, series_tokens: Optional[FrozenSet[str]] = None):
         # Tokens that don't distinguish a product (Stop Words for this Domain)
-        self.stop_words = {
+        self.stop_words = frozenset(stop_words) if stop_words is not None else frozenset({
             "masters", "universe", "universo", "motu", "origins", "masterverse",
             "mattel", "figure", "figura", "action", "toy", "juguete", "cm", "inch",
             "wave", "deluxe", "collection", "collector", "edicion", "edition",
             "new", "nuevo", "caja", "box", "original", "authentic", "classics",
             "super7", "reaction", "pop", "funko", "vinyl", "of", "the", "del", "de", "y", "and",
             "comprar", "venta", "oferta", "precio", "barato", "envio", "gratis"
-        }
+        })
         
         # Hard Filters: If one defines 'Origins' and other 'Masterverse', they can NEVER match.
         # These are series/lines that are distinct.
-        self.series_tokens = {
+        self.series_tokens = frozenset(series_tokens) if series_tokens is not None else frozenset({
             "origins", "masterverse", "cgi", "netflix", "filmation", "200x", "vintage", "commemorative",
             "turtles", "grayskull", "stranger", "things", "cartoon", "collection", "sun", "man", "rulers", "sunman"
-        }
+        })
+        # Token cache key (frozensets, so it cannot go stale)
+        self._config = (self.stop_words, self.series_tokens)
 
-    def normalize(self, text: str) -> Set[str]:
+    def normalize(self, text: str) -> FrozenSet[str]:
         """
         Converts text to improved set of significant tokens.
+        Memoized by (configuration, raw string) in a bounded LRU cache (results are immutable).
         """
         if not text:
-            return set()
-            
+            return frozenset()
+
+        cls = SmartMatcher
+        key = (self._config, text)
+        with cls._cache_lock:
+            cached = cls._token_cache.get(key)
+            if cached is not None:
+                cls._token_cache.move_to_end(key)
+                cls._cache_hits += 1
+                return cached
+            cls._cache_misses += 1
+
+        tokens = self._normalize_uncached(text)
+
+        with cls._cache_lock:
+            cls._token_cache[key] = tokens
+            if len(cls._token_cache) > cls.CACHE_MAX_SIZE:
+                cls._token_cache.popitem(last=False)
+        return tokens
+
+    @classmethod
+    def cache_stats(cls) -> Dict[str, float]:
+        """Hit/miss counters of the normalization cache (for scan logs)."""
+        with cls._cache_lock:
+            total = cls._cache_hits + cls._cache_misses
+            return {
+                "hits": cls._cache_hits,
+                "misses": cls._cache_misses,
+                "size": len(cls._token_cache),
+                "hit_rate": round(cls._cache_hits / total, 3) if total else 0.0
+            }
+
+    @classmethod
+    def clear_cache(cls):
+        with cls._cache_lock:
+            cls._token_cache.clear()
+            cls._cache_hits = 0
+            cls._cache_misses = 0
+
+    def _normalize_uncached(self, text: str) -> FrozenSet[str]:
         # URL Handling: extract slug
         if text.startswith("http"):
             try:
@@ -43,7 +99,7 @@ class SmartMatcher:
         # Standardize
         text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('utf-8')
         text = text.lower()
-        text = re.sub(r'[^a-z0-9]', ' ', text)
+        text = _NON_ALNUM_RE.sub(' ', text)
         
         tokens = set(text.split())
         
@@ -56,7 +112,7 @@ class SmartMatcher:
         # Refined Stop Words Logic in __init__ (I will fix it there).
         
         significant = tokens - self.stop_words
-        return {t for t in significant if len(t) > 1 or t.isdigit()}
+        return frozenset(t for t in significant if len(t) > 1 or t.isdigit())
 
     def match(self, product_name: str, scraped_title: str, scraped_url: str, db_ean: str = None, scraped_ean: str = None) -> Tuple[bool, float, str]:
         """
@@ -70,8 +126,8 @@ class SmartMatcher:
         # --- EAN MATCH (PHASE 10 & 19: PRECISION) ---
         if db_ean and scraped_ean:
             # Clean both EANs (remove spaces/dashes)
-            clean_db = re.sub(r'[^0-9]', '', str(db_ean))
-            clean_scraped = re.sub(r'[^0-9]', '', str(scraped_ean))
+            clean_db = _NON_DIGIT_RE.sub('', str(db_ean))
+            clean_scraped = _NON_DIGIT_RE.sub('', str(scraped_ean))
             
             # EAN-13 Validation (Phase 19)
             is_valid_ean = lambda x: len(x) == 13 and x.isdigit()
@@ -129,3 +185,64 @@ class SmartMatcher:
             return True, jaccard, "High Jaccard Match"
         else:
             return False, jaccard, f"Too many extra tokens: {extra_in_scraped}"
+
+
+class CandidateIndex:
+    """
+    Inverted index (token -> catalog positions) built once per shop scan.
+
+    Rule 1 of SmartMatcher.match requires every significant DB token to be present
+    in the scraped tokens, so each product only needs to be indexed under its
+    RAREST token: if that token is missing from an offer, the product can never
+    match semantically. EAN/GTIN fingerprints are indexed separately because they
+    can match regardless of the name.
+    """
+    def __init__(self, matcher: SmartMatcher, products: List):
+        self.matcher = matcher
+        self.products = list(products)
+        self.by_token: Dict[str, List[int]] = defaultdict(list)
+        self.by_ean: Dict[str, List[int]] = defaultdict(list)
+
+        # 1. Normalize every catalog name exactly once
+        product_tokens = [matcher.normalize(p.name) for p in self.products]
+
+        # 2. Document frequency per token (rarest = most selective key)
+        doc_freq: Dict[str, int] = defaultdict(int)
+        for tokens in product_tokens:
+            for t in tokens:
+                doc_freq[t] += 1
+
+        # 3. Posting lists
+        for pos, (p, tokens) in enumerate(zip(self.products, product_tokens)):
+            if tokens:
+                rarest = min(tokens, key=lambda t: (doc_freq[t], t))
+                self.by_token[rarest].append(pos)
+
+            clean_ean = self._clean_ean(getattr(p, "ean", None))
+            if clean_ean:
+                self.by_ean[clean_ean].append(pos)
+
+    @staticmethod
+    def _clean_ean(ean) -> Optional[str]:
+        if not ean:
+            return None
+        clean = _NON_DIGIT_RE.sub('', str(ean))
+        # Same minimum length SmartMatcher accepts for a GTIN match
+        return clean if len(clean) >= 8 else None
+
+    def candidates(self, scraped_title: str, scraped_url: str, scraped_ean: str = None) -> List:
+        """
+        Returns the products that could possibly match this offer, in the original
+        catalog order so the 'first best score wins' tie-break is preserved.
+        """
+        scraped_tokens = self.matcher.normalize(scraped_title) | self.matcher.normalize(scraped_url)
+
+        positions = set()
+        for t in scraped_tokens:
+            positions.update(self.by_token.get(t, ()))
+
+        clean_ean = self._clean_ean(scraped_ean)
+        if clean_ean:
+            positions.update(self.by_ean.get(clean_ean, ()))
+
+        return [self.products[pos] for pos in sorted(positions)]
@@ -0,0 +1,206 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+import httpx
+
+from src.core.notifier import NotifierService
+
+logger = logging.getLogger("notifier")
+
+
+class NotificationDispatcher:
+    """
+    Delivers the notification outbox to Telegram.
+    One pooled AsyncClient for every message, pending deals coalesced into
+    digests, at most one message per `min_interval` seconds (Telegram allows
+    ~1 msg/s per chat) and `retry_after` honoured on 429. Failed rows are
+    retried with exponential backoff on later drains until `max_attempts`.
+
+    Usage:
+        async with NotificationDispatcher() as dispatcher:
+            await dispatcher.drain()
+    """
+    def __init__(
+        self,
+        session_factory=None,
+        digest_size: int = 8,
+        batch_size: int = 200,
+        max_attempts: int = 5,
+        min_interval: float = 1.1
+    ):
+        if session_factory is None:
+            from src.infrastructure.database import SessionLocal
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+        self.notifier = NotifierService()
+        self.digest_size = max(1, digest_size)
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.min_interval = min_interval
+        self.stats = {"sent_messages": 0, "delivered_rows": 0, "retried_rows": 0, "failed_rows": 0, "rate_limited": 0}
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._last_send = 0.0
+        self._drain_lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "NotificationDispatcher":
+        self._client = httpx.AsyncClient(timeout=10.0, limits=httpx.Limits(max_connections=2, max_keepalive_connections=2))
+        return self
+
+    async def __aexit__(self, *exc):
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+    async def run(self, stop_event: asyncio.Event, interval: float = 15.0):
+        """
+        Background loop for long scans: drains every `interval` seconds and
+        once more after `stop_event` is set.
+        """
+        while not stop_event.is_set():
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.drain()
+
+    async def drain(self) -> int:
+        """
+        Sends every due outbox row. Returns the number of rows delivered.
+        """
+        if not self.notifier.api_url or not self.notifier.chat_id or not self._client:
+            return 0
+        async with self._drain_lock:
+            try:
+                rows = await asyncio.to_thread(self._load_due)
+            except Exception as e:
+                logger.error(f"❌ Could not read notification outbox: {e}")
+                return 0
+
+            delivered = 0
+            for text, ids in self._compose(rows):
+                error = await self._send(text)
+                await asyncio.to_thread(self._mark, ids, error)
+                if error is None:
+                    delivered += len(ids)
+            if rows:
+                logger.info(f"📨 Outbox drained: {delivered}/{len(rows)} notifications delivered.")
+            return delivered
+
+    def _load_due(self) -> List[Tuple[int, str, str]]:
+        from src.domain.models import NotificationOutboxModel as Outbox
+        db = self.session_factory()
+        try:
+            return [
+                (r.id, r.kind, r.payload)
+                for r in db.query(Outbox.id, Outbox.kind, Outbox.payload)
+                .filter(Outbox.status == "pending", Outbox.next_attempt_at <= datetime.utcnow())
+                .order_by(Outbox.id)
+                .limit(self.batch_size)
+                .all()
+            ]
+        finally:
+            db.close()
+
+    def _compose(self, rows: List[Tuple[int, str, str]]) -> List[Tuple[str, List[int]]]:
+        """
+        Deals are coalesced into digests of `digest_size`; price alerts and
+        free-form messages are already final texts and go out one by one.
+        """
+        messages = []
+        deals = []
+        for row_id, kind, payload in rows:
+            if kind == "deal":
+                try:
+                    deals.append((row_id, json.loads(payload)))
+                except ValueError:
+                    logger.error(f"❌ Corrupt deal payload in outbox row {row_id}")
+            else:
+                messages.append((payload, [row_id]))
+        for i in range(0, len(deals), self.digest_size):
+            chunk = deals[i:i + self.digest_size]
+            messages.append((self.notifier.format_deal_digest([d for _, d in chunk]), [row_id for row_id, _ in chunk]))
+        return messages
+
+    async def _send(self, text: str) -> Optional[str]:
+        """
+        POSTs one message. Returns None on success or the error description.
+        """
+        payload = {"chat_id": self.notifier.chat_id, "text": text, "parse_mode": "Markdown"}
+        error = None
+        for attempt in range(3):
+            wait = self._last_send + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last_send = time.monotonic()
+            try:
+                resp = await self._client.post(self.notifier.api_url, json=payload)
+            except httpx.HTTPError as e:
+                error = f"network: {e}"
+                await asyncio.sleep(2 ** attempt)
+                continue
+
+            if resp.status_code == 200:
+                self.stats["sent_messages"] += 1
+                return None
+            if resp.status_code == 429:
+                # Telegram tells us exactly how long to back off
+                self.stats["rate_limited"] += 1
+                try:
+                    retry_after = float(resp.json().get("parameters", {}).get("retry_after", 5))
+                except ValueError:
+                    retry_after = 5.0
+                logger.warning(f"⏳ Telegram rate limit: retrying in {retry_after:.0f}s")
+                await asyncio.sleep(retry_after)
+                error = "429 rate limited"
+                continue
+            error = f"{resp.status_code}: {resp.text[:200]}"
+            if resp.status_code < 500:
+                break # Bad request (e.g. broken Markdown): retrying will not help
+            await asyncio.sleep(2 ** attempt)
+
+        logger.error(f"❌ Telegram Error {error}")
+        return error
+
+    def _mark(self, ids: List[int], error: Optional[str]):
+        from src.domain.models import NotificationOutboxModel as Outbox
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            for row in db.query(Outbox).filter(Outbox.id.in_(ids)).all():
+                row.attempts = (row.attempts or 0) + 1
+                if error is None:
+                    row.status = "sent"
+                    row.sent_at = now
+                    row.last_error = None
+                    self.stats["delivered_rows"] += 1
+                elif row.attempts >= self.max_attempts:
+                    row.status = "failed"
+                    row.last_error = error
+                    self.stats["failed_rows"] += 1
+                else:
+                    row.last_error = error
+                    row.next_attempt_at = now + timedelta(minutes=2 ** row.attempts)
+                    self.stats["retried_rows"] += 1
+            db.commit()
+        except Exception as e:
+            logger.error(f"❌ Could not update notification outbox: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+
+async def dispatch_pending() -> int:
+    """
+    One-shot drain for standalone jobs (and `python -m src.core.notification_dispatcher`).
+    """
+    async with NotificationDispatcher() as dispatcher:
+        return await dispatcher.drain()
+
+
+if __name__ == "__main__":
+    asyncio.run(dispatch_pending())
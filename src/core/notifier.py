@@ -1,32 +1,104 @@
+import hashlib
 import httpx
+import json
 import logging
-from typing import Optional
+from typing import List, Optional
 from src.core.config import settings
+from sqlalchemy import event
 from sqlalchemy.orm import Session
-from datetime import datetime
 
 logger = logging.getLogger("notifier")
 
 class NotifierService:
-    _last_sent = {} # Class-level cache to persist across instances in same process
-
-    def __init__(self):
+    def __init__(self, throttle_store=None):
         self.token = settings.TELEGRAM_BOT_TOKEN
         self.chat_id = settings.TELEGRAM_CHAT_ID
         self.api_url = f"https://api.telegram.org/bot{self.token}/sendMessage" if self.token else None
+        # Persistent throttling (survives new processes / Streamlit reloads)
+        if throttle_store is None:
+            from src.core.throttle_store import ThrottleStore
+            throttle_store = ThrottleStore.shared()
+        self.throttle_store = throttle_store
 
     def _should_throttle(self, key: str, minutes: int = 60) -> bool:
         """
         Returns True if the message should be throttled.
         """
-        now = datetime.utcnow()
-        if key in self._last_sent:
-            last_time = self._last_sent[key]
-            if (now - last_time).total_seconds() < (minutes * 60):
-                return True
-        self._last_sent[key] = now
+        try:
+            return self.throttle_store.hit(key, minutes * 60)
+        except Exception as e:
+            logger.warning(f"Throttle store unavailable ({e}). Letting the message through.")
+            return False
+
+    def _should_throttle_in(self, db: Session, key: str, minutes: int = 60) -> bool:
+        """
+        Like _should_throttle, for messages queued in `db`'s transaction: the
+        claim is released again unless that transaction commits, so a rolled
+        back batch does not silence the alert for the whole window.
+        """
+        if self._should_throttle(key, minutes):
+            return True
+        claims = db.info.get("throttle_claims")
+        if claims is None:
+            claims = db.info["throttle_claims"] = []
+
+            @event.listens_for(db, "after_commit")
+            def _keep_claims(session):
+                claims.clear()
+
+            @event.listens_for(db, "after_transaction_end")
+            def _release_claims(session, transaction):
+                if transaction.parent is not None or transaction.nested:
+                    return
+                while claims:
+                    store, claimed = claims.pop()
+                    try:
+                        store.release(claimed)
+                    except Exception as e:
+                        logger.warning(f"Could not release throttle key {claimed}: {e}")
+        claims.append((self.throttle_store, key))
         return False
 
+    @staticmethod
+    def deal_payload(product, offer, discount: float) -> dict:
+        return {
+            "product": product.name,
+            "price": offer.price,
+            "max_price": offer.max_price,
+            "discount": discount,
+            "shop": offer.shop_name,
+            "url": offer.url,
+        }
+
+    @staticmethod
+    def format_deal(deal: dict) -> str:
+        savings = deal["max_price"] - deal["price"]
+        return (
+            f"🔥 **ALERTA DE CAZA** 🔥\n\n"
+            f"📦 **{deal['product']}**\n"
+            f"💰 Precio: **{deal['price']:.2f}€**\n"
+            f"📉 Descuento: **-{deal['discount']*100:.0f}%** (Antes {deal['max_price']:.2f}€)\n"
+            f"💵 Ahorro: {savings:.2f}€\n"
+            f"🏪 Tienda: {deal['shop']}\n\n"
+            f"[🔗 Comprar ahora]({deal['url']})"
+        )
+
+    @classmethod
+    def format_deal_digest(cls, deals: List[dict]) -> str:
+        """
+        Several deals coalesced into one message (one line each).
+        """
+        if len(deals) == 1:
+            return cls.format_deal(deals[0])
+        lines = [f"🔥 **ALERTA DE CAZA: {len(deals)} CHOLLOS** 🔥\n"]
+        for deal in deals:
+            lines.append(
+                f"📦 **{deal['product']}** — **{deal['price']:.2f}€** "
+                f"(-{deal['discount']*100:.0f}%, antes {deal['max_price']:.2f}€) · {deal['shop']} "
+                f"[🔗]({deal['url']})"
+            )
+        return "\n".join(lines)
+
     async def send_deal_alert(self, product, offer, discount: float):
         if not self.api_url or not self.chat_id:
             return
@@ -35,21 +107,9 @@ class NotifierService:
         if self._should_throttle(f"deal_{product.name}", minutes=120): # 2 hours
             return
 
-        savings = offer.max_price - offer.price
-        
-        msg = (
-            f"🔥 **ALERTA DE CAZA** 🔥\n\n"
-            f"📦 **{product.name}**\n"
-            f"💰 Precio: **{offer.price:.2f}€**\n"
-            f"📉 Descuento: **-{discount*100:.0f}%** (Antes {offer.max_price:.2f}€)\n"
-            f"💵 Ahorro: {savings:.2f}€\n"
-            f"🏪 Tienda: {offer.shop_name}\n\n"
-            f"[🔗 Comprar ahora]({offer.url})"
-        )
-
         payload = {
             "chat_id": self.chat_id,
-            "text": msg,
+            "text": self.format_deal(self.deal_payload(product, offer, discount)),
             "parse_mode": "Markdown"
         }
 
@@ -63,42 +123,38 @@ class NotifierService:
         except Exception as e:
             logger.error(f"❌ Failed to send Telegram alert: {e}")
 
-    def send_deal_alert_sync(self, product, offer, discount: float):
-        """Synchronous version for use in sync pipeline context"""
+    # --- OUTBOX (enqueued in the caller's transaction, sent by NotificationDispatcher) ---
+
+    def _enqueue(self, db: Session, kind: str, payload: str):
+        from src.domain.models import NotificationOutboxModel
+        db.add(NotificationOutboxModel(kind=kind, payload=payload))
+
+    def enqueue_deal_alert(self, db: Session, product, offer, discount: float):
+        """
+        Queues a deal for the next dispatcher digest. Committed with the batch.
+        """
         if not self.api_url or not self.chat_id:
             return
 
-        # Rate limit per product
-        if self._should_throttle(f"deal_{product.name}", minutes=120):
+        # Rate limit per product (claim kept only if the batch commits)
+        if self._should_throttle_in(db, f"deal_{product.name}", minutes=120):
             return
 
-        savings = offer.max_price - offer.price
-        
-        msg = (
-            f"🔥 **ALERTA DE CAZA** 🔥\n\n"
-            f"📦 **{product.name}**\n"
-            f"💰 Precio: **{offer.price:.2f}€**\n"
-            f"📉 Descuento: **-{discount*100:.0f}%** (Antes {offer.max_price:.2f}€)\n"
-            f"💵 Ahorro: {savings:.2f}€\n"
-            f"🏪 Tienda: {offer.shop_name}\n\n"
-            f"[🔗 Comprar ahora]({offer.url})"
-        )
+        self._enqueue(db, "deal", json.dumps(self.deal_payload(product, offer, discount), ensure_ascii=False))
 
-        payload = {
-            "chat_id": self.chat_id,
-            "text": msg,
-            "parse_mode": "Markdown"
-        }
+    def enqueue_message(self, db: Session, text: str):
+        """
+        Queues a free-form message (health/block alerts) with anti-spam protection.
+        """
+        if not self.api_url or not self.chat_id:
+            return
 
-        try:
-            with httpx.Client() as client:
-                resp = client.post(self.api_url, json=payload, timeout=10.0)
-                if resp.status_code == 200:
-                    logger.info(f"📨 Alert sent for {product.name}")
-                else:
-                    logger.error(f"❌ Telegram Error {resp.status_code}: {resp.text}")
-        except Exception as e:
-            logger.error(f"❌ Failed to send Telegram alert: {e}")
+        msg_hash = hashlib.md5(text.encode()).hexdigest()
+        if self._should_throttle_in(db, f"msg_{msg_hash}", minutes=30):
+            logger.warning(f"Throttling duplicate message: {text[:50]}...")
+            return
+
+        self._enqueue(db, "message", text)
 
     async def send_message(self, text: str):
         """Generic message sender with anti-spam protection"""
@@ -106,7 +162,6 @@ class NotifierService:
             return
 
         # Rate limit based on message content to avoid alert loops
-        import hashlib
         msg_hash = hashlib.md5(text.encode()).hexdigest()
         if self._should_throttle(f"msg_{msg_hash}", minutes=30):
             logger.warning(f"Throttling duplicate message: {text[:50]}...")
@@ -123,24 +178,23 @@ class NotifierService:
         except Exception:
             pass
 
-    def check_price_alerts_sync(self, db: Session, product, offer):
-        from src.domain.models import ProductModel, OfferModel, PriceAlertModel
+    def enqueue_price_alerts(self, db: Session, product, offer, index=None):
         """
-        Checks if a newly updated price triggers any user alerts.
+        Checks if a newly updated price triggers any user alerts and queues them.
+        Pass the batch's AlertIndex to avoid a query per offer; the caller then
+        flushes it before committing. Without one, a single-product index is
+        loaded and flushed here.
         """
-        alerts = db.query(PriceAlertModel).filter(
-            PriceAlertModel.product_id == product.id,
-            PriceAlertModel.is_active == True,
-            PriceAlertModel.target_price >= offer.price
-        ).all()
-        
-        for alert in alerts:
-            # Avoid notifying too often (e.g. once per 12h per alert)
-            if alert.last_notified_at:
-                from datetime import timedelta
-                if datetime.utcnow() - alert.last_notified_at < timedelta(hours=12):
-                    continue
-            
+        if not self.api_url or not self.chat_id:
+            return
+
+        from src.core.alert_index import AlertIndex
+        own_index = index is None
+        if own_index:
+            index = AlertIndex.load(db, [product.id])
+
+        # Avoid notifying too often (cooldown of 12h per alert, handled by the index)
+        for alert in index.triggered(product.id, offer.price):
             msg = (
                 f"🛡️ **EL CENTINELA HA AVISTADO UNA PRESA** 🛡️\n\n"
                 f"🎯 **{product.name}** ha bajado de tu umbral ({alert.target_price:.2f}€)\n"
@@ -149,19 +203,9 @@ class NotifierService:
                 f"[🔗 Abrir en el Oráculo]({offer.url})"
             )
             
-            payload = {
-                "chat_id": self.chat_id, # Target chat_id
-                "text": msg,
-                "parse_mode": "Markdown"
-            }
-            
-            try:
-                if self.api_url:
-                    with httpx.Client() as client:
-                        resp = client.post(self.api_url, json=payload, timeout=10.0)
-                        if resp.status_code == 200:
-                            alert.last_notified_at = datetime.utcnow()
-                            db.commit()
-                            logger.info(f"🔔 Price alert sent to user {alert.user_id} for {product.name}")
-            except Exception as e:
-                logger.error(f"❌ Failed to send Sentinel alert: {e}")
+            # Claimed now (same transaction as the outbox row): the outbox guarantees delivery
+            self._enqueue(db, "price_alert", msg)
+            logger.info(f"🔔 Price alert queued for user {alert.user_id} for {product.name}")
+
+        if own_index:
+            index.flush(db)
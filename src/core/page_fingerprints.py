@@ -0,0 +1,69 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable
+
+
+class PageFingerprintStore:
+    """
+    INCREMENTAL KAIZEN: Per-shop listing page fingerprints.
+    A fingerprint is the hash of the parsed (url, price, availability) tuples
+    of one listing page. If a page hashes the same as on the previous scan, the
+    runner skips matching and DB writes for it and only touches `last_seen`.
+    Fingerprints older than `max_age_days` are ignored, forcing a periodic
+    full pass. Stored in a local SQLite file, next to the detail cache.
+    """
+    DEFAULT_PATH = os.path.join("data", "cache", "page_fingerprints.db")
+
+    def __init__(self, path: str = DEFAULT_PATH, max_age_days: float = 7):
+        self.path = path
+        self.max_age_seconds = max_age_days * 86400
+        self.stats = {"unchanged": 0, "changed": 0, "saved": 0}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS page_fingerprints ("
+            "shop TEXT NOT NULL, page_key TEXT NOT NULL, fingerprint TEXT NOT NULL, "
+            "updated_at REAL NOT NULL, PRIMARY KEY (shop, page_key))"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def fingerprint(offers: Iterable) -> str:
+        rows = sorted(f"{o.url}|{o.price:.2f}|{int(bool(o.is_available))}" for o in offers)
+        return hashlib.sha1("\n".join(rows).encode("utf-8")).hexdigest()
+
+    def is_unchanged(self, shop: str, page_key: str, fingerprint: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, updated_at FROM page_fingerprints WHERE shop = ? AND page_key = ?",
+                (shop, page_key)
+            ).fetchone()
+        unchanged = (
+            row is not None
+            and row[0] == fingerprint
+            and time.time() - row[1] <= self.max_age_seconds
+        )
+        self.stats["unchanged" if unchanged else "changed"] += 1
+        return unchanged
+
+    def save(self, shop: str, page_key: str, fingerprint: str):
+        """
+        Call only once the page has been persisted, so a crashed batch is
+        re-processed on the next scan.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO page_fingerprints (shop, page_key, fingerprint, updated_at) VALUES (?, ?, ?, ?)",
+                (shop, page_key, fingerprint, time.time())
+            )
+            self._conn.commit()
+            self.stats["saved"] += 1
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,183 @@
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import delete, func, or_, select
+
+from src.domain.models import ProductModel, PendingMatchModel, PurgatorySuggestionModel as Suggestion
+
+
+class PurgatorySuggester:
+    """
+    Background worker behind the Purgatory page: scores pending items against
+    the catalog once and stores the top-k matches in `purgatory_suggestions`.
+
+    Only stale items are scored: new pending items, or every item when the
+    catalog changed (product added, removed or edited). Scoring is vectorized
+    per chunk by the BatchMatcher, so a full rescore after catalog growth is
+    a few sparse products instead of a pending x products loop.
+    """
+    def __init__(self, top_k: int = 5, chunk_size: int = 500):
+        self.top_k = max(1, top_k)
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def catalog_version(db) -> str:
+        """
+        Cheap change token of the matchable catalog (names and EANs live in
+        products; updated_at is bumped on every edit).
+        """
+        count, max_id, last_update = db.execute(
+            select(func.count(ProductModel.id), func.max(ProductModel.id), func.max(ProductModel.updated_at))
+        ).one()
+        return f"{count}:{max_id}:{last_update}"
+
+    def _stale_filter(self, version: str):
+        return or_(
+            Suggestion.pending_id.is_(None),
+            Suggestion.catalog_version != version,
+            Suggestion.pending_url != PendingMatchModel.url
+        )
+
+    def stale_count(self, db, version: Optional[str] = None) -> int:
+        version = version or self.catalog_version(db)
+        return db.execute(
+            select(func.count(PendingMatchModel.id))
+            .outerjoin(Suggestion, Suggestion.pending_id == PendingMatchModel.id)
+            .where(self._stale_filter(version))
+        ).scalar_one()
+
+    def refresh(self, db, full: bool = False) -> Dict[str, int]:
+        """
+        Scores every stale pending item (all of them with `full`) and prunes
+        suggestions of items that left the Purgatory. Commits per chunk.
+        """
+        from src.core.batch_matcher import BatchMatcher
+
+        started = time.perf_counter()
+        stats = {"scored": 0, "pruned": 0}
+
+        pruned = db.execute(
+            delete(Suggestion)
+            .where(Suggestion.pending_id.not_in(select(PendingMatchModel.id)))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        stats["pruned"] = pruned or 0
+        db.commit()
+
+        version = self.catalog_version(db)
+        query = (
+            select(PendingMatchModel.id, PendingMatchModel.scraped_name, PendingMatchModel.url, PendingMatchModel.ean)
+            .outerjoin(Suggestion, Suggestion.pending_id == PendingMatchModel.id)
+            .order_by(PendingMatchModel.id)
+        )
+        if not full:
+            query = query.where(self._stale_filter(version))
+        stale = db.execute(query).all()
+        if not stale:
+            return stats
+
+        # Stamp rows with the version read right before the catalog load: an
+        # edit landing during the load or the chunk commits leaves them stale
+        # (rescored next refresh), never marked fresh against an older catalog
+        version = self.catalog_version(db)
+        products = db.execute(select(ProductModel.id, ProductModel.name, ProductModel.ean).order_by(ProductModel.id)).all()
+        engine = BatchMatcher(products, chunk_size=self.chunk_size)
+
+        for i in range(0, len(stale), self.chunk_size):
+            chunk = stale[i:i + self.chunk_size]
+            now = datetime.utcnow()
+            rows = []
+            for item, top in zip(chunk, engine.top_k(chunk, self.top_k)):
+                top = [(pid, round(score, 4)) for pid, score in top]
+                rows.append(Suggestion(
+                    pending_id=item.id,
+                    pending_url=item.url,
+                    suggestions=json.dumps(top),
+                    best_product_id=top[0][0] if top else None,
+                    best_score=top[0][1] if top else 0.0,
+                    catalog_version=version,
+                    computed_at=now
+                ))
+            db.execute(
+                delete(Suggestion)
+                .where(Suggestion.pending_id.in_([item.id for item in chunk]))
+                .execution_options(synchronize_session=False)
+            )
+            db.add_all(rows)
+            db.commit()
+            stats["scored"] += len(chunk)
+
+        logger.info(
+            f"🔮 Purgatory suggestions: {stats['scored']} items scored against {len(products)} products "
+            f"in {(time.perf_counter() - started) * 1000:.0f} ms ({stats['pruned']} pruned)."
+        )
+        return stats
+
+
+def load_suggestions(db, pending_items: Iterable) -> Dict[int, List[Tuple[int, float]]]:
+    """
+    Stored suggestions of the given pending items (one query):
+    pending_id -> [(product_id, score), ...] best first. Items whose row
+    belongs to a previous pending item with the same id are left out.
+    """
+    urls = {item.id: item.url for item in pending_items}
+    if not urls:
+        return {}
+    result = {}
+    rows = db.execute(
+        select(Suggestion.pending_id, Suggestion.pending_url, Suggestion.suggestions)
+        .where(Suggestion.pending_id.in_(list(urls)))
+    ).all()
+    for pending_id, pending_url, payload in rows:
+        if urls.get(pending_id) != pending_url:
+            continue
+        try:
+            result[pending_id] = [(int(pid), float(score)) for pid, score in json.loads(payload or "[]")]
+        except (ValueError, TypeError):
+            continue
+    return result
+
+
+def refresh_suggestions(session_factory=None, full: bool = False) -> Dict[str, int]:
+    """
+    One refresh in its own session (daily_scan, CLI and the background thread).
+    """
+    if session_factory is None:
+        from src.infrastructure.database import SessionLocal
+        session_factory = SessionLocal
+    with _worker_lock:
+        with session_factory() as db:
+            try:
+                return PurgatorySuggester().refresh(db, full=full)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"❌ Purgatory suggestion refresh failed: {e}")
+                return {"scored": 0, "pruned": 0, "error": str(e)}
+
+
+_worker_lock = threading.Lock()
+
+
+def refresh_in_background(session_factory=None) -> bool:
+    """
+    Starts a refresh in a daemon thread unless one is already running.
+    Returns True if a new refresh was started.
+    """
+    if _worker_lock.locked():
+        return False
+    threading.Thread(
+        target=refresh_suggestions, args=(session_factory,), name="purgatory-suggester", daemon=True
+    ).start()
+    return True
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Recompute Purgatory match suggestions")
+    parser.add_argument("--full", action="store_true", help="Rescore every pending item, not only stale ones")
+    args = parser.parse_args()
+    print(refresh_suggestions(full=args.full))
@@ -0,0 +1,42 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict
+from urllib.parse import urlparse
+
+
+class DomainRateLimiter:
+    """
+    Per-domain politeness for concurrent scans.
+    Shops run in parallel, but each domain gets at most `max_concurrent` requests
+    in flight and at least `min_interval` seconds between request starts.
+    """
+    def __init__(self, max_concurrent: int = 1, min_interval: float = 2.0):
+        self.max_concurrent = max(1, max_concurrent)
+        self.min_interval = max(0.0, min_interval)
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._last_start: Dict[str, float] = {}
+
+    @staticmethod
+    def domain_of(url: str) -> str:
+        netloc = urlparse(url).netloc.lower()
+        return netloc[4:] if netloc.startswith("www.") else netloc
+
+    @asynccontextmanager
+    async def limit(self, url: str):
+        """
+        Usage: async with limiter.limit(url): await page.goto(url)
+        """
+        domain = self.domain_of(url)
+        sem = self._semaphores.setdefault(domain, asyncio.Semaphore(self.max_concurrent))
+        lock = self._locks.setdefault(domain, asyncio.Lock())
+
+        async with sem:
+            # Space out request starts on the same domain
+            async with lock:
+                wait = self._last_start.get(domain, 0.0) + self.min_interval - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._last_start[domain] = time.monotonic()
+            yield
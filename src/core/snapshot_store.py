@@ -0,0 +1,305 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from loguru import logger
+
+DIGEST_SIZE = 16
+# Volatile fields that must not make two identical offers look different
+VOLATILE_FIELDS = ("scraped_at",)
+
+
+class SnapshotDiff(NamedTuple):
+    added: List[dict]
+    removed: List[dict]
+    changed: List[Tuple[dict, dict]] # (before, after), same URL and occurrence
+    unchanged: int
+
+
+class SnapshotStore:
+    """
+    Content-addressed 'Black Box' of raw scraped offers (SQLite file).
+
+    - `objects`: every distinct offer record stored once, keyed by the
+      BLAKE2b digest of its canonical JSON and zlib-compressed.
+    - `runs`: one row per shop scan. A run is opened when the shop starts,
+      receives every micro-batch and is closed at the end.
+    - `run_items`: the manifest of each run, one (run_id, seq, digest) row
+      per record in the order they were appended, so appending a micro-batch
+      only writes its own rows.
+
+    A scan that sees mostly the same offers adds a few new objects plus one
+    small manifest row per offer, so months of history fit where 15 indented
+    JSON files used to. `diff` compares two runs on digests first
+    and only decodes the records that differ.
+    """
+    DEFAULT_PATH = os.path.join("backups", "raw_snapshots", "snapshots.db")
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # timeout: pipeline batches of several shops write concurrently
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS objects ("
+            "hash BLOB PRIMARY KEY, data BLOB NOT NULL, first_seen TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, shop_name TEXT NOT NULL, created_at TEXT NOT NULL, "
+            "items INTEGER NOT NULL, new_objects INTEGER NOT NULL, manifest BLOB NOT NULL, closed_at TEXT)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(runs)")}
+        if "closed_at" not in columns:
+            # Runs written before open/append/close were complete single batches
+            self._conn.execute("ALTER TABLE runs ADD COLUMN closed_at TEXT")
+            self._conn.execute("UPDATE runs SET closed_at = created_at")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_runs_shop_created ON runs (shop_name, created_at)")
+        has_items = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'run_items'"
+        ).fetchone()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS run_items ("
+            "run_id INTEGER NOT NULL, seq INTEGER NOT NULL, digest BLOB NOT NULL, "
+            "PRIMARY KEY (run_id, seq)) WITHOUT ROWID"
+        )
+        if not has_items:
+            # Manifests used to be one packed blob per run (runs.manifest, now left empty)
+            run_ids = [r for (r,) in self._conn.execute("SELECT id FROM runs WHERE length(manifest) > 0")]
+            for run_id in run_ids:
+                (manifest,) = self._conn.execute("SELECT manifest FROM runs WHERE id = ?", (run_id,)).fetchone()
+                self._conn.executemany(
+                    "INSERT INTO run_items (run_id, seq, digest) VALUES (?, ?, ?)",
+                    ((run_id, seq, h) for seq, h in enumerate(self._digests(manifest)))
+                )
+                self._conn.execute("UPDATE runs SET manifest = ? WHERE id = ?", (b"", run_id))
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def canonical(offer: Any) -> Dict[str, Any]:
+        """
+        Plain, JSON-safe dict of a scraped offer (pydantic model, object or dict)
+        without volatile fields.
+        """
+        if hasattr(offer, "model_dump"):
+            data = offer.model_dump()
+        elif isinstance(offer, dict):
+            data = dict(offer)
+        else:
+            data = dict(vars(offer))
+        for field in VOLATILE_FIELDS:
+            data.pop(field, None)
+        return {k: (v if v is None or isinstance(v, (str, int, float, bool)) else str(v)) for k, v in data.items()}
+
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> Tuple[bytes, bytes]:
+        raw = json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        return hashlib.blake2b(raw, digest_size=DIGEST_SIZE).digest(), raw
+
+    @staticmethod
+    def _digests(manifest: bytes) -> List[bytes]:
+        return [manifest[i:i + DIGEST_SIZE] for i in range(0, len(manifest), DIGEST_SIZE)]
+
+    def open_run(self, shop_name: str) -> int:
+        """
+        Starts an empty run for a shop scan. Returns the run id.
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO runs (shop_name, created_at, items, new_objects, manifest) VALUES (?, ?, 0, 0, ?)",
+                (shop_name, now, b"")
+            )
+            self._conn.commit()
+        return cur.lastrowid
+
+    def append_run(self, run_id: int, offers: Iterable[Any]) -> int:
+        """
+        Adds a batch of offers to an open run. Returns how many records were new.
+        """
+        encoded = [self._encode(self.canonical(o)) for o in offers]
+        if not encoded:
+            return 0
+        now = datetime.now().isoformat(timespec="seconds")
+        unique = dict(encoded)
+        with self._lock:
+            existing = set()
+            digests = list(unique)
+            for i in range(0, len(digests), 500):
+                chunk = digests[i:i + 500]
+                existing.update(
+                    h for (h,) in self._conn.execute(
+                        f"SELECT hash FROM objects WHERE hash IN ({','.join('?' * len(chunk))})", chunk
+                    )
+                )
+            new = [(h, zlib.compress(raw, 9), now) for h, raw in unique.items() if h not in existing]
+            row = self._conn.execute("SELECT items FROM runs WHERE id = ?", (run_id,)).fetchone()
+            if row is None:
+                raise KeyError(f"Unknown snapshot run {run_id}")
+            self._conn.executemany("INSERT OR IGNORE INTO objects (hash, data, first_seen) VALUES (?, ?, ?)", new)
+            self._conn.executemany(
+                "INSERT INTO run_items (run_id, seq, digest) VALUES (?, ?, ?)",
+                ((run_id, row[0] + seq, h) for seq, (h, _) in enumerate(encoded))
+            )
+            self._conn.execute(
+                "UPDATE runs SET items = items + ?, new_objects = new_objects + ? WHERE id = ?",
+                (len(encoded), len(new), run_id)
+            )
+            self._conn.commit()
+        return len(new)
+
+    def close_run(self, run_id: int):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET closed_at = ? WHERE id = ?", (datetime.now().isoformat(timespec="seconds"), run_id)
+            )
+            self._conn.commit()
+            shop_name, items, new = self._conn.execute(
+                "SELECT shop_name, items, new_objects FROM runs WHERE id = ?", (run_id,)
+            ).fetchone()
+        logger.info(f"🛡️ Raw snapshot stored: run {run_id} {shop_name} ({items} items, {new} new records)")
+
+    def save_run(self, shop_name: str, offers: Iterable[Any]) -> int:
+        """
+        Stores a complete run in one call. Returns the run id.
+        """
+        run_id = self.open_run(shop_name)
+        self.append_run(run_id, offers)
+        self.close_run(run_id)
+        return run_id
+
+    def runs(self, shop_name: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Latest runs first (without manifests). `closed_at` is None while a scan is still appending.
+        """
+        query = "SELECT id, shop_name, created_at, items, new_objects, closed_at FROM runs"
+        params: tuple = ()
+        if shop_name:
+            query += " WHERE shop_name = ?"
+            params = (shop_name,)
+        query += " ORDER BY id DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, params + (limit,)).fetchall()
+        return [dict(zip(("id", "shop_name", "created_at", "items", "new_objects", "closed_at"), r)) for r in rows]
+
+    def _manifest(self, run_id: int) -> List[bytes]:
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM runs WHERE id = ?", (run_id,)).fetchone() is None:
+                raise KeyError(f"Unknown snapshot run {run_id}")
+            return [h for (h,) in self._conn.execute(
+                "SELECT digest FROM run_items WHERE run_id = ? ORDER BY seq", (run_id,)
+            )]
+
+    def _objects(self, digests: Iterable[bytes]) -> Dict[bytes, dict]:
+        digests = list(set(digests))
+        found = {}
+        with self._lock:
+            for i in range(0, len(digests), 500):
+                chunk = digests[i:i + 500]
+                for h, data in self._conn.execute(
+                    f"SELECT hash, data FROM objects WHERE hash IN ({','.join('?' * len(chunk))})", chunk
+                ):
+                    found[h] = json.loads(zlib.decompress(data))
+        return found
+
+    def load_run(self, run_id: int) -> List[dict]:
+        """
+        Records of a run in scrape order.
+        """
+        manifest = self._manifest(run_id)
+        objects = self._objects(manifest)
+        return [objects[h] for h in manifest]
+
+    def diff(self, old_run: int, new_run: int) -> SnapshotDiff:
+        """
+        What changed between two runs, keyed by (offer URL, occurrence): a URL
+        listed twice in a run is compared twice, not collapsed.
+        """
+        old_manifest, new_manifest = self._manifest(old_run), self._manifest(new_run)
+        old, new = Counter(old_manifest), Counter(new_manifest)
+        only_old, only_new = old - new, new - old
+        objects = self._objects(list(only_old) + list(only_new))
+
+        def by_url(manifest: List[bytes], leftover: Counter) -> Dict[str, List[dict]]:
+            records = defaultdict(list)
+            leftover = Counter(leftover)
+            for h in manifest: # Manifest order keeps occurrences stable
+                if leftover[h]:
+                    leftover[h] -= 1
+                    records[objects[h].get("url")].append(objects[h])
+            return records
+
+        before, after = by_url(old_manifest, only_old), by_url(new_manifest, only_new)
+        added, removed, changed = [], [], []
+        for url in dict.fromkeys([*before, *after]):
+            b, a = before.get(url, []), after.get(url, [])
+            changed.extend(zip(b, a))
+            removed.extend(b[len(a):])
+            added.extend(a[len(b):])
+        return SnapshotDiff(added=added, removed=removed, changed=changed,
+                            unchanged=sum((old & new).values()))
+
+    def prune(self, keep_days: int = 180) -> Dict[str, int]:
+        """
+        Drops runs older than `keep_days` and the records no remaining run references.
+        """
+        cutoff = (datetime.now() - timedelta(days=keep_days)).isoformat(timespec="seconds")
+        with self._lock:
+            runs = self._conn.execute("DELETE FROM runs WHERE created_at < ?", (cutoff,)).rowcount
+            objects = 0
+            if runs:
+                self._conn.execute("DELETE FROM run_items WHERE run_id NOT IN (SELECT id FROM runs)")
+                objects = self._conn.execute(
+                    "DELETE FROM objects WHERE hash NOT IN (SELECT digest FROM run_items)"
+                ).rowcount
+            self._conn.commit()
+        if runs:
+            logger.info(f"🧹 Snapshot store pruned: {runs} runs and {objects} orphan records older than {keep_days} days.")
+        return {"runs": runs, "objects": objects}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            runs, items = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(items), 0) FROM runs").fetchone()
+            objects = self._conn.execute("SELECT COUNT(*) FROM objects").fetchone()[0]
+        size = sum(os.path.getsize(p) for p in (self.path, self.path + "-wal") if os.path.exists(p))
+        return {"runs": runs, "items": items, "objects": objects, "bytes": size}
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Raw snapshot store (Black Box)")
+    parser.add_argument("--diff", nargs=2, type=int, metavar=("OLD_RUN", "NEW_RUN"), help="Compare two runs")
+    parser.add_argument("--prune", type=int, metavar="DAYS", help="Drop runs older than DAYS")
+    args = parser.parse_args()
+
+    store = SnapshotStore()
+    if args.diff:
+        d = store.diff(*args.diff)
+        for rec in d.added:
+            print(f"+ {rec.get('product_name')} {rec.get('price')}€ {rec.get('url')}")
+        for rec in d.removed:
+            print(f"- {rec.get('product_name')} {rec.get('price')}€ {rec.get('url')}")
+        for a, b in d.changed:
+            fields = ", ".join(f"{k}: {a.get(k)} -> {b.get(k)}" for k in sorted(set(a) | set(b)) if a.get(k) != b.get(k))
+            print(f"~ {b.get('product_name')} ({fields})")
+        print(f"{len(d.added)} added, {len(d.removed)} removed, {len(d.changed)} changed, {d.unchanged} unchanged")
+    elif args.prune is not None:
+        print(store.prune(args.prune))
+    else:
+        for run in store.runs(limit=20):
+            state = "" if run["closed_at"] else " [open]"
+            print(f"[{run['id']}] {run['created_at']} {run['shop_name']}: {run['items']} items ({run['new_objects']} new){state}")
+        print(store.stats())
+    store.close()
@@ -0,0 +1,105 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from loguru import logger
+
+
+class ThrottleStore:
+    """
+    Persistent anti-spam store for notifications: key -> expiry timestamp in a
+    local SQLite file, so throttling survives new `daily_scan` processes and
+    Streamlit reloads, and is shared between processes on the same machine.
+    A check is a single primary-key upsert; expired keys are simply
+    overwritten and physically removed by `compact` (every `compact_every`
+    writes, at the end of each scan, or via `python -m src.core.throttle_store`).
+    """
+    DEFAULT_PATH = os.path.join("data", "cache", "notify_throttle.db")
+    _shared: Optional["ThrottleStore"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path: str = DEFAULT_PATH, compact_every: int = 500):
+        self.path = path
+        self.compact_every = max(1, compact_every)
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # timeout: another process (dashboard / scan) may be holding the write lock
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS throttle ("
+            "key TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    @classmethod
+    def shared(cls) -> "ThrottleStore":
+        """
+        Process-wide instance on the default path.
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def hit(self, key: str, seconds: float) -> bool:
+        """
+        Returns True if `key` is still throttled. Otherwise claims it for
+        `seconds` and returns False (atomic across processes).
+        """
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO throttle (key, expires_at) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET expires_at = excluded.expires_at "
+                "WHERE throttle.expires_at <= ?",
+                (key, now + seconds, now)
+            )
+            self._conn.commit()
+            throttled = cur.rowcount == 0
+            if not throttled:
+                self._writes += 1
+                if self._writes % self.compact_every == 0:
+                    self._compact_locked()
+        return throttled
+
+    def release(self, key: str):
+        """
+        Gives back a claim whose message was never queued (e.g. rolled back).
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM throttle WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def compact(self) -> int:
+        """
+        Deletes expired keys. Returns how many were removed.
+        """
+        with self._lock:
+            return self._compact_locked()
+
+    def _compact_locked(self) -> int:
+        removed = self._conn.execute("DELETE FROM throttle WHERE expires_at <= ?", (time.time(),)).rowcount
+        self._conn.commit()
+        if removed:
+            logger.info(f"🧹 Throttle store compacted: {removed} expired keys removed.")
+        return removed
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM throttle").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == "__main__":
+    store = ThrottleStore()
+    store.compact()
+    print(f"Throttle keys alive: {store.count()}")
+    store.close()
@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, String, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import Integer, String, Float, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship, DeclarativeBase, Mapped, mapped_column
 from datetime import datetime
 from typing import List, Optional
@@ -36,6 +36,12 @@ class ProductModel(Base):
 
 class OfferModel(Base):
     __tablename__ = "offers"
+    __table_args__ = (
+        # One offer per URL: required by the ON CONFLICT (url) bulk upsert
+        Index("ux_offers_url", "url", unique=True),
+        # Per-product price aggregates (server-side Catalog)
+        Index("ix_offers_product_id", "product_id"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     product_id: Mapped[int] = mapped_column(ForeignKey("products.id"))
@@ -58,9 +64,19 @@ class OfferModel(Base):
         back_populates="offer",
         cascade="all, delete-orphan"
     )
+    deal: Mapped[Optional["DealModel"]] = relationship(
+        "DealModel",
+        back_populates="offer",
+        cascade="all, delete-orphan",
+        uselist=False
+    )
 
 class CollectionItemModel(Base):
     __tablename__ = "collection_items"
+    __table_args__ = (
+        # Ownership filter of the server-side Catalog
+        Index("ix_collection_owner_product", "owner_id", "product_id"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), unique=False) # Allow multiple users to own same product
@@ -237,12 +253,78 @@ class KaizenInsightModel(Base):
     status: Mapped[str] = mapped_column(String, default="pending") # pending, implemented, rejected
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
+class NotificationOutboxModel(Base):
+    """
+    Durable Telegram outbox. Alerts are enqueued inside the matching
+    transaction and delivered later by the NotificationDispatcher, so a slow
+    or failing Telegram call never blocks a batch commit and nothing is lost
+    if the process dies before sending.
+    """
+    __tablename__ = "notification_outbox"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    kind: Mapped[str] = mapped_column(String, index=True) # deal, price_alert, message
+    payload: Mapped[str] = mapped_column(String) # JSON (deal fields) or final Markdown text
+    status: Mapped[str] = mapped_column(String, default="pending", index=True) # pending, sent, failed
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    last_error: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+class DealModel(Base):
+    """
+    Materialized "active deals" for the Hunter: one row per (product, shop)
+    whose latest offer is >= DEAL_MIN_DISCOUNT below its historical max.
+    Maintained incrementally by the offer upsert path (ProductRepository.refresh_deals)
+    and fully rebuilt by ProductRepository.rebuild_deals.
+    """
+    __tablename__ = "deals"
+    __table_args__ = (
+        Index("ux_deals_product_shop", "product_id", "shop_name", unique=True),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"))
+    shop_name: Mapped[str] = mapped_column(String)
+    offer_id: Mapped[int] = mapped_column(ForeignKey("offers.id"), unique=True)
+
+    # Denormalized for filtering/sorting without touching offers
+    price: Mapped[float] = mapped_column(Float)
+    max_price: Mapped[float] = mapped_column(Float, index=True)
+    discount: Mapped[float] = mapped_column(Float, index=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    offer: Mapped["OfferModel"] = relationship("OfferModel", back_populates="deal")
+    product: Mapped["ProductModel"] = relationship("ProductModel")
+
+class PurgatorySuggestionModel(Base):
+    """
+    Precomputed Purgatory suggestions: top-k catalog matches per pending item,
+    filled by the PurgatorySuggester worker so the Admin page only reads them.
+    A row is stale when `catalog_version` no longer matches the catalog or
+    `pending_url` no longer matches the pending item (SQLite may reuse ids).
+    No FK on pending_id: pending items are also removed with bulk deletes,
+    orphan rows are pruned by the worker.
+    """
+    __tablename__ = "purgatory_suggestions"
+
+    pending_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    pending_url: Mapped[str] = mapped_column(String)
+    suggestions: Mapped[str] = mapped_column(String, default="[]") # JSON [[product_id, score], ...] best first
+    best_product_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    best_score: Mapped[float] = mapped_column(Float, default=0.0, index=True)
+    catalog_version: Mapped[str] = mapped_column(String)
+    computed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
 __all__ = [
     "Base", 
     "ProductModel", 
     "OfferModel", 
     "CollectionItemModel", 
     "PendingMatchModel", 
+    "OfferHistoryModel", 
     "PriceAlertModel", 
     "UserModel", 
     "ScraperStatusModel", 
@@ -250,6 +332,8 @@ __all__ = [
     "PriceHistoryModel", 
     "ScraperExecutionLogModel", 
     "KaizenInsightModel",
+    "NotificationOutboxModel",
+    "DealModel",
+    "PurgatorySuggestionModel",
     "DOMAIN_VERSION"
 ]
-
@@ -0,0 +1,151 @@
+import logging
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import and_, or_, func, select, exists, text
+from sqlalchemy.orm import Session
+
+from src.domain.models import ProductModel, OfferModel, CollectionItemModel
+
+logger = logging.getLogger(__name__)
+
+NO_PRICE = 999999.0 # Products without offers sort last on "cheapest first"
+DEFAULT_CATEGORY = "MOTU"
+
+# sort key -> (column label, descending)
+SORTS = {
+    "name_asc": ("name", False),
+    "name_desc": ("name", True),
+    "price_asc": ("best_price", False),
+    "price_desc": ("best_price", True),
+}
+
+
+class CatalogRow(NamedTuple):
+    id: int
+    name: str
+    category: str
+    image_url: Optional[str]
+    best_price: float
+    historic_low: float
+    is_owned: bool
+
+
+class CatalogRepository:
+    """
+    Server-side Catalog queries: search, category and ownership filters,
+    sorting and pagination all run in the database, so a page costs the same
+    whatever the catalog size.
+
+    - Search uses the trigram index on products.name (pg_trgm GIN on Postgres,
+      FTS5 `products_fts` on SQLite, both created by the Universal Migrator),
+      with a plain LIKE fallback when the index is missing.
+    - Pagination is keyset based: each page returns the cursor
+      (sort value, id) of its last row; `offset` is only used to jump to a
+      page whose cursor is not known yet.
+    """
+    # Per-engine cache: is the SQLite FTS5 trigram table available?
+    _fts_ready: Dict[str, bool] = {}
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _has_fts(self) -> bool:
+        bind = self.db.get_bind()
+        if bind.dialect.name != "sqlite":
+            return False
+        key = str(bind.url)
+        if key not in self._fts_ready:
+            try:
+                self._fts_ready[key] = self.db.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'")
+                ).first() is not None
+            except Exception:
+                self._fts_ready[key] = False
+        return self._fts_ready[key]
+
+    def _search_clause(self, search: str):
+        search = search.strip()
+        # Trigram FTS needs at least 3 characters; shorter terms use LIKE
+        if len(search) >= 3 and self._has_fts():
+            phrase = '"' + search.replace('"', '""') + '"'
+            return ProductModel.id.in_(text("SELECT rowid FROM products_fts WHERE products_fts MATCH :q").bindparams(q=phrase))
+        escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return ProductModel.name.ilike(f"%{escaped}%", escape="\\")
+
+    def _base_query(self, owner_id: int, search: Optional[str], category: Optional[str], ownership: Optional[str]):
+        # Correlated per-row aggregates (ix_offers_product_id): with the name
+        # sort only the rows of the page are evaluated
+        def offer_min(column):
+            return (
+                select(func.min(func.nullif(column, 0)))
+                .where(OfferModel.product_id == ProductModel.id)
+                .correlate(ProductModel)
+                .scalar_subquery()
+            )
+        owned = exists().where(
+            CollectionItemModel.owner_id == owner_id,
+            CollectionItemModel.product_id == ProductModel.id
+        )
+        category_col = func.coalesce(func.nullif(ProductModel.category, ""), DEFAULT_CATEGORY)
+        best_price = func.coalesce(offer_min(OfferModel.price), NO_PRICE)
+
+        stmt = select(
+            ProductModel.id,
+            ProductModel.name,
+            category_col.label("category"),
+            ProductModel.image_url,
+            best_price.label("best_price"),
+            func.coalesce(offer_min(OfferModel.min_price), NO_PRICE).label("historic_low"),
+            owned.label("is_owned"),
+        )
+
+        if search and search.strip():
+            stmt = stmt.where(self._search_clause(search))
+        if category:
+            stmt = stmt.where(category_col == category)
+        if ownership == "owned":
+            stmt = stmt.where(owned)
+        elif ownership == "missing":
+            stmt = stmt.where(~owned)
+        return stmt, {"name": ProductModel.name, "best_price": best_price}
+
+    def count(self, owner_id: int, search: Optional[str] = None, category: Optional[str] = None,
+              ownership: Optional[str] = None) -> int:
+        stmt, _ = self._base_query(owner_id, search, category, ownership)
+        return self.db.execute(select(func.count()).select_from(stmt.subquery())).scalar_one()
+
+    def page(self, owner_id: int, search: Optional[str] = None, category: Optional[str] = None,
+             ownership: Optional[str] = None, sort: str = "name_asc", limit: int = 50,
+             after: Optional[Tuple] = None, offset: int = 0) -> Tuple[List[CatalogRow], Optional[Tuple]]:
+        """
+        One page of the catalog. `after` is the cursor returned by the previous
+        page (keyset); without it, `offset` rows are skipped. Returns
+        (rows, next_cursor); next_cursor is None on the last page.
+        """
+        label, descending = SORTS.get(sort, SORTS["name_asc"])
+        stmt, sort_cols = self._base_query(owner_id, search, category, ownership)
+        sort_col = sort_cols[label]
+
+        if after is not None:
+            last_value, last_id = after
+            if descending:
+                stmt = stmt.where(or_(sort_col < last_value, and_(sort_col == last_value, ProductModel.id < last_id)))
+            else:
+                stmt = stmt.where(or_(sort_col > last_value, and_(sort_col == last_value, ProductModel.id > last_id)))
+        elif offset:
+            stmt = stmt.offset(offset)
+
+        order = (sort_col.desc(), ProductModel.id.desc()) if descending else (sort_col.asc(), ProductModel.id.asc())
+        # One extra row tells us whether there is a next page
+        rows = self.db.execute(stmt.order_by(*order).limit(limit + 1)).all()
+
+        has_more = len(rows) > limit
+        rows = [
+            CatalogRow(r.id, r.name, r.category, r.image_url, float(r.best_price), float(r.historic_low), bool(r.is_owned))
+            for r in rows[:limit]
+        ]
+        next_cursor = None
+        if has_more and rows:
+            last = rows[-1]
+            next_cursor = (getattr(last, label), last.id)
+        return rows, next_cursor
@@ -1,10 +1,23 @@
-from sqlalchemy.orm import Session
+import logging
+from sqlalchemy import select, insert, inspect, desc
+from sqlalchemy.orm import Session, joinedload
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Iterable, Dict, List, Tuple
 from src.infrastructure.repositories.base import BaseRepository
 from src.domain.models import ProductModel, OfferModel
 
+logger = logging.getLogger(__name__)
+
+# Keeps IN (...) lists well below driver/parameter limits (SQLite: 32766, Postgres: 65535)
+URL_LOOKUP_CHUNK = 500
+
+# Discount (vs historical max) an offer needs to be materialized in `deals`
+DEAL_MIN_DISCOUNT = 0.20
+
 class ProductRepository(BaseRepository[ProductModel]):
+    # Per-engine cache: does offers.url carry the unique index ON CONFLICT needs?
+    _url_upsert_ready: Dict[str, bool] = {}
+
     def __init__(self, db: Session):
         super().__init__(ProductModel, db)
 
@@ -13,6 +26,23 @@ class ProductRepository(BaseRepository[ProductModel]):
 
     def get_offer_by_url(self, url: str) -> Optional[OfferModel]:
         return self.db.query(OfferModel).filter(OfferModel.url == url).first()
+
+    def get_offers_by_urls(self, urls: Iterable[str]) -> Dict[str, OfferModel]:
+        """
+        Bulk version of get_offer_by_url: one chunked IN (...) query per 500 URLs.
+        Products are eager-loaded so callers can route without further round trips.
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        found: Dict[str, OfferModel] = {}
+        for i in range(0, len(unique_urls), URL_LOOKUP_CHUNK):
+            chunk = unique_urls[i:i + URL_LOOKUP_CHUNK]
+            rows = self.db.query(OfferModel).options(joinedload(OfferModel.product)).filter(
+                OfferModel.url.in_(chunk)
+            ).order_by(OfferModel.id).all()
+            for o in rows:
+                # Keep the oldest link, like .first() did
+                found.setdefault(o.url, o)
+        return found
     
     def add_offer(self, product: ProductModel, offer_data: dict, commit: bool = True) -> tuple[OfferModel, Optional[float]]:
         from src.domain.models import PriceHistoryModel
@@ -59,6 +89,7 @@ class ProductRepository(BaseRepository[ProductModel]):
             
             self.db.add(existing_offer)
             if commit:
+                self.refresh_deals([existing_offer])
                 self.db.commit()
                 self.db.refresh(existing_offer)
             else:
@@ -67,7 +98,7 @@ class ProductRepository(BaseRepository[ProductModel]):
         else:
             # Create new Offer
             new_offer = OfferModel(
-                product_id=product.id,
+                product=product, # back_populates keeps product.offers in sync within the batch
                 shop_name=offer_data["shop_name"],
                 price=current_price,
                 currency=offer_data.get("currency", "EUR"),
@@ -84,20 +115,365 @@ class ProductRepository(BaseRepository[ProductModel]):
             self.db.add(ph)
             
             if commit:
+                self.refresh_deals([new_offer])
                 self.db.commit()
                 self.db.refresh(new_offer)
             else:
                 self.db.flush()
             return new_offer, None
 
-    def get_active_deals(self, min_discount: float = 0.20, max_original_price: float = None):
+    def get_known_eans_by_urls(self, urls: Iterable[str]) -> Dict[str, str]:
+        """
+        URL -> EAN for offers whose EAN is already known, either on the linked
+        product or from a prior harvest stored in the Purgatory.
+        Used by the Deep Harvest to skip detail pages.
+        """
+        from src.domain.models import PendingMatchModel
+
+        unique_urls = list(dict.fromkeys(urls))
+        known: Dict[str, str] = {}
+        for i in range(0, len(unique_urls), URL_LOOKUP_CHUNK):
+            chunk = unique_urls[i:i + URL_LOOKUP_CHUNK]
+            rows = self.db.query(OfferModel.url, ProductModel.ean).join(ProductModel).filter(
+                OfferModel.url.in_(chunk), ProductModel.ean.isnot(None), ProductModel.ean != ""
+            ).all()
+            known.update({url: ean for url, ean in rows})
+            rows = self.db.query(PendingMatchModel.url, PendingMatchModel.ean).filter(
+                PendingMatchModel.url.in_(chunk), PendingMatchModel.ean.isnot(None), PendingMatchModel.ean != ""
+            ).all()
+            for url, ean in rows:
+                known.setdefault(url, ean)
+        return known
+
+    def touch_offers_last_seen(self, urls: Iterable[str]) -> int:
+        """
+        Marks offers as seen now without touching prices (unchanged listing pages).
+        One chunked UPDATE per 500 URLs; the caller commits.
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        now = datetime.utcnow()
+        touched = 0
+        for i in range(0, len(unique_urls), URL_LOOKUP_CHUNK):
+            chunk = unique_urls[i:i + URL_LOOKUP_CHUNK]
+            touched += self.db.query(OfferModel).filter(OfferModel.url.in_(chunk)).update(
+                {OfferModel.last_seen: now}, synchronize_session=False
+            )
+        return touched
+
+    def _supports_url_upsert(self) -> bool:
+        """
+        ON CONFLICT (url) needs Postgres/SQLite AND the ux_offers_url unique index
+        (created by the Universal Migrator; it can fail on legacy duplicate URLs).
+        """
+        bind = self.db.get_bind()
+        if bind.dialect.name not in ("postgresql", "sqlite"):
+            return False
+        key = str(bind.url)
+        if key not in self._url_upsert_ready:
+            try:
+                insp = inspect(bind)
+                unique_cols = [ix["column_names"] for ix in insp.get_indexes("offers") if ix.get("unique")]
+                unique_cols += [uc["column_names"] for uc in insp.get_unique_constraints("offers")]
+                self._url_upsert_ready[key] = ["url"] in unique_cols
+            except Exception as e:
+                logger.warning(f"Could not inspect offers indexes: {e}")
+                self._url_upsert_ready[key] = False
+            if not self._url_upsert_ready[key]:
+                logger.warning("offers.url has no unique index: bulk upsert falls back to add_offer.")
+        return self._url_upsert_ready[key]
+
+    def bulk_upsert_offers(self, batch: List[Tuple[ProductModel, dict]]) -> List[Tuple[OfferModel, Optional[float]]]:
+        """
+        Set-based equivalent of calling add_offer(product, offer_data, commit=False)
+        for every item of the batch, in order.
+
+        - Existing rows are read in one chunked query, and min/max/alert flags are
+          computed in a single pass (repeated URLs see the running state).
+        - Offers are written with INSERT ... ON CONFLICT (url) DO UPDATE. Known Links
+          keep their product_id.
+        - Price history rows are inserted with one executemany.
+
+        Returns (offer, alert_discount) aligned with `batch`. Does not commit.
+        """
+        from src.domain.models import PriceHistoryModel
+
+        if not batch:
+            return []
+        if not self._supports_url_upsert():
+            results = [self.add_offer(product, offer_data, commit=False) for product, offer_data in batch]
+            self.refresh_deals(offer for offer, _ in results)
+            return results
+
+        offers_table = OfferModel.__table__
+        urls = list(dict.fromkeys(d["url"] for _, d in batch))
+
+        # 1. Current state of the rows we are about to touch
+        state: Dict[str, dict] = {}
+        for i in range(0, len(urls), URL_LOOKUP_CHUNK):
+            chunk = urls[i:i + URL_LOOKUP_CHUNK]
+            rows = self.db.execute(
+                select(offers_table.c.url, offers_table.c.product_id, offers_table.c.price,
+                       offers_table.c.min_price, offers_table.c.max_price)
+                .where(offers_table.c.url.in_(chunk))
+            ).all()
+            for r in rows:
+                state[r.url] = {"product_id": r.product_id, "price": r.price,
+                                "min_price": r.min_price, "max_price": r.max_price, "is_new": False}
+
+        # 2. One pass: running min/max, alert flags and price history needs
+        now = datetime.utcnow()
+        alerts: List[Optional[float]] = []
+        history: List[Tuple[str, float]] = []  # (url, price) -> offer_id resolved after upsert
+        upserts: Dict[str, dict] = {}
+
+        for product, offer_data in batch:
+            url = offer_data["url"]
+            current_price = float(offer_data["price"])
+            alert_discount = None
+
+            # --- EAN KAIZEN: Update product EAN if missing ---
+            if not product.ean and offer_data.get("ean"):
+                product.ean = offer_data["ean"]
+                self.db.add(product)
+
+            st = state.get(url)
+            if st is None:
+                st = state[url] = {"product_id": product.id, "price": current_price,
+                                   "min_price": current_price, "max_price": current_price, "is_new": True}
+                history.append((url, current_price))
+            else:
+                if abs(st["price"] - current_price) > 0.01:
+                    history.append((url, current_price))
+
+                # Only alert on a DROPPING price that sets a new record low (see add_offer)
+                if st["min_price"] > 0 and current_price < st["min_price"] and st["max_price"] > 0:
+                    discount = 1.0 - (current_price / st["max_price"])
+                    if discount >= 0.20:
+                        alert_discount = discount
+                        if discount >= 0.50:
+                            logger.critical(f"🚀 NUCLEAR DEAL DETECTED: {product.name} at {current_price}€ (-{discount*100:.0f}%)")
+                            offer_data["is_nuclear"] = True
+
+                if st["min_price"] == 0 or current_price < st["min_price"]:
+                    st["min_price"] = current_price
+                if current_price > st["max_price"]:
+                    st["max_price"] = current_price
+                st["price"] = current_price
+
+            alerts.append(alert_discount)
+            row = upserts.setdefault(url, {
+                "product_id": st["product_id"],
+                "shop_name": offer_data["shop_name"],
+                "currency": offer_data.get("currency", "EUR"),
+                "url": url,
+            })
+            row.update({
+                "price": st["price"],
+                "min_price": st["min_price"],
+                "max_price": st["max_price"],
+                "is_available": offer_data["is_available"],
+                "last_seen": now,
+            })
+
+        # 3. Dialect-aware upsert (executemany)
+        if self.db.get_bind().dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+        stmt = dialect_insert(offers_table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[offers_table.c.url],
+            set_={
+                "price": stmt.excluded.price,
+                "min_price": stmt.excluded.min_price,
+                "max_price": stmt.excluded.max_price,
+                "is_available": stmt.excluded.is_available,
+                "last_seen": stmt.excluded.last_seen,
+            }
+        )
+        self.db.flush()  # pending ORM changes (e.g. EAN) go first
+        self.db.execute(stmt, list(upserts.values()))
+
+        # 4. Reload the resulting offers (populate_existing refreshes stale identities)
+        offers_by_url: Dict[str, OfferModel] = {}
+        for i in range(0, len(urls), URL_LOOKUP_CHUNK):
+            chunk = urls[i:i + URL_LOOKUP_CHUNK]
+            for o in self.db.query(OfferModel).filter(OfferModel.url.in_(chunk)).populate_existing().all():
+                offers_by_url[o.url] = o
+
+        # 5. Price history in one executemany
+        if history:
+            self.db.execute(insert(PriceHistoryModel.__table__), [
+                {"offer_id": offers_by_url[url].id, "price": price, "recorded_at": now}
+                for url, price in history if url in offers_by_url
+            ])
+
+        # 6. Materialized deals follow the new price/min/max
+        self.refresh_deals(offers_by_url.values())
+
+        return [(offers_by_url.get(d["url"]), alert) for (_, d), alert in zip(batch, alerts)]
+
+    # --- MATERIALIZED DEALS (Hunter) ---
+
+    @staticmethod
+    def _deal_discount(offer: OfferModel) -> Optional[float]:
+        if offer.is_available and offer.max_price > 0 and offer.price < offer.max_price * (1 - DEAL_MIN_DISCOUNT):
+            return 1 - (offer.price / offer.max_price)
+        return None
+
+    def _latest_deal_offer(self, product_id: int, shop_name: str) -> Optional[OfferModel]:
+        return self.db.query(OfferModel).filter(
+            OfferModel.product_id == product_id,
+            OfferModel.shop_name == shop_name,
+            OfferModel.is_available == True,
+            OfferModel.max_price > 0,
+            OfferModel.price < (OfferModel.max_price * (1 - DEAL_MIN_DISCOUNT))
+        ).order_by(desc(OfferModel.last_seen)).first()
+
+    def refresh_deals(self, offers: Iterable[OfferModel]) -> int:
+        """
+        Incremental maintenance of the `deals` table for offers whose price,
+        min or max just changed. The freshly written offer becomes the deal of
+        its (product, shop) if it qualifies; if the current deal stopped
+        qualifying, the next latest qualifying offer of that pair replaces it.
+        Does not commit. Returns the number of deal rows written or removed.
+        """
+        from src.domain.models import DealModel
+
+        offers = [o for o in offers if o is not None and o.id is not None]
+        if not offers:
+            return 0
+
+        by_key: Dict[Tuple[int, str], DealModel] = {}
+        by_offer: Dict[int, DealModel] = {}
+        product_ids = list({o.product_id for o in offers})
+        offer_ids = [o.id for o in offers]
+        for ids, column in ((product_ids, DealModel.product_id), (offer_ids, DealModel.offer_id)):
+            for i in range(0, len(ids), URL_LOOKUP_CHUNK):
+                for d in self.db.query(DealModel).filter(column.in_(ids[i:i + URL_LOOKUP_CHUNK])).all():
+                    by_key[(d.product_id, d.shop_name)] = d
+                    by_offer[d.offer_id] = d
+
+        # Offers relinked to another product leave a deal under their old key
+        stale = [d for o in offers if (d := by_offer.get(o.id)) and (d.product_id, d.shop_name) != (o.product_id, o.shop_name)]
+        for d in stale:
+            by_key.pop((d.product_id, d.shop_name), None)
+            self.db.delete(d)
+        if stale:
+            self.db.flush() # Deletes must reach the DB before re-inserting the same offer_id
+
+        now = datetime.utcnow()
+        changed = 0
+        for o in offers:
+            key = (o.product_id, o.shop_name)
+            deal = by_key.get(key)
+            source = o if self._deal_discount(o) is not None else None
+            if source is None:
+                if deal is None or deal.offer_id != o.id:
+                    continue # Not a deal, and not the one on display either
+                # The displayed deal is gone: another URL of the same shop may still be one
+                source = self._latest_deal_offer(*key)
+                if source is None:
+                    self.db.delete(by_key.pop(key))
+                    changed += 1
+                    continue
+
+            if deal is None:
+                deal = by_key[key] = DealModel(product_id=source.product_id, shop_name=source.shop_name)
+                self.db.add(deal)
+            deal.offer_id = source.id
+            deal.price = source.price
+            deal.max_price = source.max_price
+            deal.discount = self._deal_discount(source)
+            deal.updated_at = now
+            changed += 1
+
+        self.db.flush()
+        return changed
+
+    def delete_offer(self, offer: OfferModel):
+        """
+        Deletes an offer (its price history and deal go with it through the ORM
+        cascade) and hands the deal of its (product, shop) to the next latest
+        qualifying offer, if any. Does not commit.
+        """
+        key = (offer.product_id, offer.shop_name)
+        self.db.delete(offer)
+        self.db.flush()
+        source = self._latest_deal_offer(*key)
+        if source is not None:
+            self.refresh_deals([source])
+
+    def rebuild_deals(self) -> int:
+        """
+        Full rebuild of the `deals` table from offers (initial population and
+        repair). Does not commit. Returns the number of deals.
+        """
+        from src.domain.models import DealModel
+
+        self.db.query(DealModel).delete(synchronize_session=False)
+        deals = self._get_active_deals_live(min_discount=DEAL_MIN_DISCOUNT)
+        now = datetime.utcnow()
+        self.db.add_all([
+            DealModel(
+                product_id=offer.product_id, shop_name=offer.shop_name, offer_id=offer.id,
+                price=offer.price, max_price=offer.max_price, discount=discount, updated_at=now
+            )
+            for _, offer, discount in deals
+        ])
+        self.db.flush()
+        logger.info(f"🔥 Deals table rebuilt: {len(deals)} active deals.")
+        return len(deals)
+
+    def _deals_query(self, min_discount: float, max_original_price: float = None):
+        from sqlalchemy import and_
+        from src.domain.models import DealModel
+
+        # Joining on product_id too hides rows whose offer was relinked by hand
+        query = self.db.query(DealModel).join(
+            OfferModel, and_(OfferModel.id == DealModel.offer_id, OfferModel.product_id == DealModel.product_id)
+        ).filter(DealModel.discount > min_discount)
+        if max_original_price is not None:
+            query = query.filter(DealModel.max_price <= max_original_price)
+        return query
+
+    def count_active_deals(self, min_discount: float = DEAL_MIN_DISCOUNT, max_original_price: float = None) -> int:
+        if min_discount < DEAL_MIN_DISCOUNT:
+            return len(self._get_active_deals_live(min_discount, max_original_price))
+        return self._deals_query(min_discount, max_original_price).count()
+
+    def get_active_deals(self, min_discount: float = DEAL_MIN_DISCOUNT, max_original_price: float = None,
+                         limit: Optional[int] = None, offset: int = 0):
         """
         Find offers where current price is lower than max_price by at least min_discount.
         Deduplication: Only returns the most recent offer per (product, shop).
         Returns list of (Product, Offer, discount_percent) sorted by discount.
+
+        Reads the materialized `deals` table (pre-deduplicated, indexed by
+        discount) one page at a time. Thresholds below DEAL_MIN_DISCOUNT are
+        not materialized and fall back to the live query.
+        """
+        from src.domain.models import DealModel
+
+        if min_discount < DEAL_MIN_DISCOUNT:
+            deals = self._get_active_deals_live(min_discount, max_original_price)
+            return deals[offset:offset + limit] if limit is not None else deals[offset:]
+
+        query = self._deals_query(min_discount, max_original_price).options(
+            joinedload(DealModel.offer), joinedload(DealModel.product)
+        ).order_by(desc(DealModel.discount), DealModel.id).offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        return [(d.product, d.offer, d.discount) for d in query.all()]
+
+    def _get_active_deals_live(self, min_discount: float = DEAL_MIN_DISCOUNT, max_original_price: float = None):
+        """
+        Find offers where current price is lower than max_price by at least min_discount.
+        Deduplication: Only returns the most recent offer per (product, shop).
+        Returns list of (Product, Offer, discount_percent) sorted by discount.
+        Scans every discounted offer: used to (re)build the materialized table.
         """
-        from sqlalchemy import desc
-        
         # 1. Base query for active, discounted offers
         query = self.db.query(OfferModel).join(ProductModel).filter(
             OfferModel.is_available == True,
@@ -8,7 +8,9 @@ root_path = Path(__file__).resolve().parent.parent.parent
 sys.path.append(str(root_path))
 
 from src.infrastructure.database import SessionLocal, engine
-from src.domain.models import OfferModel, PendingMatchModel, PriceHistoryModel
+from src.domain.models import (
+    DealModel, OfferModel, PendingMatchModel, PriceHistoryModel, PurgatorySuggestionModel
+)
 
 def reset_hunter_data():
     setup_logging()
@@ -17,7 +19,11 @@ def reset_hunter_data():
     
     db = SessionLocal()
     try:
-        # 1. Delete Price History (Child of Offers)
+        # 1. Delete Deals and Price History (Children of Offers)
+        # Bulk deletes skip the ORM cascades, so children go first (same as restore_vault.CLEAR_ORDER)
+        num_deals = db.query(DealModel).delete()
+        logger.info(f"🗑️ Deleted {num_deals} materialized deals.")
+
         num_history = db.query(PriceHistoryModel).delete()
         logger.info(f"🗑️ Deleted {num_history} price history records.")
         
@@ -25,7 +31,8 @@ def reset_hunter_data():
         num_offers = db.query(OfferModel).delete()
         logger.info(f"🗑️ Deleted {num_offers} active offers.")
         
-        # 3. Delete Pending Matches
+        # 3. Delete Pending Matches (and their precomputed suggestions)
+        db.query(PurgatorySuggestionModel).delete()
         num_pending = db.query(PendingMatchModel).delete()
         logger.info(f"🗑️ Deleted {num_pending} pending matches.")
         
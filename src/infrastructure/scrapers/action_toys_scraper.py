@@ -1,8 +1,7 @@
-from typing import List, Optional
-import asyncio
+from typing import AsyncIterator, List, Optional
 import logging
 from playwright.async_api import BrowserContext, Page
-from bs4 import BeautifulSoup
+from src.infrastructure.scrapers.parsing import parse_html
 
 from src.infrastructure.scrapers.base import BaseScraper
 from src.scrapers.base import ScrapedOffer
@@ -17,11 +16,10 @@ class ActionToysScraper(BaseScraper):
     def __init__(self):
         super().__init__(name="ActionToys", base_url="https://actiontoys.es/figuras-de-accion/masters-of-the-universe/")
 
-    async def run(self, context: BrowserContext) -> List[ScrapedOffer]:
+    async def stream(self, context: BrowserContext) -> AsyncIterator[List[ScrapedOffer]]:
         """
         Executes the scraping logic for Action Toys.
         """
-        products: List[ScrapedOffer] = []
         page = await context.new_page()
         
         try:
@@ -37,21 +35,23 @@ class ActionToysScraper(BaseScraper):
                     break
                 
                 # Random delay to behave like a human (anti-ban)
-                await asyncio.sleep(2.0)
+                await self._pause(2.0)
                 
                 # Extract HTML
                 html_content = await page.content()
-                soup = BeautifulSoup(html_content, 'html.parser')
+                soup = parse_html(html_content)
                 
                 # Find Items
                 items = soup.select('li.product')
                 logger.info(f"[{self.spider_name}] Found {len(items)} items on page {page_num}")
                 
+                page_offers: List[ScrapedOffer] = []
                 for item in items:
                     prod = self._parse_html_item(item)
                     if prod:
-                        products.append(prod)
+                        page_offers.append(prod)
                         self.items_scraped += 1
+                yield page_offers # Stream page by page (STREAMING KAIZEN)
                 
                 # Pagination (More robust selector: looking for current + 1 or next)
                 next_tag = soup.select_one('a.next.page-numbers')
@@ -79,8 +79,7 @@ class ActionToysScraper(BaseScraper):
         finally:
             await page.close()
             
-        logger.info(f"[{self.spider_name}] Finished. Total items: {len(products)}")
-        return products
+        logger.info(f"[{self.spider_name}] Finished. Total items: {self.items_scraped}")
 
     def _parse_html_item(self, item) -> Optional[ScrapedOffer]:
         try:
@@ -1,7 +1,9 @@
-from abc import ABC, abstractmethod
-from typing import List, Optional
+from abc import ABC
+from typing import AsyncIterator, List, Optional
 from datetime import datetime
 import logging
+import time
+from src.infrastructure.scrapers.parsing import parse_html
 from playwright.async_api import BrowserContext, Page
 from src.scrapers.base import ScrapedOffer
 
@@ -21,14 +23,39 @@ class BaseScraper(ABC):
         self.errors = 0
         self.blocked = False # Phase 19: Anti-bot sensor
         self.audit_logger = None # Will be injected by the runner
+        self.rate_limiter = None # DomainRateLimiter, injected by the runner (concurrent scans)
+        self.http_client = None # Shared httpx.AsyncClient, injected by the runner (HTTP-first mode)
+        self.delay_controller = None # AdaptiveDelayController, injected by the runner
+        self.last_fetch_via = None # "http" | "browser"
+        self._http_disabled = False # Set once HTTP got blocked or empty: browser for the rest of the run
+
+    # HTTP-first mode: listing pages are plain server-rendered HTML (PrestaShop/Magento)
+    http_first: bool = False
+
+    # Deep Harvest settings (per shop, override in subclasses)
+    detail_concurrency: int = 2 # Parallel detail-page workers
+    detail_jitter: tuple = (1.0, 3.0) # Seconds between detail pages, per worker
 
-    @abstractmethod
     async def run(self, context: BrowserContext) -> List[ScrapedOffer]:
         """
         Main entry point for the scraper.
-        Must return a list of ScrapedOffer objects.
+        Returns the whole shop as a list of ScrapedOffer objects.
+        Scrapers implement `stream` (preferred) or override `run` directly.
         """
-        pass
+        offers: List[ScrapedOffer] = []
+        async for page_offers in self.stream(context):
+            offers.extend(page_offers)
+        return offers
+
+    async def stream(self, context: BrowserContext) -> AsyncIterator[List[ScrapedOffer]]:
+        """
+        STREAMING KAIZEN: Yields offers listing page by listing page, so the
+        runner can persist while pagination continues.
+        Default: a single batch from a scraper that only implements `run`.
+        """
+        if type(self).run is BaseScraper.run:
+            raise NotImplementedError(f"{type(self).__name__} must implement stream() or run()")
+        yield await self.run(context)
 
     async def _safe_navigate(self, page: Page, url: str) -> bool:
         """
@@ -40,8 +67,8 @@ class BaseScraper(ABC):
         
         max_retries = 3
         for attempt in range(max_retries):
-            # Jittered delay
-            delay = random.uniform(2.0, 5.0) * (attempt + 1)
+            # Jittered delay (adaptive per domain when a controller is injected)
+            delay = (self.delay_controller.delay_for(url) if self.delay_controller else random.uniform(2.0, 5.0)) * (attempt + 1)
             if attempt > 0:
                 logger.info(f"[{self.spider_name}] 🔄 Retry {attempt}/{max_retries} for {url}. Waiting {delay:.2f}s...")
             else:
@@ -49,31 +76,21 @@ class BaseScraper(ABC):
             
             await asyncio.sleep(delay)
             
+            recorded = False
             try:
-                response = await page.goto(url, timeout=60000, wait_until="domcontentloaded")
+                async with self._polite(url):
+                    started = time.monotonic()
+                    response = await page.goto(url, timeout=60000, wait_until="domcontentloaded")
+                    elapsed = time.monotonic() - started
                 api_status = response.status if response else 0
                 
                 await self._handle_popups(page)
                 
                 # Check if we were blocked (Anti-bot detection) - Surgical precision
                 content = await page.content()
-                content_lower = content.lower()
-                
-                # Active blocking indicators (not just script availability)
-                is_blocked = (api_status in [403, 429])
-                
-                if not is_blocked:
-                    # Check for explicit 'blocked' or 'access denied' patterns in body
-                    # BUT only if it looks like an error page (short content or specific headers)
-                    if len(content) < 2000: # Typical error page size
-                        if any(term in content_lower for term in ["blocked", "access denied", "connection reset"]):
-                            is_blocked = True
-                    
-                    # CAPTCHA detection: look for common challenge elements, not just the word 'captcha'
-                    if "g-recaptcha" in content_lower or "h-captcha" in content_lower or "cloudflare" in content_lower:
-                        # Only if we don't see typical product data
-                        if "product" not in content_lower and "price" not in content_lower:
-                            is_blocked = True
+                is_blocked = self._is_block_page(api_status, content)
+                self._record_response(url, api_status, elapsed, is_blocked)
+                recorded = True
 
                 if is_blocked:
                     self.blocked = True
@@ -84,6 +101,8 @@ class BaseScraper(ABC):
                 return True
             except Exception as e:
                 logger.error(f"[{self.spider_name}] Attempt {attempt+1} failed for {url}: {e}")
+                if not recorded:
+                    self._record_response(url, 0) # Timeout / network error
                 if self.audit_logger and attempt == max_retries - 1:
                     self.audit_logger.log_insight(
                         self.spider_name, 
@@ -95,6 +114,130 @@ class BaseScraper(ABC):
         self.errors += 1
         return False
 
+    @staticmethod
+    def _is_block_page(status: int, content: str) -> bool:
+        """
+        Anti-bot detector shared by the browser and HTTP fetch paths.
+        """
+        content_lower = content.lower()
+        
+        # Active blocking indicators (not just script availability)
+        if status in [403, 429]:
+            return True
+        
+        # Check for explicit 'blocked' or 'access denied' patterns in body
+        # BUT only if it looks like an error page (short content or specific headers)
+        if len(content) < 2000: # Typical error page size
+            if any(term in content_lower for term in ["blocked", "access denied", "connection reset"]):
+                return True
+        
+        # CAPTCHA detection: look for common challenge elements, not just the word 'captcha'
+        if "g-recaptcha" in content_lower or "h-captcha" in content_lower or "cloudflare" in content_lower:
+            # Only if we don't see typical product data
+            if "product" not in content_lower and "price" not in content_lower:
+                return True
+        return False
+
+    async def _fetch_html(self, page: Page, url: str) -> Optional[str]:
+        """
+        Pluggable fetch strategy for listing pages.
+        HTTP-first shops try the shared httpx client and fall back to the
+        browser when the block detector trips or the request fails.
+        Returns None if the page could not be loaded at all.
+        """
+        if self.http_first and self.http_client and not self._http_disabled:
+            html = await self._http_get(url)
+            if html is not None:
+                self.last_fetch_via = "http"
+                return html
+            logger.warning(f"[{self.spider_name}] 🌐 HTTP fetch failed for {url}. Falling back to browser.")
+            self._http_disabled = True
+
+        if not await self._safe_navigate(page, url):
+            return None
+        await self._after_navigate(page)
+        self.last_fetch_via = "browser"
+        return await page.content()
+
+    async def _fetch_listing(self, page: Page, url: str, item_selector: str):
+        """
+        Fetches a listing page and selects its product containers.
+        An empty selection over HTTP usually means JS-rendered or cloaked
+        content, so the page is retried once in the browser.
+        Returns (soup, items) or None if the page could not be loaded.
+        """
+        html = await self._fetch_html(page, url)
+        if html is None:
+            return None
+        soup = parse_html(html)
+        items = soup.select(item_selector)
+
+        if not items and self.last_fetch_via == "http":
+            logger.warning(f"[{self.spider_name}] 🌐 No items over HTTP for {url}. Retrying with browser.")
+            self._http_disabled = True
+            html = await self._fetch_html(page, url)
+            if html is None:
+                return None
+            soup = parse_html(html)
+            items = soup.select(item_selector)
+
+        return soup, items
+
+    async def _http_get(self, url: str) -> Optional[str]:
+        import random
+        import asyncio
+        import httpx
+
+        # Lighter jitter than the browser path: no rendering to wait for
+        await asyncio.sleep(self.delay_controller.delay_for(url) if self.delay_controller else random.uniform(1.0, 2.5))
+        try:
+            async with self._polite(url):
+                started = time.monotonic()
+                response = await self.http_client.get(url)
+                elapsed = time.monotonic() - started
+        except httpx.HTTPError as e:
+            logger.warning(f"[{self.spider_name}] HTTP error for {url}: {e}")
+            self._record_response(url, 0)
+            return None
+
+        html = response.text
+        is_blocked = self._is_block_page(response.status_code, html)
+        self._record_response(url, response.status_code, elapsed, is_blocked)
+        if response.status_code != 200 or is_blocked:
+            logger.warning(f"[{self.spider_name}] 🚫 HTTP fetch rejected (Status: {response.status_code}) for {url}")
+            return None
+        return html
+
+    async def _after_navigate(self, page: Page):
+        """
+        Hook run after a successful browser navigation in `_fetch_html`
+        (waits, scrolling...). Not used on the HTTP path.
+        """
+        pass
+
+    def _record_response(self, url: str, status: int, elapsed: float = 0.0, blocked: bool = False):
+        if self.delay_controller:
+            self.delay_controller.record(url, status, elapsed, blocked)
+
+    async def _pause(self, seconds: float):
+        """
+        Settle pause (render waits, scrolling). Shrinks with the domain's
+        adaptive delay while the shop answers healthily.
+        """
+        import asyncio
+        if self.delay_controller:
+            seconds *= self.delay_controller.scale(self.base_url)
+        await asyncio.sleep(seconds)
+
+    def _polite(self, url: str):
+        """
+        Per-domain politeness slot for a navigation (no-op when run standalone).
+        """
+        if self.rate_limiter:
+            return self.rate_limiter.limit(url)
+        from contextlib import nullcontext
+        return nullcontext()
+
     async def _handle_popups(self, page: Page):
         """
         Hook for closing newsletters, cookie banners, etc.
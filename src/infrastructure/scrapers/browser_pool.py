@@ -0,0 +1,215 @@
+from typing import Dict, List, Optional
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+import asyncio
+import logging
+import random
+from playwright.async_api import async_playwright, Browser, BrowserContext, Route
+
+# Configure Logger
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+]
+
+# We only consume HTML: none of this is needed to read prices
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+BLOCKED_SCRIPT_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "facebook.net", "facebook.com", "hotjar.com", "clarity.ms", "tiktok.com", "criteo.com",
+    "trustpilot.com", "bing.com",
+)
+
+
+def should_block(resource_type: str, url: str) -> bool:
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    if resource_type == "script":
+        host = urlparse(url).netloc.lower()
+        return any(host == h or host.endswith("." + h) for h in BLOCKED_SCRIPT_HOSTS)
+    return False
+
+
+class BrowserPool:
+    """
+    One headless Chromium per scan, shared by every shop.
+    Hands out pre-warmed BrowserContexts with route-level blocking of
+    images/media/fonts and third-party analytics scripts. Contexts are reused
+    across shops (pages closed, cookies cleared) and recycled after
+    `max_uses` to keep memory flat.
+
+    Usage:
+        async with BrowserPool(size=3) as pool:
+            async with pool.context() as context:
+                page = await context.new_page()
+    """
+    def __init__(
+        self,
+        size: int = 2,
+        headless: bool = True,
+        block_resources: bool = True,
+        max_uses: int = 5,
+        user_agents: Optional[List[str]] = None
+    ):
+        self.size = max(1, size)
+        self.headless = headless
+        self.block_resources = block_resources
+        self.max_uses = max(1, max_uses)
+        self.user_agents = user_agents or DEFAULT_USER_AGENTS
+        self.stats = {"contexts_created": 0, "checkouts": 0, "blocked_requests": 0}
+        self.context_reports: List[dict] = []
+
+        self._playwright = None
+        self._browser: Optional[Browser] = None
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._uses: Dict[int, int] = {}
+        self._blocked: Dict[int, int] = {}
+        self._peak_heap: Dict[int, float] = {}
+        self._samplers: set = set()
+
+    async def __aenter__(self) -> "BrowserPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(
+            headless=self.headless,
+            args=["--disable-dev-shm-usage", "--disable-extensions", "--disable-background-networking"]
+        )
+        # Pre-warm: contexts are ready before the first shop asks
+        for _ in range(self.size):
+            self._idle.put_nowait(await self._new_context())
+        logger.info(f"🧭 Browser pool ready: {self.size} contexts (resource blocking: {'on' if self.block_resources else 'off'})")
+
+    async def _new_context(self) -> BrowserContext:
+        context = await self._browser.new_context(user_agent=random.choice(self.user_agents))
+        key = id(context)
+        self._uses[key] = 0
+        self._blocked[key] = 0
+        self._peak_heap[key] = 0.0
+        # Per-context memory: JS heap sampled on every page load
+        context.on("page", lambda page: page.on("domcontentloaded", lambda _: self._schedule_sample(context, page)))
+        if self.block_resources:
+            async def _route(route: Route):
+                request = route.request
+                if should_block(request.resource_type, request.url):
+                    self._blocked[key] += 1
+                    self.stats["blocked_requests"] += 1
+                    await route.abort()
+                else:
+                    await route.continue_()
+            await context.route("**/*", _route)
+        self.stats["contexts_created"] += 1
+        return context
+
+    async def acquire(self) -> BrowserContext:
+        """
+        Checks out a context, waiting if all of them are busy.
+        """
+        context = await self._idle.get()
+        if context is None:
+            # Empty slot left by a failed replacement: retry the creation here
+            try:
+                context = await self._new_context()
+            except BaseException:
+                self._idle.put_nowait(None)
+                raise
+        key = id(context)
+        self._uses[key] += 1
+        self._blocked[key] = 0 # Report per checkout
+        self._peak_heap[key] = 0.0
+        self.stats["checkouts"] += 1
+        return context
+
+    async def release(self, context: BrowserContext, label: str = ""):
+        """
+        Returns a context to the pool (pages closed, cookies cleared) and logs
+        its report for this checkout.
+        """
+        await self._release(context, label)
+
+    @asynccontextmanager
+    async def context(self, label: str = ""):
+        context = await self.acquire()
+        try:
+            yield context
+        finally:
+            await self.release(context, label)
+
+    async def _release(self, context: BrowserContext, label: str):
+        key = id(context)
+        report = {
+            "label": label,
+            "uses": self._uses.get(key, 0),
+            "blocked_requests": self._blocked.get(key, 0),
+            "peak_js_heap_mb": round(self._peak_heap.get(key, 0.0) / (1024 * 1024), 1),
+        }
+        self.context_reports.append(report)
+        logger.info(f"🧭 Context report [{label}]: {report}")
+
+        try:
+            for page in list(context.pages):
+                await page.close()
+            await context.clear_cookies()
+            if self._uses.get(key, 0) < self.max_uses:
+                self._idle.put_nowait(context)
+                return
+        except Exception as e:
+            logger.warning(f"Browser pool: recycling broken context ({e})")
+        try:
+            await context.close()
+        except Exception:
+            pass # Already gone (crashed page or browser)
+        # Recycled (worn out or broken): replace it so the pool keeps its size
+        self._uses.pop(key, None)
+        self._blocked.pop(key, None)
+        self._peak_heap.pop(key, None)
+        try:
+            self._idle.put_nowait(await self._new_context())
+        except Exception as e:
+            # Keep the slot (None) so waiters are not left hanging; acquire() retries
+            logger.warning(f"Browser pool: could not replace context ({e})")
+            self._idle.put_nowait(None)
+
+    def _schedule_sample(self, context: BrowserContext, page):
+        task = asyncio.ensure_future(self._sample_heap(context, page))
+        self._samplers.add(task)
+        task.add_done_callback(self._samplers.discard)
+
+    async def _sample_heap(self, context: BrowserContext, page):
+        """
+        JSHeapUsedSize of a freshly loaded page (Chromium CDP metrics).
+        """
+        try:
+            cdp = await context.new_cdp_session(page)
+            await cdp.send("Performance.enable")
+            metrics = await cdp.send("Performance.getMetrics")
+            await cdp.detach()
+        except Exception:
+            return # Page closed meanwhile
+        heap = next((m["value"] for m in metrics["metrics"] if m["name"] == "JSHeapUsedSize"), 0)
+        key = id(context)
+        if key in self._peak_heap:
+            self._peak_heap[key] = max(self._peak_heap[key], heap)
+
+    async def close(self):
+        while not self._idle.empty():
+            context = self._idle.get_nowait()
+            if context is None:
+                continue
+            try:
+                await context.close()
+            except Exception:
+                pass
+        if self._browser:
+            await self._browser.close()
+        if self._playwright:
+            await self._playwright.stop()
+        logger.info(f"🧭 Browser pool closed: {self.stats}")
@@ -0,0 +1,107 @@
+from typing import List, Dict, Optional, Callable
+import asyncio
+import logging
+import random
+from playwright.async_api import BrowserContext
+
+from src.core.detail_cache import DetailCache
+from src.infrastructure.scrapers.base import BaseScraper
+from src.scrapers.base import ScrapedOffer
+
+# Configure Logger
+logger = logging.getLogger(__name__)
+
+class DeepHarvester:
+    """
+    PRECISION KAIZEN: Bounded worker pool for the --deep-harvest pass.
+    Each worker owns one reusable page and pulls offers from a shared queue,
+    so detail pages are visited in parallel instead of one new page per item.
+    Concurrency and jitter come from the scraper (per-shop settings).
+    An optional DetailCache is consulted before navigating to a detail page.
+    """
+    def __init__(
+        self,
+        scraper: BaseScraper,
+        context: BrowserContext,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        detail_cache: Optional[DetailCache] = None
+    ):
+        self.scraper = scraper
+        self.context = context
+        self.concurrency = max(1, scraper.detail_concurrency)
+        self.jitter = scraper.detail_jitter
+        self.on_progress = on_progress
+        self.should_stop = should_stop
+        self.detail_cache = detail_cache
+        self.stats = {"targets": 0, "skipped_known": 0, "cache_hits": 0, "visited": 0, "found": 0, "failed": 0}
+
+    async def harvest(self, offers: List[ScrapedOffer], known_eans: Dict[str, str]) -> dict:
+        """
+        Fills `ean` on the given offers in place.
+        Offers whose EAN is already known (catalog or prior harvest) are filled
+        from `known_eans` without navigating.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in offers:
+            if getattr(item, 'ean', None):
+                continue
+            known = known_eans.get(str(item.url))
+            if known:
+                item.ean = known
+                self.stats["skipped_known"] += 1
+                continue
+            cached = self.detail_cache.get(str(item.url)) if self.detail_cache else None
+            if cached and cached.get('ean'):
+                item.ean = cached['ean']
+                self.stats["cache_hits"] += 1
+                continue
+            queue.put_nowait(item)
+
+        total = queue.qsize()
+        self.stats["targets"] = total
+        logger.info(
+            f"[{self.scraper.spider_name}] 🔍 Deep Harvest: {total} pages to visit, "
+            f"{self.stats['skipped_known']} EANs already known, {self.stats['cache_hits']} from detail cache. Workers: {self.concurrency}"
+        )
+        if total == 0:
+            return self.stats
+
+        workers = [self._worker(queue, total) for _ in range(min(self.concurrency, total))]
+        await asyncio.gather(*workers)
+
+        logger.info(f"[{self.scraper.spider_name}] 🏁 Deep Harvest finished: {self.stats}")
+        return self.stats
+
+    async def _worker(self, queue: asyncio.Queue, total: int):
+        page = await self.context.new_page()
+        try:
+            while not queue.empty():
+                if self.should_stop and self.should_stop():
+                    logger.warning(f"[{self.scraper.spider_name}] 🛑 Deep Harvest interrupted by stop signal.")
+                    return
+
+                item = queue.get_nowait()
+                try:
+                    # Reuse the worker page; only replace it if it died
+                    if page.is_closed():
+                        page = await self.context.new_page()
+                    detail_data = await self.scraper._scrape_detail(page, str(item.url))
+                    if detail_data and detail_data.get('ean'):
+                        item.ean = detail_data['ean']
+                        self.stats["found"] += 1
+                        if self.detail_cache:
+                            self.detail_cache.put(str(item.url), detail_data)
+                        logger.info(f"   🎯 Fingerprint found for '{item.product_name}': {item.ean}")
+                except Exception as e:
+                    self.stats["failed"] += 1
+                    logger.warning(f"[{self.scraper.spider_name}] Detail page failed for {item.url}: {e}")
+
+                self.stats["visited"] += 1
+                if self.on_progress:
+                    self.on_progress(self.stats["visited"], total)
+
+                await self.scraper._pause(random.uniform(*self.jitter)) # Jitter between detail pages (adaptive)
+        finally:
+            if not page.is_closed():
+                await page.close()
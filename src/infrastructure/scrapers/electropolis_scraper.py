@@ -1,8 +1,7 @@
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 import asyncio
 import logging
 from playwright.async_api import BrowserContext, Page
-from bs4 import BeautifulSoup
 
 from src.infrastructure.scrapers.base import BaseScraper
 from src.scrapers.base import ScrapedOffer
@@ -15,11 +14,13 @@ class ElectropolisScraper(BaseScraper):
     Scraper for Electropolis (Magento 2).
     Uses robust 'data-price-amount' attribute for zero-ambiguity pricing.
     """
+    # Server-rendered listings: fetch over HTTP first
+    http_first = True
+
     def __init__(self):
         super().__init__(name="Electropolis", base_url="https://www.electropolis.es/catalogsearch/result/?q=masters+of+the+universe")
 
-    async def run(self, context: BrowserContext) -> List[ScrapedOffer]:
-        products: List[ScrapedOffer] = []
+    async def stream(self, context: BrowserContext) -> AsyncIterator[List[ScrapedOffer]]:
         page = await context.new_page()
         
         try:
@@ -30,31 +31,19 @@ class ElectropolisScraper(BaseScraper):
             while current_url and page_num <= max_pages:
                 logger.info(f"[{self.spider_name}] Scraping page {page_num}: {current_url}")
                 
-                # Navigate
-                await page.goto(current_url, wait_until="domcontentloaded")
-                
-                # Smart Wait (Auditor Recommendation)
-                try:
-                    # Wait for the main product container to appear
-                    await page.wait_for_selector('.product-item-info', timeout=15000)
-                except Exception:
-                    logger.warning(f"[{self.spider_name}] Timeout waiting for selectors on {current_url}")
-                
-                # Get content regardless of wait success
-                html_content = await page.content()
-                
-                # Small human courtesy delay still recommended, but smaller
-                await asyncio.sleep(1.0) 
-                soup = BeautifulSoup(html_content, 'html.parser')
-                
-                items = soup.select('.product-item-info')
+                listing = await self._fetch_listing(page, current_url, '.product-item-info')
+                if listing is None:
+                    break
+                soup, items = listing
                 logger.info(f"[{self.spider_name}] Found {len(items)} items on page {page_num}")
                 
+                page_offers: List[ScrapedOffer] = []
                 for item in items:
                     prod = self._parse_html_item(item)
                     if prod:
-                        products.append(prod)
+                        page_offers.append(prod)
                         self.items_scraped += 1
+                yield page_offers # Stream page by page (STREAMING KAIZEN)
                 
                 # Pagination: Magento uses .pages .action.next
                 next_tag = soup.select_one('.pages .action.next')
@@ -71,8 +60,7 @@ class ElectropolisScraper(BaseScraper):
         finally:
             await page.close()
             
-        logger.info(f"[{self.spider_name}] Finished. Total items: {len(products)}")
-        return products
+        logger.info(f"[{self.spider_name}] Finished. Total items: {self.items_scraped}")
 
     def _parse_html_item(self, item) -> Optional[ScrapedOffer]:
         try:
@@ -153,6 +141,17 @@ class ElectropolisScraper(BaseScraper):
             pass
         return {}
 
+    async def _after_navigate(self, page: Page):
+        # Smart Wait (Auditor Recommendation)
+        try:
+            # Wait for the main product container to appear
+            await page.wait_for_selector('.product-item-info', timeout=15000)
+        except Exception:
+            logger.warning(f"[{self.spider_name}] Timeout waiting for selectors on {page.url}")
+        
+        # Small human courtesy delay still recommended, but smaller
+        await self._pause(1.0)
+
     async def _handle_popups(self, page: Page):
         """
         Electropolis specific: Accept cookies to clear the overlay.
@@ -1,8 +1,7 @@
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 import asyncio
 import logging
 from playwright.async_api import BrowserContext, Page
-from bs4 import BeautifulSoup
 
 from src.infrastructure.scrapers.base import BaseScraper
 from src.scrapers.base import ScrapedOffer
@@ -15,11 +14,13 @@ class FantasiaScraper(BaseScraper):
     Scraper for Fantasia Personajes (PrestaShop).
     Uses 'content' attribute for price reliability.
     """
+    # Server-rendered listings: fetch over HTTP first
+    http_first = True
+
     def __init__(self):
         super().__init__(name="Fantasia Personajes", base_url="https://fantasiapersonajes.es/busqueda?controller=search&s=masters+of+the+universe")
 
-    async def run(self, context: BrowserContext) -> List[ScrapedOffer]:
-        products: List[ScrapedOffer] = []
+    async def stream(self, context: BrowserContext) -> AsyncIterator[List[ScrapedOffer]]:
         page = await context.new_page()
         
         try:
@@ -30,28 +31,24 @@ class FantasiaScraper(BaseScraper):
             while current_url and page_num <= max_pages:
                 logger.info(f"[{self.spider_name}] Scraping page {page_num}: {current_url}")
                 
-                if not await self._safe_navigate(page, current_url):
-                    break
-                
-                await self._handle_popups(page)
-                await asyncio.sleep(1.5)
-                
-                html_content = await page.content()
-                soup = BeautifulSoup(html_content, 'html.parser')
-                
                 # Strategy 1: Verified CSS Selectors (Primary for results)
-                items = soup.select('article.product-miniature')
+                listing = await self._fetch_listing(page, current_url, 'article.product-miniature')
+                if listing is None:
+                    break
+                soup, items = listing
                 logger.info(f"[{self.spider_name}] Found {len(items)} items using CSS.")
                 
                 if not items:
                     # Fallback to secondary container pattern
                     items = soup.select('.product-miniature')
                     
+                page_offers: List[ScrapedOffer] = []
                 for item in items:
                     prod = self._parse_html_item(item)
                     if prod:
-                        products.append(prod)
+                        page_offers.append(prod)
                         self.items_scraped += 1
+                yield page_offers # Stream page by page (STREAMING KAIZEN)
                 
                 # Pagination: PrestaShop .next.js-search-link
                 next_tag = soup.select_one('a.next.js-search-link, li.next a')
@@ -71,8 +68,7 @@ class FantasiaScraper(BaseScraper):
         finally:
             await page.close()
             
-        logger.info(f"[{self.spider_name}] Finished. Total items: {len(products)}")
-        return products
+        logger.info(f"[{self.spider_name}] Finished. Total items: {self.items_scraped}")
 
     def _parse_html_item(self, item) -> Optional[ScrapedOffer]:
         try:
@@ -242,6 +238,10 @@ class FantasiaScraper(BaseScraper):
             pass
         return {}
 
+    async def _after_navigate(self, page: Page):
+        await self._handle_popups(page)
+        await self._pause(1.5)
+
     async def _handle_popups(self, page: Page):
         """
         Fantasia specific: Close the 'LOGÍSTICA REYES' modal and accept cookies.
@@ -1,8 +1,7 @@
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 import asyncio
 import logging
 from playwright.async_api import BrowserContext, Page
-from bs4 import BeautifulSoup
 
 from src.infrastructure.scrapers.base import BaseScraper
 from src.scrapers.base import ScrapedOffer
@@ -15,11 +14,17 @@ class FrikiversoScraper(BaseScraper):
     Scraper for Frikiverso (PrestaShop).
     Parsing requires robust text cleaning as <span class="price"> text is often messy.
     """
+    # Anti-bot sensitive: one detail worker, slower jitter
+    detail_concurrency = 1
+    detail_jitter = (2.0, 4.0)
+
+    # Server-rendered listings: fetch over HTTP first
+    http_first = True
+
     def __init__(self):
         super().__init__(name="Frikiverso", base_url="https://frikiverso.es/es/buscar?controller=search&s=masters+del+universo")
 
-    async def run(self, context: BrowserContext) -> List[ScrapedOffer]:
-        products: List[ScrapedOffer] = []
+    async def stream(self, context: BrowserContext) -> AsyncIterator[List[ScrapedOffer]]:
         page = await context.new_page()
         
         try:
@@ -30,32 +35,24 @@ class FrikiversoScraper(BaseScraper):
             while current_url and page_num <= max_pages:
                 logger.info(f"[{self.spider_name}] Scraping page {page_num}: {current_url}")
                 
-                if not await self._safe_navigate(page, current_url):
-                    break
-                
-                await self._handle_popups(page)
-                await asyncio.sleep(2.0) 
-                
-                # Human-like interaction (Kaizen Hardening)
-                await page.mouse.wheel(0, 500)
-                await asyncio.sleep(1.0)
-                
-                html_content = await page.content()
-                soup = BeautifulSoup(html_content, 'html.parser')
-                
                 # PrestaShop standard container
-                items = soup.select('article.js-product-miniature, article.ajax_block_product')
+                listing = await self._fetch_listing(page, current_url, 'article.js-product-miniature, article.ajax_block_product')
+                if listing is None:
+                    break
+                soup, items = listing
                 logger.info(f"[{self.spider_name}] Found {len(items)} items on page {page_num}")
                 
                 if not items:
                     logger.warning(f"[{self.spider_name}] No items found. Possible selector change or end of list.")
                     break
 
+                page_offers: List[ScrapedOffer] = []
                 for item in items:
                     prod = self._parse_html_item(item)
                     if prod:
-                        products.append(prod)
+                        page_offers.append(prod)
                         self.items_scraped += 1
+                yield page_offers # Stream page by page (STREAMING KAIZEN)
                 
                 # Pagination
                 # Frikiverso uses a.next.js-search-link
@@ -75,8 +72,7 @@ class FrikiversoScraper(BaseScraper):
         finally:
             await page.close()
             
-        logger.info(f"[{self.spider_name}] Finished. Total items: {len(products)}")
-        return products
+        logger.info(f"[{self.spider_name}] Finished. Total items: {self.items_scraped}")
 
     def _parse_html_item(self, item) -> Optional[ScrapedOffer]:
         try:
@@ -138,6 +134,14 @@ class FrikiversoScraper(BaseScraper):
             logger.warning(f"[{self.spider_name}] Item parsing error: {e}")
             return None
 
+    async def _after_navigate(self, page: Page):
+        await self._handle_popups(page)
+        await self._pause(2.0)
+        
+        # Human-like interaction (Kaizen Hardening)
+        await page.mouse.wheel(0, 500)
+        await self._pause(1.0)
+
     async def _handle_popups(self, page: Page):
         """
         Frikiverso specific: Close cookie banners and newsletter popups.
@@ -0,0 +1,30 @@
+import logging
+import httpx
+
+# Configure Logger
+logger = logging.getLogger(__name__)
+
+def build_http_client(user_agent: str) -> httpx.AsyncClient:
+    """
+    Shared client for the HTTP-first fetch mode.
+    One pooled client per scan: keep-alive connections and a common cookie jar
+    for every shop. HTTP/2 is used when the optional `h2` package is installed.
+    """
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        http2 = False
+        logger.debug("h2 not installed, HTTP-first mode will use HTTP/1.1")
+
+    return httpx.AsyncClient(
+        http2=http2,
+        follow_redirects=True,
+        timeout=httpx.Timeout(30.0, connect=10.0),
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0),
+        headers={
+            "User-Agent": user_agent,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
+        },
+    )
@@ -0,0 +1,31 @@
+from typing import List
+import logging
+from bs4 import BeautifulSoup, Tag
+
+# Configure Logger
+logger = logging.getLogger(__name__)
+
+# Fast C-backed tree builder when available; html.parser is pure Python
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+    logger.warning("lxml not installed: falling back to the slow 'html.parser' backend.")
+
+
+def parse_html(html: str) -> BeautifulSoup:
+    """
+    Parses a whole listing/detail page once.
+    Returns a regular BeautifulSoup tree, so `_parse_html_item` methods keep
+    using select / select_one / get_text unchanged.
+    """
+    return BeautifulSoup(html, HTML_PARSER)
+
+
+def select_items(html: str, selector: str) -> List[Tag]:
+    """
+    Single-pass helper: parse the page and return the product containers.
+    """
+    return parse_html(html).select(selector)
+
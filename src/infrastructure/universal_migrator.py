@@ -52,6 +52,66 @@ def migrate():
             conn.execute(text("ALTER TABLE offers ADD COLUMN max_price FLOAT DEFAULT 0.0"))
             conn.commit()
 
+        # Unique URL index for the bulk upsert (ON CONFLICT (url)).
+        # If legacy duplicates exist this fails and the repository falls back to add_offer.
+        index_names = [ix['name'] for ix in inspector.get_indexes("offers")]
+        if "ux_offers_url" not in index_names:
+            logger.info("Creating unique index 'ux_offers_url' on offers(url)...")
+            try:
+                conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_offers_url ON offers (url)"))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.warning(f"Could not create ux_offers_url (duplicate offer URLs?): {e}")
+
+        # Server-side Catalog: aggregate and ownership lookups
+        for ddl in (
+            "CREATE INDEX IF NOT EXISTS ix_offers_product_id ON offers (product_id)",
+            "CREATE INDEX IF NOT EXISTS ix_collection_owner_product ON collection_items (owner_id, product_id)",
+        ):
+            try:
+                conn.execute(text(ddl))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.warning(f"Could not create index ({ddl}): {e}")
+
+        # Trigram search on products.name (Catalog search box)
+        if engine.dialect.name == "postgresql":
+            try:
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING gin (name gin_trgm_ops)"))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.warning(f"Could not create trigram index on products.name: {e}")
+        elif engine.dialect.name == "sqlite" and "products_fts" not in tables:
+            logger.info("Creating FTS5 trigram index 'products_fts' on products(name)...")
+            try:
+                conn.execute(text(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+                    "name, content='products', content_rowid='id', tokenize='trigram')"
+                ))
+                # External content table: kept in sync by triggers
+                conn.execute(text(
+                    "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+                    "INSERT INTO products_fts(rowid, name) VALUES (new.id, new.name); END"
+                ))
+                conn.execute(text(
+                    "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+                    "INSERT INTO products_fts(products_fts, rowid, name) VALUES ('delete', old.id, old.name); END"
+                ))
+                conn.execute(text(
+                    "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name ON products BEGIN "
+                    "INSERT INTO products_fts(products_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+                    "INSERT INTO products_fts(rowid, name) VALUES (new.id, new.name); END"
+                ))
+                conn.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.warning(f"Could not create products_fts (SQLite without FTS5 trigram?): {e}")
+
         # --- Table: pending_matches ---
         columns_pending = [c['name'] for c in inspector.get_columns("pending_matches")]
         if "ean" not in columns_pending:
@@ -65,6 +125,21 @@ def migrate():
         # --- Table: price_alerts (Created by create_all, but check for created_at if old) ---
         # (Assuming it's new so skip for now)
 
+    # --- Table: deals (materialized Hunter view) ---
+    # Freshly created by create_all: populate it once from the existing offers
+    if "deals" not in tables:
+        from src.infrastructure.database import SessionLocal
+        from src.infrastructure.repositories.product import ProductRepository
+        db = SessionLocal()
+        try:
+            ProductRepository(db).rebuild_deals()
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not populate deals table: {e}")
+        finally:
+            db.close()
+
     logger.info("Universal Migration finished successfully.")
 
 if __name__ == "__main__":
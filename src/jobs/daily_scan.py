@@ -5,7 +5,6 @@ import sys
 import os
 from pathlib import Path
 from datetime import datetime
-from playwright.async_api import async_playwright
 
 # Add project root to Python path
 root_path = Path(__file__).resolve().parent.parent.parent
@@ -63,6 +62,17 @@ async def run_daily_scan(progress_callback=None):
     parser.add_argument("--shops", nargs="*", help="Specific shops to scrape (e.g. electropolis fantasia)")
     parser.add_argument("--random-delay", type=int, default=0, help="Wait up to X minutes before starting (jitter)")
     parser.add_argument("--deep-harvest", action="store_true", help="Visit individual product pages for EAN/GTIN extraction")
+    parser.add_argument("--concurrency", type=int, default=3, help="Max shops scraped at the same time")
+    parser.add_argument("--per-domain", type=int, default=1, help="Max simultaneous requests per shop domain")
+    parser.add_argument("--domain-interval", type=float, default=2.0, help="Min seconds between request starts on the same domain")
+    parser.add_argument("--no-block-resources", action="store_true", help="Let the browser load images, fonts and analytics scripts")
+    parser.add_argument("--no-adaptive-delay", action="store_true", help="Use fixed random delays instead of the per-domain adaptive controller")
+    parser.add_argument("--no-http-first", action="store_true", help="Always render listing pages in the browser")
+    parser.add_argument("--micro-batch", type=int, default=100, help="Offers per persistence commit while a shop is still being scraped")
+    parser.add_argument("--stream-queue", type=int, default=4, help="Max scraped pages waiting for persistence (backpressure)")
+    parser.add_argument("--full-scan", action="store_true", help="Ignore page fingerprints and re-process every listing page")
+    parser.add_argument("--stop-after-unchanged", type=int, default=0, help="Stop paginating a shop after N consecutive unchanged pages (0 = never)")
+    parser.add_argument("--detail-cache-ttl", type=float, default=90, help="Days a cached detail page (EAN) stays valid")
     args, unknown = parser.parse_known_args()
     
     # --- STAGGERED START (KAIZEN) ---
@@ -120,11 +130,10 @@ async def run_daily_scan(progress_callback=None):
     
     # DB Session for Status Updates
     from src.infrastructure.database import SessionLocal
-    from src.domain.models import ScraperStatusModel
+    from src.domain.models import ScraperStatusModel, ScraperExecutionLogModel
     from src.core.audit_logger import AuditLogger
-    
-    db = SessionLocal()
-    audit = AuditLogger(db)
+    from src.core.rate_limiter import DomainRateLimiter
+    from src.infrastructure.scrapers.browser_pool import BrowserPool
 
     total_scrapers = len(scrapers)
     
@@ -138,37 +147,91 @@ async def run_daily_scan(progress_callback=None):
     ]
     import random
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        
-        for idx, scraper in enumerate(scrapers):
-            # Check for Stop Signal
-            if os.path.exists(".stop_scan"):
-                logger.warning("🛑 Stop Signal Detected. Aborting scan sequence.")
-                try:
-                    os.remove(".stop_scan")
-                except:
-                    pass
-                break
+    # --- CONCURRENT SCHEDULER ---
+    # Shops live on different domains, so they run in parallel (each in its own
+    # BrowserContext) under a global cap; the DomainRateLimiter keeps every
+    # individual shop at a polite pace.
+    global_cap = asyncio.Semaphore(max(1, args.concurrency))
+    rate_limiter = DomainRateLimiter(max_concurrent=args.per_domain, min_interval=args.domain_interval)
+    persist_lock = asyncio.Lock() # One writer at a time (SQLite friendly)
+    stop_event = asyncio.Event()
+    completed = 0
+
+    # HTTP-first fetch mode: one pooled client (keep-alive, shared cookies) for every shop
+    http_client = None
+    if not args.no_http_first:
+        from src.infrastructure.scrapers.http_fetch import build_http_client
+        http_client = build_http_client(random.choice(user_agents))
+
+    # Adaptive per-domain pacing (AIMD), resumed from the previous run's state
+    delay_controller = None
+    if not args.no_adaptive_delay:
+        from src.core.delay_controller import AdaptiveDelayController
+        delay_controller = AdaptiveDelayController()
+
+    # Incremental scanning: unchanged listing pages skip matching and DB writes
+    fingerprints = None
+    if not args.full_scan:
+        from src.core.page_fingerprints import PageFingerprintStore
+        fingerprints = PageFingerprintStore()
+
+    # Black Box: one raw snapshot run per shop, fed by every page of the scan
+    snapshot_store = None
+    try:
+        from src.core.snapshot_store import SnapshotStore
+        snapshot_store = SnapshotStore()
+    except Exception as e:
+        logger.warning(f"Snapshot store unavailable, raw snapshots disabled: {e}")
+
+    # Deep Harvest: persistent URL -> EAN cache, shared by every shop
+    detail_cache = None
+    if args.deep_harvest:
+        from src.core.detail_cache import DetailCache
+        detail_cache = DetailCache(ttl_days=args.detail_cache_ttl)
+
+    logger.info(f"⚙️ Scheduler: concurrency={args.concurrency}, per-domain={args.per_domain}, domain interval={args.domain_interval}s")
+
+    def stop_requested() -> bool:
+        if stop_event.is_set():
+            return True
+        if os.path.exists(".stop_scan"):
+            logger.warning("🛑 Stop Signal Detected. Aborting scan sequence.")
+            stop_event.set()
+            try:
+                os.remove(".stop_scan")
+            except:
+                pass
+            return True
+        return False
+
+    async def run_scraper(pool, scraper):
+        nonlocal completed
+        async with global_cap:
+            # Check for Stop Signal (shops still waiting for a slot are cancelled)
+            if stop_requested():
+                return
                 
             logger.info(f"🕸️ Engaging {scraper.spider_name}...")
             
-            # Select Random User-Agent
-            current_ua = random.choice(user_agents)
-            logger.info(f"🎭 Using User-Agent: {current_ua[:50]}...")
-            
-            # Create Isolated Context
-            context = await browser.new_context(user_agent=current_ua)
+            # Pre-warmed context from the shared pool (random User-Agent, resource blocking)
+            context = await pool.acquire()
+
+            # Sessions are not safe to share between concurrent tasks: one per shop
+            db = SessionLocal()
             
-            # Inject Audit Logger
-            scraper.audit_logger = audit
+            # Inject Audit Logger & Politeness Limiter
+            scraper.audit_logger = AuditLogger(db)
+            scraper.rate_limiter = rate_limiter
+            scraper.http_client = http_client
+            scraper.delay_controller = delay_controller
 
             # UI Progress Update
-            progress_val = int((idx / total_scrapers) * 100)
+            progress_val = int((completed / total_scrapers) * 100)
             if progress_callback:
                 progress_callback(scraper.spider_name, progress_val)
                 
             # DB Status Update (Running)
+            status_row = None
             try:
                 status_row = db.query(ScraperStatusModel).filter(ScraperStatusModel.spider_name == scraper.spider_name).first()
                 if not status_row:
@@ -182,7 +245,6 @@ async def run_daily_scan(progress_callback=None):
                 db.rollback()
 
             # Create Execution Log Entry
-            from src.domain.models import ScraperExecutionLogModel
             log_entry = ScraperExecutionLogModel(
                 spider_name=scraper.spider_name,
                 status="running",
@@ -196,61 +258,198 @@ async def run_daily_scan(progress_callback=None):
                 logger.error(f"Failed to create execution log: {e}")
                 db.rollback()
 
+            # Black Box: this shop's raw snapshot run, closed in `finally`
+            snapshot_run = None
+            if snapshot_store:
+                try:
+                    snapshot_run = await asyncio.to_thread(snapshot_store.open_run, scraper.spider_name)
+                except Exception as e:
+                    logger.error(f"⚠️ Failed to open safety snapshot: {e}")
+
             try:
-                # 1. Scrape
-                offers = await scraper.run(context)
+                # 1. Scrape & Persist (STREAMING KAIZEN)
+                # Pages flow through a bounded queue into micro-batch commits while the
+                # scraper keeps paginating: matching overlaps network I/O, memory stays flat
+                # and a late crash only loses the current micro-batch.
+                from src.infrastructure.scrapers.deep_harvest import DeepHarvester
+                from src.infrastructure.repositories.product import ProductRepository
+
+                items_found = 0
+                harvest_stats = None
+
+                async def snapshot(offers):
+                    if snapshot_run is None:
+                        return
+                    try:
+                        await asyncio.to_thread(snapshot_store.append_run, snapshot_run, offers)
+                    except Exception as e:
+                        logger.error(f"⚠️ Failed to save safety snapshot: {e}")
+
+                queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, args.stream_queue))
+                scrape_error = []
+                unchanged_urls = []
+                unchanged_pages = 0
+
+                async def produce():
+                    nonlocal unchanged_pages
+                    pages = scraper.stream(context)
+                    page_index = 0
+                    unchanged_streak = 0
+                    try:
+                        async for page_offers in pages:
+                            page_index += 1
+                            if not page_offers:
+                                continue
+                            # INCREMENTAL KAIZEN: same (url, price, availability) set as last scan?
+                            fp = None
+                            if fingerprints:
+                                fp = fingerprints.fingerprint(page_offers)
+                                if fingerprints.is_unchanged(scraper.spider_name, str(page_index), fp):
+                                    # Skipped for matching, but still part of this scan's snapshot
+                                    await snapshot(page_offers)
+                                    unchanged_pages += 1
+                                    unchanged_urls.extend(str(o.url) for o in page_offers)
+                                    unchanged_streak += 1
+                                    if args.stop_after_unchanged and unchanged_streak >= args.stop_after_unchanged:
+                                        logger.info(f"⏭️ [{scraper.spider_name}] {unchanged_streak} unchanged pages in a row. Stopping pagination early.")
+                                        break
+                                    continue
+                                unchanged_streak = 0
+                            await queue.put((page_offers, str(page_index), fp))
+                    except Exception as e:
+                        scrape_error.append(e)
+                    finally:
+                        await pages.aclose()
+                    await queue.put(None) # End of shop
+
+                def harvest_progress(done: int, total: int):
+                    # Status table update every 10 pages (and at the end)
+                    if status_row is None or (done % 10 and done != total):
+                        return
+                    try:
+                        status_row.progress = int(done * 100 / total)
+                        status_row.total_items_estimated = total
+                        status_row.last_update = datetime.now()
+                        db.commit()
+                    except Exception:
+                        db.rollback()
+
+                catalog_index = None
+
+                async def persist(batch):
+                    nonlocal harvest_stats, catalog_index
+                    # PHASE 10: Deep Harvest (Precision) - bounded worker pool, per micro-batch
+                    if args.deep_harvest:
+                        logger.info(f"🔍 [{scraper.spider_name}] Deep Harvest active. Refining {len(batch)} items...")
+                        known_eans = ProductRepository(db).get_known_eans_by_urls(str(o.url) for o in batch)
+                        harvester = DeepHarvester(
+                            scraper, context,
+                            on_progress=harvest_progress,
+                            should_stop=stop_requested,
+                            detail_cache=detail_cache
+                        )
+                        batch_stats = await harvester.harvest(batch, known_eans)
+                        harvest_stats = batch_stats if harvest_stats is None else {
+                            k: harvest_stats[k] + v for k, v in batch_stats.items()
+                        }
+
+                    # Black Box: the micro-batch joins this shop's snapshot run
+                    await snapshot(batch)
+
+                    # Catalog + CandidateIndex loaded once per shop, reused by every micro-batch
+                    if catalog_index is None:
+                        catalog_index = await asyncio.to_thread(pipeline.load_catalog)
+
+                    # Update Database (off the event loop so other shops keep scraping)
+                    async with persist_lock:
+                        await asyncio.to_thread(pipeline.persist_batch, batch, catalog_index)
+
+                    try:
+                        if status_row is not None:
+                            status_row.items_scraped = items_found
+                            status_row.last_update = datetime.now()
+                            db.commit()
+                    except Exception:
+                        db.rollback()
+
+                def save_fingerprints(page_fps):
+                    # Only after the pages are committed: a crashed batch is re-processed next scan
+                    if fingerprints:
+                        for page_key, fp in page_fps:
+                            fingerprints.save(scraper.spider_name, page_key, fp)
+
+                producer = asyncio.create_task(produce())
+                try:
+                    buffer = []
+                    buffer_fps = []
+                    while True:
+                        entry = await queue.get()
+                        if entry is None:
+                            break
+                        page_offers, page_key, fp = entry
+                        buffer.extend(page_offers)
+                        buffer_fps.append((page_key, fp))
+                        items_found += len(page_offers)
+                        if len(buffer) >= args.micro_batch:
+                            await persist(buffer)
+                            save_fingerprints(buffer_fps)
+                            buffer, buffer_fps = [], []
+                    if buffer:
+                        await persist(buffer)
+                        save_fingerprints(buffer_fps)
+                except BaseException:
+                    producer.cancel()
+                    raise
+                await producer
+
+                # Unchanged pages: only last_seen moves, in one bulk update
+                if unchanged_urls:
+                    items_found += len(unchanged_urls)
+                    async with persist_lock:
+                        try:
+                            touched = ProductRepository(db).touch_offers_last_seen(unchanged_urls)
+                            db.commit()
+                            logger.info(f"⏭️ [{scraper.spider_name}] {unchanged_pages} unchanged pages skipped ({touched} offers marked as seen).")
+                        except Exception as e:
+                            logger.error(f"Failed to touch last_seen for unchanged pages: {e}")
+                            db.rollback()
+
+                if scrape_error:
+                    raise scrape_error[0]
                 
                 # PHASE 19: Health & Block Alerts (Sentinel)
                 from src.core.notifier import NotifierService
                 notifier = NotifierService()
-                if not offers:
+                if not items_found:
                     if getattr(scraper, 'blocked', False):
                         logger.error(f"[{scraper.spider_name}] 🚫 Blocked by anti-bot measures.")
                         msg = f"🚫 **DESTIERRO DETECTADO**\n\nEl Oráculo ha sido bloqueado por **{scraper.spider_name}**. Se requieren medidas de evasión táctica."
-                        await notifier.send_message(msg)
+                        notifier.enqueue_message(db, msg)
                         log_entry.status = "blocked"
                         log_entry.error_message = "Anti-bot block detected"
                     else:
                         logger.warning(f"[{scraper.spider_name}] ⚠️ Empty scan results.")
                         # Alert if this is a shop that usually has items (most of them)
                         msg = f"⚠️ **SALUD COMPROMETIDA**\n\nEl scraper de **{scraper.spider_name}** ha devuelto 0 resultados. Podría ser un cambio de estructura HTML o falta de stock real."
-                        await notifier.send_message(msg)
+                        notifier.enqueue_message(db, msg)
                         log_entry.status = "empty_warning"
                 
-                # 2. Persist
-                if offers:
-                    # PHASE 10: Deep Harvest (Precision)
-                    if args.deep_harvest and offers:
-                        logger.info(f"🔍 [{scraper.spider_name}] Deep Harvest active. Refining {len(offers)} items...")
-                        for item in offers:
-                            # Visit detail page if EAN is missing and we want precision
-                            if not getattr(item, 'ean', None):
-                                # Ensure the scraper has a _scrape_detail method
-                                if hasattr(scraper, '_scrape_detail') and callable(getattr(scraper, '_scrape_detail')):
-                                    # Create a temporary page for detail scraping to avoid interference
-                                    detail_page = await context.new_page()
-                                    try:
-                                        detail_data = await scraper._scrape_detail(detail_page, item.url)
-                                        if detail_data and detail_data.get('ean'):
-                                            item.ean = detail_data['ean']
-                                            logger.info(f"   🎯 Fingerprint found for '{item.product_name}': {item.ean}")
-                                    finally:
-                                        await detail_page.close()
-                                        
-                                    await asyncio.sleep(random.uniform(1.0, 3.0)) # Jitter between detail pages
-                                else:
-                                    logger.warning(f"⚠️ Scraper {scraper.spider_name} does not implement _scrape_detail for deep harvest.")
-
-                    # Update Database
-                    pipeline.update_database(offers)
+                # 2. Stats
+                if items_found:
                     stats = {
-                        "items_found": len(offers),
+                        "items_found": items_found,
                         "status": "Success"
                     }
-                    total_stats["found"] += len(offers)
+                    if scraper.http_first and http_client:
+                        stats["fetch_mode"] = "browser_fallback" if scraper._http_disabled else "http"
+                    if harvest_stats:
+                        stats["deep_harvest"] = harvest_stats
+                    if unchanged_pages:
+                        stats["unchanged_pages"] = unchanged_pages
+                    total_stats["found"] += items_found
                     
                     # Log Update Success
-                    log_entry.items_found = len(offers)
+                    log_entry.items_found = items_found
                     log_entry.status = "success"
                 else:
                     stats = {"items_found": 0, "status": "Empty"}
@@ -258,9 +457,10 @@ async def run_daily_scan(progress_callback=None):
                 
                 # DB Status Update (Completed)
                 try:
-                    status_row.status = "completed"
-                    status_row.items_scraped = len(offers) if offers else 0
-                    status_row.last_update = datetime.now()
+                    if status_row is not None:
+                        status_row.status = "completed"
+                        status_row.items_scraped = items_found
+                        status_row.last_update = datetime.now()
                     
                     # Finalize Log
                     log_entry.end_time = datetime.now()
@@ -278,7 +478,8 @@ async def run_daily_scan(progress_callback=None):
                 
                 # DB Status Update (Error)
                 try:
-                    status_row.status = "error"
+                    if status_row is not None:
+                        status_row.status = "error"
                     
                     # Finalize Log Error
                     log_entry.status = "error"
@@ -289,15 +490,81 @@ async def run_daily_scan(progress_callback=None):
                 except Exception:
                     db.rollback()
             finally:
-                await context.close()
-        
-        await browser.close()
+                if snapshot_run is not None:
+                    try:
+                        await asyncio.to_thread(snapshot_store.close_run, snapshot_run)
+                    except Exception as e:
+                        logger.error(f"⚠️ Failed to close safety snapshot: {e}")
+                await pool.release(context, scraper.spider_name)
+                db.close()
+                completed += 1
+
+    # Telegram outbox: drained in the background while shops are still scanning
+    from src.core.notification_dispatcher import NotificationDispatcher
+    async with NotificationDispatcher() as dispatcher:
+        dispatch_stop = asyncio.Event()
+        dispatch_task = asyncio.create_task(dispatcher.run(dispatch_stop))
+
+        # One Chromium for the whole scan: contexts are pre-warmed and reused across shops
+        async with BrowserPool(size=args.concurrency, block_resources=not args.no_block_resources, user_agents=user_agents) as pool:
+            outcomes = await asyncio.gather(*(run_scraper(pool, s) for s in scrapers), return_exceptions=True)
+            for scraper, outcome in zip(scrapers, outcomes):
+                if isinstance(outcome, Exception):
+                    logger.error(f"❌ Scheduler failure for {scraper.spider_name}: {outcome}")
+                    results.setdefault(scraper.spider_name, {"error": str(outcome)})
+                    total_stats["errors"] += 1
+            results["browser_pool"] = {**pool.stats, "contexts": pool.context_reports}
+
+        # Final drain: everything enqueued by the last batches goes out now
+        dispatch_stop.set()
+        try:
+            await dispatch_task
+        except Exception as e:
+            logger.error(f"❌ Notification dispatcher failed: {e}")
+        results["notifications"] = dict(dispatcher.stats)
+
+    if http_client:
+        await http_client.aclose()
+
+    # Notification throttle keys: drop the expired ones
+    try:
+        from src.core.throttle_store import ThrottleStore
+        ThrottleStore.shared().compact()
+    except Exception as e:
+        logger.warning(f"Throttle store compaction failed: {e}")
+
+    # Black Box: raw snapshot runs older than ~6 months
+    if snapshot_store:
+        try:
+            snapshot_store.prune(keep_days=180)
+            results["raw_snapshots"] = snapshot_store.stats()
+        except Exception as e:
+            logger.warning(f"Snapshot store pruning failed: {e}")
+        snapshot_store.close()
+
+    # Purgatory: score the new pending items so the Admin page only reads suggestions
+    from src.core.purgatory_suggester import refresh_suggestions
+    results["purgatory_suggestions"] = await asyncio.to_thread(refresh_suggestions)
+
+    if delay_controller:
+        delay_controller.save()
+        results["delay_state"] = delay_controller.snapshot()
+        logger.info(f"🐢 Delay state: {results['delay_state']}")
+
+    if fingerprints:
+        results["page_fingerprints"] = dict(fingerprints.stats)
+        fingerprints.close()
+
+    if detail_cache:
+        # Expired rows are only skipped on read; drop them so the cache file stays bounded
+        detail_cache.stats["purged"] = detail_cache.purge_expired()
+        results["detail_cache"] = dict(detail_cache.stats)
+        logger.info(f"🗄️ Detail cache: {detail_cache.stats}")
+        detail_cache.close()
     
     # Final Callback
     if progress_callback:
         progress_callback("Completado", 100)
-    
-    db.close()
 
     # PHASE 18: Create Database Vault (Safe Backup)
     try:
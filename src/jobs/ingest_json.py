@@ -44,6 +44,10 @@ def ingest_data():
     # Pipeline.update_database is synchronous? 
     # Checking code... update_database definition is def update_database(self, offers: List[ScrapedOffer]): (Sync)
     pipeline.update_database(offers)
+
+    # Deal / Centinela alerts were queued in the outbox: deliver them now
+    from src.core.notification_dispatcher import dispatch_pending
+    asyncio.run(dispatch_pending())
     
     logger.info("Ingestion Complete.")
 
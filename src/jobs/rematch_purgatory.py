@@ -0,0 +1,96 @@
+import sys
+import json
+import time
+import logging
+from pathlib import Path
+from sqlalchemy.orm import Session
+
+# Add project root to Python path
+root_path = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(root_path))
+
+from src.infrastructure.database import SessionLocal
+from src.domain.models import ProductModel, PendingMatchModel, OfferHistoryModel, PurgatorySuggestionModel
+from src.core.batch_matcher import BatchMatcher
+
+logger = logging.getLogger("rematch_purgatory")
+
+def rematch_purgatory(db: Session, threshold: float = 0.9, chunk_size: int = 500, dry_run: bool = False) -> dict:
+    """
+    Re-empareja todo el Purgatorio contra el catálogo actual (BatchMatcher) y
+    vincula en bloque las almas cuya mejor coincidencia alcanza `threshold`.
+    """
+    from src.infrastructure.repositories.product import ProductRepository
+
+    started = time.perf_counter()
+    products = db.query(ProductModel).order_by(ProductModel.id).all()
+    by_id = {p.id: p for p in products}
+    engine = BatchMatcher(products, chunk_size=chunk_size)
+
+    pending = db.query(PendingMatchModel).order_by(PendingMatchModel.id).all()
+    logger.info(f"🔮 Re-emparejando {len(pending)} almas contra {len(products)} productos (umbral {threshold:.0%})...")
+
+    stats = {"pending": len(pending), "linked": 0, "kept": 0}
+    repo = ProductRepository(db)
+    for i in range(0, len(pending), chunk_size):
+        chunk = pending[i:i + chunk_size]
+        batch, routed = [], []
+        for item, top in zip(chunk, engine.top_k(chunk, k=1)):
+            if not top or top[0][1] < threshold:
+                stats["kept"] += 1
+                continue
+            product_id, score = top[0]
+            logger.info(f"✅ {item.scraped_name} -> {by_id[product_id].name} ({score:.0%})")
+            batch.append((by_id[product_id], {
+                "shop_name": item.shop_name,
+                "price": item.price,
+                "currency": item.currency,
+                "url": item.url,
+                "is_available": True
+            }))
+            routed.append((item, score))
+
+        stats["linked"] += len(routed)
+        if dry_run or not routed:
+            continue
+
+        repo.bulk_upsert_offers(batch)
+        for item, score in routed:
+            db.add(OfferHistoryModel(
+                offer_url=item.url,
+                product_name=item.scraped_name,
+                shop_name=item.shop_name,
+                price=item.price,
+                action_type="LINKED_BULK",
+                details=json.dumps({"currency": item.currency, "image_url": item.image_url, "ean": item.ean, "score": round(score, 4)})
+            ))
+            db.delete(item)
+        ids = [item.id for item, _ in routed]
+        db.query(PurgatorySuggestionModel).filter(PurgatorySuggestionModel.pending_id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+
+    if stats["linked"] and not dry_run:
+        from src.core.catalog_snapshot import invalidate_catalog_snapshot
+        invalidate_catalog_snapshot()
+
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    verb = "se vincularían" if dry_run else "vinculadas"
+    logger.info(f"🏁 {stats['linked']} almas {verb}, {stats['kept']} siguen en el Purgatorio ({stats['seconds']}s).")
+    return stats
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Re-emparejado masivo del Purgatorio")
+    parser.add_argument("--threshold", type=float, default=0.9, help="Confianza mínima para vincular (0-1)")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Almas puntuadas por bloque")
+    parser.add_argument("--dry-run", action="store_true", help="Solo mostrar lo que se vincularía")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s | %(levelname)-8s | %(message)s')
+    if args.threshold < 0.7:
+        parser.error("--threshold por debajo del umbral estricto del pipeline (0.7)")
+
+    db = SessionLocal()
+    try:
+        rematch_purgatory(db, threshold=args.threshold, chunk_size=args.chunk_size, dry_run=args.dry_run)
+    finally:
+        db.close()
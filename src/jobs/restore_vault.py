@@ -1,112 +1,196 @@
+import csv
+import io
+import itertools
 import json
 import os
-import sys
 import logging
+from datetime import datetime
 from pathlib import Path
-from sqlalchemy import text
+from sqlalchemy import text, delete, select, func, DateTime
 from src.infrastructure.database import SessionLocal, engine
 from src.domain.models import (
-    Base, ProductModel, OfferModel, PendingMatchModel, OfferHistoryModel,
+    ProductModel, OfferModel, PendingMatchModel, OfferHistoryModel,
     UserModel, PriceAlertModel, CollectionItemModel, BlackcludedItemModel,
-    KaizenInsightModel, ScraperExecutionLogModel, PriceHistoryModel
+    KaizenInsightModel, ScraperExecutionLogModel, PriceHistoryModel,
+    DealModel, PurgatorySuggestionModel
 )
 
 # Setup Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s | %(levelname)-8s | %(message)s')
 logger = logging.getLogger("restore_tool")
 
-def restore_from_vault(file_path: str):
+CHECKPOINT_PATH = Path("backups/database/.restore_checkpoint.json")
+
+# Cleared before restoring, children first. Derived tables (deals, suggestions)
+# are not in the vault: they are rebuilt / recomputed afterwards.
+CLEAR_ORDER = [
+    DealModel, PurgatorySuggestionModel, PriceHistoryModel, PriceAlertModel,
+    CollectionItemModel, OfferHistoryModel, OfferModel, PendingMatchModel, ProductModel,
+    BlackcludedItemModel, KaizenInsightModel, ScraperExecutionLogModel, UserModel
+]
+
+SEQUENCE_TABLES = [
+    "users", "products", "offers", "pending_matches", "offer_history",
+    "price_alerts", "collection_items", "blackcluded_items",
+    "kaizen_insights", "scraper_execution_logs", "price_history"
+]
+
+def _load_checkpoint(file_path: str) -> dict:
+    try:
+        with open(CHECKPOINT_PATH, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("vault") == os.path.abspath(file_path):
+            return checkpoint
+    except (OSError, ValueError):
+        pass
+    return {}
+
+def _save_checkpoint(checkpoint: dict):
+    CHECKPOINT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = CHECKPOINT_PATH.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, CHECKPOINT_PATH)
+
+def _batches(rows, columns, table, batch_size):
     """
-    Restores the database from a JSON vault file.
+    Vault rows -> lists of dicts restricted to `columns`, ISO datetimes parsed
+    back (SQLite only accepts datetime objects).
+    """
+    datetime_cols = [c for c in columns if isinstance(table.c[c].type, DateTime)]
+    batch = []
+    for row in rows:
+        d = {c: row.get(c) for c in columns}
+        for c in datetime_cols:
+            if isinstance(d[c], str):
+                d[c] = datetime.fromisoformat(d[c])
+        batch.append(d)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _copy_batch(conn, table, columns, batch):
+    """
+    Postgres bulk path: COPY FROM STDIN (CSV, \\N as NULL).
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for d in batch:
+        writer.writerow([
+            "\\N" if d[c] is None else (d[c].isoformat() if isinstance(d[c], datetime) else d[c])
+            for c in columns
+        ])
+    buffer.seek(0)
+    cols = ", ".join(f'"{c}"' for c in columns)
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table.name} ({cols}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+    finally:
+        cursor.close()
+
+def restore_from_vault(file_path: str, batch_size: int = 2000, resume: bool = True):
+    """
+    Restores the database from a vault (streaming vault directory or legacy JSON file).
     WARNING: This will clear current tables before restoring!
-    Now supports sequences sync for Postgres.
+
+    Tables are streamed in dependency order and written in batches with Core
+    executemany (COPY FROM STDIN on Postgres), one commit per batch. Progress
+    is checkpointed after every batch: running it again on the same vault
+    resumes where an interrupted restore stopped. Sequences are synced and
+    derived tables (deals) rebuilt at the end.
     """
     if not os.path.exists(file_path):
         logger.error(f"❌ File not found: {file_path}")
         return
 
     logger.info(f"🛡️ Preparing to restore from: {file_path}")
-    
+    from src.core.backup_manager import BackupManager
+    bm = BackupManager()
+    use_copy = engine.dialect.name == "postgresql"
+
+    checkpoint = _load_checkpoint(file_path) if resume else {}
+    if checkpoint:
+        logger.warning(f"⏯️ Resuming interrupted restore: {len(checkpoint.get('done', []))} tables done, "
+                       f"{checkpoint.get('rows', 0)} rows of '{checkpoint.get('table')}'.")
+    else:
+        checkpoint = {"vault": os.path.abspath(file_path), "cleared": False, "done": [], "table": None, "rows": 0}
+
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            vault = json.load(f)
-        
-        metadata = vault.get("metadata", {})
-        data = vault.get("data", {})
-        
-        logger.info(f"📅 Backup Timestamp: {metadata.get('timestamp')}")
-        
+        with engine.connect() as conn:
+            # 1. DELETE CURRENT DATA (only once per restore: a resumed run keeps its progress)
+            if not checkpoint["cleared"]:
+                logger.warning("🌪️ Clearing existing data for a clean restore...")
+                with conn.begin():
+                    for model in CLEAR_ORDER:
+                        conn.execute(delete(model.__table__))
+                checkpoint["cleared"] = True
+                _save_checkpoint(checkpoint)
+
+            # 2. RESTORE DATA (Order of dependencies, batched commits)
+            import src.domain.models as models
+            from src.core.backup_manager import VAULT_TABLES
+            model_names = dict(VAULT_TABLES)
+            for table_name, rows in bm.iter_vault(file_path):
+                if table_name in checkpoint["done"]:
+                    continue
+                table = getattr(models, model_names[table_name]).__table__
+                skip = 0
+                if checkpoint["table"] == table_name:
+                    # The table was empty when its restore started: what is there now is
+                    # exactly what was committed (even if the checkpoint lags one batch)
+                    skip = conn.execute(select(func.count()).select_from(table)).scalar()
+                    conn.commit()
+                checkpoint.update(table=table_name, rows=skip)
+
+                rows = iter(rows)
+                first = next(rows, None)
+                if first is not None:
+                    # Columns of the vault that still exist in the schema (missing ones get their defaults)
+                    columns = [c for c in first if c in table.c]
+                    stream = itertools.islice(itertools.chain([first], rows), skip, None)
+                    for batch in _batches(stream, columns, table, batch_size):
+                        with conn.begin():
+                            if use_copy:
+                                _copy_batch(conn, table, columns, batch)
+                            else:
+                                conn.execute(table.insert(), batch)
+                        checkpoint["rows"] += len(batch)
+                        _save_checkpoint(checkpoint)
+
+                logger.info(f"🔄 Restored {checkpoint['rows']} {table_name}...")
+                checkpoint["done"].append(table_name)
+                checkpoint.update(table=None, rows=0)
+                _save_checkpoint(checkpoint)
+
+            # 3. SYNC SEQUENCES (CRITICAL FOR POSTGRES/SUPABASE)
+            if use_copy:
+                logger.info("⚡ Synchronizing Postgres ID sequences...")
+                with conn.begin():
+                    for table in SEQUENCE_TABLES:
+                        conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table}"))
+
+        # 4. Derived tables
         db = SessionLocal()
-        
         try:
-            # 1. DELETE CURRENT DATA (Reverse order of dependencies)
-            logger.warning("🌪️ Clearing existing data for a clean restore...")
-            # Deleting in order that respects FKs
-            db.query(PriceHistoryModel).delete()
-            db.query(PriceAlertModel).delete()
-            db.query(CollectionItemModel).delete()
-            db.query(OfferHistoryModel).delete()
-            db.query(OfferModel).delete()
-            db.query(PendingMatchModel).delete()
-            db.query(ProductModel).delete()
-            db.query(BlackcludedItemModel).delete()
-            db.query(KaizenInsightModel).delete()
-            db.query(ScraperExecutionLogModel).delete()
-            db.query(UserModel).delete()
+            from src.infrastructure.repositories.product import ProductRepository
+            deals = ProductRepository(db).rebuild_deals()
             db.commit()
-            
-            # 2. RESTORE DATA (Order of dependencies)
-            # Users
-            if "users" in data:
-                logger.info(f"👤 Restoring {len(data['users'])} users...")
-                for d in data["users"]: db.add(UserModel(**d))
-            
-            # Products
-            logger.info(f"📦 Restoring {len(data['products'])} products...")
-            for d in data["products"]: db.add(ProductModel(**d))
-            db.flush() 
-
-            # Rest of tables
-            table_map = {
-                "pending_matches": PendingMatchModel,
-                "offers": OfferModel,
-                "offer_history": OfferHistoryModel,
-                "price_alerts": PriceAlertModel,
-                "collection_items": CollectionItemModel,
-                "blackcluded_items": BlackcludedItemModel,
-                "kaizen_insights": KaizenInsightModel,
-                "scraper_execution_logs": ScraperExecutionLogModel,
-                "price_history": PriceHistoryModel
-            }
-
-            for key, model in table_map.items():
-                if key in data:
-                    logger.info(f"🔄 Restoring {len(data[key])} {key}...")
-                    for d in data[key]: db.add(model(**d))
-                
-            db.commit()
-            
-            # 3. SYNC SEQUENCES (CRITICAL FOR POSTGRES/SUPABASE)
-            if "postgresql" in str(engine.url):
-                logger.info("⚡ Synchronizing Postgres ID sequences...")
-                for table in ["users", "products", "offers", "pending_matches", "offer_history", 
-                              "price_alerts", "collection_items", "blackcluded_items", 
-                              "kaizen_insights", "scraper_execution_logs", "price_history"]:
-                    db.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table}"))
-                db.commit()
-
-            logger.info("✅ RESTORE COMPLETE. Eternia has been restored and sequences synced.")
-            
+            logger.info(f"🎯 Deals rebuilt: {deals}")
         except Exception as e:
             db.rollback()
-            logger.error(f"❌ Restore failed during DB operations: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.warning(f"⚠️ Could not rebuild deals after restore: {e}")
         finally:
             db.close()
-            
+
+        CHECKPOINT_PATH.unlink(missing_ok=True)
+        logger.info("✅ RESTORE COMPLETE. Eternia has been restored and sequences synced.")
+
     except Exception as e:
-        logger.error(f"❌ Failed to read vault file: {e}")
+        logger.error(f"❌ Restore failed (run again to resume from the checkpoint): {e}")
+        import traceback
+        traceback.print_exc()
 
 def list_available_backups():
     path = Path("backups/database")
@@ -114,16 +198,19 @@ def list_available_backups():
         logger.info("No backups found.")
         return []
     
-    files = sorted(list(path.glob("*.json")), key=os.path.getmtime, reverse=True)
-    for i, f in enumerate(files):
-        logger.info(f"[{i}] {f.name} ({f.stat().st_size / 1024:.1f} KB)")
-    return files
+    from src.core.backup_manager import BackupManager
+    vaults = BackupManager().list_vaults()
+    for i, v in enumerate(vaults):
+        logger.info(f"[{i}] {v['vault']} [{v['kind']}] ({v['size'] / 1024:.1f} KB)")
+    return [v["path"] for v in vaults]
 
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description="Eternia Restore Tool")
     parser.add_argument("--list", action="store_true", help="List available backups")
     parser.add_argument("--file", type=str, help="Absolute path to vault file to restore")
+    parser.add_argument("--batch-size", type=int, default=2000, help="Rows per insert batch / commit")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint of an interrupted restore")
     args = parser.parse_args()
     
     if args.list:
@@ -135,7 +222,7 @@ if __name__ == "__main__":
         print("!"*40 + "\n")
         confirm = input("Are you ABSOLUTELY sure? (yes/no): ")
         if confirm.lower() == "yes":
-            restore_from_vault(args.file)
+            restore_from_vault(args.file, batch_size=args.batch_size, resume=not args.restart)
         else:
             print("Restore aborted.")
     else:
@@ -146,6 +233,6 @@ if __name__ == "__main__":
             if choice.isdigit() and int(choice) < len(backups):
                 confirm = input(f"Restore {backups[int(choice)].name}? (yes/no): ")
                 if confirm.lower() == "yes":
-                    restore_from_vault(str(backups[int(choice)]))
+                    restore_from_vault(str(backups[int(choice)]), batch_size=args.batch_size, resume=not args.restart)
             else:
                 print("Exiting.")
@@ -19,6 +19,10 @@ async def run_fantasia_job():
     try:
         pipeline = ScrapingPipeline(db)
         pipeline.update_database(offers)
+
+        # Deal / Centinela alerts were queued in the outbox: deliver them now
+        from src.core.notification_dispatcher import dispatch_pending
+        await dispatch_pending()
         
         logger.info("✅ Job Complete: Database updated.")
         # logger.info(f"📊 Stats: Processed={stats['processed']}, Matches={stats['matches']}, Pending={stats['pending']}")
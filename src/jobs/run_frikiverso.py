@@ -18,6 +18,10 @@ async def run_frikiverso_job():
     try:
         pipeline = ScrapingPipeline(db)
         pipeline.update_database(offers)
+
+        # Deal / Centinela alerts were queued in the outbox: deliver them now
+        from src.core.notification_dispatcher import dispatch_pending
+        await dispatch_pending()
         
         logger.info("✅ Job Complete: Database updated.")
         
@@ -12,7 +12,11 @@ logger = logging.getLogger("smoke_test")
 
 async def test_rate_limiting():
     logger.info("--- 🛡️ Caso 1: Validando Cortafuegos de Alertas (Rate-Limit) ---")
-    notifier = NotifierService()
+    # Isolated throttle store: the real one persists between runs
+    import tempfile, os
+    from src.core.throttle_store import ThrottleStore
+    store_path = os.path.join(tempfile.mkdtemp(), "throttle.db")
+    notifier = NotifierService(throttle_store=ThrottleStore(path=store_path))
     
     test_msg = "🔥 ALERTA DE PRUEBA: El Oráculo está vigilando."
     
@@ -30,6 +34,10 @@ async def test_rate_limiting():
         status = "🚫 BLOQUEADO (Throttle)" if throttled else "✅ PROCESADO"
         logger.info(f"Mensaje {i+1}: {status}")
 
+    # A fresh process (new store on the same file) must still remember the first message
+    results.append(NotifierService(throttle_store=ThrottleStore(path=store_path))._should_throttle(key, minutes=30))
+    logger.info(f"Mensaje tras reinicio: {'🚫 BLOQUEADO (Throttle)' if results[-1] else '✅ PROCESADO'}")
+
     if not results[0] and all(results[1:]):
         logger.info("🏆 RESULTADO: Cortafuegos operativo. Solo el primer mensaje pasó la guardia.")
         return True
@@ -1,5 +1,5 @@
 import asyncio
-from typing import List
+from typing import List, Set
 from loguru import logger
 from src.scrapers.base import BaseSpider, ScrapedOffer
 from src.domain.schemas import Product
@@ -50,6 +50,39 @@ class ScrapingPipeline:
         n = re.sub(r'[^a-zA-Z0-9\s]', '', n)
         return " ".join(n.split())
 
+    def _prefetch_url_set(self, db: Session, column, urls: List[str]) -> Set[str]:
+        """
+        Returns which of `urls` exist in `column`, using chunked IN (...) queries
+        instead of one round trip per offer.
+        """
+        from src.infrastructure.repositories.product import URL_LOOKUP_CHUNK
+        found = set()
+        for i in range(0, len(urls), URL_LOOKUP_CHUNK):
+            chunk = urls[i:i + URL_LOOKUP_CHUNK]
+            found.update(r[0] for r in db.query(column).filter(column.in_(chunk)).all())
+        return found
+
+    def load_catalog(self):
+        """
+        Loads the product catalog and its CandidateIndex once, so a shop's
+        micro-batches can all be matched against it via persist_batch.
+        Products are detached from their session; persist_batch re-attaches matches.
+        """
+        from src.core.matching import SmartMatcher, CandidateIndex
+
+        db: Session = SessionLocal()
+        try:
+            # Pre-fetch all product names/IDs
+            all_products = ProductRepository(db).get_all(limit=5000)
+            db.expunge_all()
+        finally:
+            db.close()
+
+        # Inverted token index: each offer is only scored against products that
+        # share its rarest significant token (or its EAN). Rule 1 of SmartMatcher
+        # guarantees the pruned products could never have matched anyway.
+        return CandidateIndex(SmartMatcher(), all_products)
+
     def update_database(self, offers: List[ScrapedOffer]):
         """
         Persists found offers to the database using SmartMatcher.
@@ -59,7 +92,8 @@ class ScrapingPipeline:
             logger.warning("🛡️ Circuit Breaker: No offers found to process. Skipping DB update for this batch.")
             return
 
-        # 1. Save Raw Snapshot (Black Box)
+        # 1. Save Raw Snapshot (Black Box): one complete run per call. The
+        # streaming scan (persist_batch) appends to its own open run instead.
         try:
             from src.core.backup_manager import BackupManager
             bm = BackupManager()
@@ -68,18 +102,45 @@ class ScrapingPipeline:
         except Exception as e:
             logger.error(f"⚠️ Failed to save safety snapshot: {e}")
 
+        self.persist_batch(offers, self.load_catalog())
+
+    def persist_batch(self, offers: List[ScrapedOffer], index):
+        """
+        Matches one micro-batch against a catalog from load_catalog and writes it
+        in a single transaction.
+        """
+        if not offers:
+            return
+
         db: Session = SessionLocal()
         from src.core.matching import SmartMatcher
-        
-        matcher = SmartMatcher()
+
+        matcher = index.matcher
         repo = ProductRepository(db)
         
         try:
-            # Pre-fetch all product names/IDs
-            all_products = repo.get_all(limit=5000)
-            
-            # Note: We must compare against ALL products to find the BEST match.
-            # SmartMatcher is fast enough for 5000 items (simple set operations).
+            # Routing prefetch: existing links, blacklist and Purgatory resolved in
+            # one chunked query per table, then answered in memory per offer.
+            from src.domain.models import BlackcludedItemModel, PendingMatchModel
+            batch_urls = list(dict.fromkeys(str(o.url) for o in offers))
+            known_offers = repo.get_offers_by_urls(batch_urls)
+            blacklisted_urls = self._prefetch_url_set(db, BlackcludedItemModel.url, batch_urls)
+            try:
+                pending_urls = self._prefetch_url_set(db, PendingMatchModel.url, batch_urls)
+            except Exception as e:
+                # Query Shield: on failure assume nothing is pending yet (same as before)
+                logger.warning(f"⚠️ Query for existing Pending items failed: {e}. Proceeding as new.")
+                db.rollback()
+                pending_urls = set()
+            logger.info(f"📥 Routing prefetch: {len(known_offers)} known links, {len(blacklisted_urls)} blacklisted, {len(pending_urls)} pending (of {len(batch_urls)} URLs)")
+
+            # URL -> linked product. SmartMatches are added as we go so repeated URLs
+            # later in this batch are treated as Known Links.
+            linked_products = {url: o.product for url, o in known_offers.items()}
+
+            # Offers are written in one set-based upsert after matching (PHASE 19 batching)
+            # as (product, offer_data, is_smart_match)
+            upserts = []
             
             for offer in offers:
                 best_match_product = None
@@ -88,26 +149,22 @@ class ScrapingPipeline:
                 # Check 1: Does this offer satisfy "Already Linked" logic?
                 # "Una vez asociado ... ha de quedar inamovible"
                 # If we have an existing Offer with this URL, we MUST use its product_id, ignoring SmartMatcher.
-                existing_offer = repo.get_offer_by_url(str(offer.url))
+                linked_product = linked_products.get(str(offer.url))
                 
-                if existing_offer:
+                if linked_product:
                     # It's an update to an existing link
-                    logger.info(f"🔗 Known Link: '{offer.product_name}' -> '{existing_offer.product.name}' (Price Update)")
-                    saved_o, _ = repo.add_offer(existing_offer.product, {
+                    logger.info(f"🔗 Known Link: '{offer.product_name}' -> '{linked_product.name}' (Price Update)")
+                    upserts.append((linked_product, {
                         "shop_name": offer.shop_name,
                         "price": offer.price,
                         "currency": offer.currency, 
                         "url": str(offer.url),
                         "is_available": offer.is_available
-                    }, commit=False) # PHASE 19: Batching
-                    
-                    # Centinela Check
-                    from src.core.notifier import NotifierService
-                    NotifierService().check_price_alerts_sync(db, existing_offer.product, saved_o)
+                    }, False))
                     continue # Skip SmartMatch
                 
-                # Iterate all DB products to find best
-                for p in all_products:
+                # Iterate candidate DB products to find best
+                for p in index.candidates(offer.product_name, str(offer.url), getattr(offer, 'ean', None)):
                     is_match, score, reason = matcher.match(
                         p.name, 
                         offer.product_name, 
@@ -125,46 +182,29 @@ class ScrapingPipeline:
                 
                 if best_match_product and best_match_score >= 0.7:  # Strict Threshold
                     logger.info(f"✅ SmartMatch: '{offer.product_name}' -> '{best_match_product.name}' (Score: {best_match_score:.2f})")
+                    # Catalog products are detached: use this session's instance (no SQL)
+                    best_match_product = db.merge(best_match_product, load=False)
                     
-                    saved_offer, alert_discount = repo.add_offer(best_match_product, {
+                    upserts.append((best_match_product, {
                         "shop_name": offer.shop_name,
                         "price": offer.price,
                         "currency": offer.currency, 
                         "url": str(offer.url),
                         "is_available": offer.is_available
-                    }, commit=False) # PHASE 19: Batching
-                    
-                    if alert_discount:
-                        from src.core.notifier import NotifierService
-                        notifier = NotifierService()
-                        # Note: Notification stays sync but repo didn't commit yet. 
-                        # This works because add_offer did a flush.
-                        notifier.send_deal_alert_sync(best_match_product, saved_offer, alert_discount)
-                    
-                    # Centinela Check (Fase 15)
-                    from src.core.notifier import NotifierService
-                    NotifierService().check_price_alerts_sync(db, best_match_product, saved_offer)
+                    }, True))
+                    linked_products[str(offer.url)] = best_match_product
                 else:
                     logger.info(f"⏳ No Match Found: '{offer.product_name}' (Top Score: {best_match_score:.2f}) -> Routing to Purgatory")
                     
-                    # Check blacklist
-                    from src.domain.models import BlackcludedItemModel
-                    is_blacklisted = db.query(BlackcludedItemModel).filter(BlackcludedItemModel.url == str(offer.url)).first()
-                    if is_blacklisted:
+                    # Check blacklist (prefetched)
+                    if str(offer.url) in blacklisted_urls:
                         logger.warning(f"🚫 Ignored (Blacklist): {offer.product_name}")
                         continue
                         
-                    # Check if already exists in Pending
-                    from src.domain.models import PendingMatchModel
-                    try:
-                        existing = db.query(PendingMatchModel).filter(PendingMatchModel.url == str(offer.url)).first()
-                    except Exception as e:
-                        # Query Shield: If the query fails (likely due to a missing column like 'ean' in the DB)
-                        # we rollback and assume it doesn't exist yet in the DB.
-                        logger.warning(f"⚠️ Query for existing Pending item failed: {e}. Proceeding as new.")
-                        db.rollback()
-                        existing = None
-                    if not existing:
+                    # Check if already exists in Pending (prefetched)
+                    if str(offer.url) not in pending_urls:
+                        # Duplicate URLs within the batch must not violate the unique constraint
+                        pending_urls.add(str(offer.url))
                         # Defensive instantiation: Filter out keys that the model doesn't support
                         # This is the ULTIMATE defensive pattern against schema mismatches
                         all_data = {
@@ -217,9 +257,30 @@ class ScrapingPipeline:
                             db.add(history)
                         except: pass
             
+            # SET-BASED UPSERT: one INSERT ... ON CONFLICT (url) + executemany history
+            results = repo.bulk_upsert_offers([(p, data) for p, data, _ in upserts])
+            logger.info(f"💾 Bulk upsert: {len(results)} offer updates written.")
+
+            from src.core.notifier import NotifierService
+            from src.core.alert_index import AlertIndex
+            notifier = NotifierService()
+            # Centinela: every active alert of this batch's products in one query
+            alert_index = AlertIndex.load(db, [p.id for p, _, _ in upserts])
+            for (product, _, is_smart_match), (saved_offer, alert_discount) in zip(upserts, results):
+                if saved_offer is None:
+                    continue
+                if is_smart_match and alert_discount:
+                    # Outbox: queued in this transaction, delivered by the NotificationDispatcher
+                    notifier.enqueue_deal_alert(db, product, saved_offer, alert_discount)
+
+                # Centinela Check (Fase 15)
+                notifier.enqueue_price_alerts(db, product, saved_offer, index=alert_index)
+            alert_index.flush(db) # One bulk last_notified_at update
+
             # FINAL BATCH COMMIT (PHASE 19)
             db.commit()
             logger.info("⚡ Batch Commit Complete: All offers persisted in a single spark.")
+            logger.info(f"🧠 SmartMatcher token cache: {SmartMatcher.cache_stats()}")
 
         finally:
             db.close()
@@ -48,6 +48,9 @@ async def run_spider(spider_name: str):
         
         logger.info(f"💾 Persisting {len(results)} offers to database...")
         pipeline.update_database(results)
+
+        from src.core.notification_dispatcher import dispatch_pending
+        await dispatch_pending()
         
         status_row.status = "completed"
         status_row.items_scraped = len(results)
@@ -3,8 +3,8 @@ from typing import List
 from src.scrapers.base import BaseSpider, ScrapedOffer
 from src.core.logger import logger
 import asyncio
-from playwright.async_api import async_playwright
-from bs4 import BeautifulSoup
+from src.infrastructure.scrapers.browser_pool import BrowserPool
+from src.infrastructure.scrapers.parsing import select_items
 import random
 
 class ActionToysSpider(BaseSpider):
@@ -65,92 +65,86 @@ class ActionToysSpider(BaseSpider):
         if category_urls:
             logger.info("🕸️ ActionToys (Hybrid): Starting Category Crawl via Playwright...")
             
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                page_browser = await browser.new_page(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-                )
+            # Own single-context BrowserPool: same resource blocking and context hygiene as the daily scan
+            async with BrowserPool(size=1, user_agents=[
+                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+            ]) as pool:
+                # Released (pages closed, cookies cleared) even if the crawl raises
+                async with pool.context(self.shop_name) as context:
+                    page_browser = await context.new_page()
 
-                for cat_url in category_urls:
-                    page_num = 1
-                    while True:
-                        # WC Pagination: /page/2/
-                        url = cat_url if page_num == 1 else f"{cat_url}page/{page_num}/"
-                        logger.info(f"   Crawling (JS): {url}")
+                    for cat_url in category_urls:
+                        page_num = 1
+                        while True:
+                            # WC Pagination: /page/2/
+                            url = cat_url if page_num == 1 else f"{cat_url}page/{page_num}/"
+                            logger.info(f"   Crawling (JS): {url}")
                         
-                        try:
-                            # Navigate using domcontentloaded (faster, less prone to timeouts than networkidle)
-                            # Matches successful diagnostic script logic
-                            resp = await page_browser.goto(url, timeout=60000, wait_until="domcontentloaded")
+                            try:
+                                # Navigate using domcontentloaded (faster, less prone to timeouts than networkidle)
+                                # Matches successful diagnostic script logic
+                                resp = await page_browser.goto(url, timeout=60000, wait_until="domcontentloaded")
                             
-                            if resp.status == 404: break
+                                if resp.status == 404: break
                             
-                            # Log Content Length to detect blocks
-                            content_len = len(await page_browser.content())
-                            logger.info(f"   Page loaded. Content Length: {content_len}")
+                                # Log Content Length to detect blocks
+                                content_len = len(await page_browser.content())
+                                logger.info(f"   Page loaded. Content Length: {content_len}")
                             
-                            # Wait explicitly
-                            # Removed try/except to see actual error
-                            await page_browser.locator('li.product').first.wait_for(timeout=15000)
+                                # Wait explicitly
+                                # Removed try/except to see actual error
+                                await page_browser.locator('li.product').first.wait_for(timeout=15000)
 
-                            # Use Playwright locators
-                            product_locators = page_browser.locator('li.product')
-                            count = await product_locators.count()
+                                # Use Playwright locators
+                                product_locators = page_browser.locator('li.product')
+                                count = await product_locators.count()
                             
-                            if count == 0: 
-                                logger.warning("No products found on page.")
-                                # Dump details
-                                try:
-                                    body_html = await page_browser.locator("body").inner_html()
-                                    logger.warning(f"BODY DUMP (First 1000): {body_html[:1000]}")
-                                    await page_browser.screenshot(path="c:\\Users\\dace8\\OneDrive\\Documentos\\Antigravity\\el_oraculo_de_eternia\\debug_spider_fail_v2.png")
-                                    logger.info("Saved debug_spider_fail_v2.png")
-                                except Exception as e:
-                                    logger.error(f"Failed to dump debug info: {e}")
-                                break
+                                if count == 0: 
+                                    logger.warning("No products found on page.")
+                                    # Dump details
+                                    try:
+                                        body_html = await page_browser.locator("body").inner_html()
+                                        logger.warning(f"BODY DUMP (First 1000): {body_html[:1000]}")
+                                        await page_browser.screenshot(path="c:\\Users\\dace8\\OneDrive\\Documentos\\Antigravity\\el_oraculo_de_eternia\\debug_spider_fail_v2.png")
+                                        logger.info("Saved debug_spider_fail_v2.png")
+                                    except Exception as e:
+                                        logger.error(f"Failed to dump debug info: {e}")
+                                    break
                             
-                            current_page_found = 0
-                            for i in range(count):
-                                try:
-                                    # Get outer HTML of the element to parse with BS4 (keeping existing parser)
-                                    # We use loop index because locator lists can be volatile
-                                    element_html = await product_locators.nth(i).evaluate("el => el.outerHTML")
-                                    
-                                    # Create mini-soup for compatibility
-                                    item_soup = BeautifulSoup(element_html, 'html.parser').select_one('li.product')
-                                    
-                                    if item_soup:
+                                current_page_found = 0
+                                # Single pass: one content() round-trip and one fast parse per page
+                                # (instead of outerHTML + a mini-soup per item)
+                                for i, item_soup in enumerate(select_items(await page_browser.content(), 'li.product')):
+                                    try:
                                         offer = self._parse_html_item(item_soup)
                                         if offer and offer.url not in seen_urls:
                                             results.append(offer)
                                             seen_urls.add(offer.url)
                                             current_page_found += 1
-                                except Exception as e:
-                                    logger.error(f"Error parsing item {i}: {e}")
-                                    continue
+                                    except Exception as e:
+                                        logger.error(f"Error parsing item {i}: {e}")
+                                        continue
                             
-                            logger.info(f"   found {current_page_found} items on page {page_num}")
+                                logger.info(f"   found {current_page_found} items on page {page_num}")
                                     
-                            # Stop only if 0 items found AND we are past page 3 (to avoid false negatives on page 1)
-                            if current_page_found == 0 and page_num > 3:
-                                logger.info("0 items found after page 3. Stopping.")
-                                break
+                                # Stop only if 0 items found AND we are past page 3 (to avoid false negatives on page 1)
+                                if current_page_found == 0 and page_num > 3:
+                                    logger.info("0 items found after page 3. Stopping.")
+                                    break
                             
-                            # Next page check
-                            page_num += 1
-                            if page_num > 50: break
+                                # Next page check
+                                page_num += 1
+                                if page_num > 50: break
                             
-                            # Sleep slightly
-                            await asyncio.sleep(random.uniform(2.0, 4.0))
+                                # Sleep slightly
+                                await asyncio.sleep(random.uniform(2.0, 4.0))
                             
-                        except Exception as e:
-                            logger.error(f"html crawl error on page {page_num}: {e}")
-                            # Don't break on error, try next page
-                            page_num += 1
-                            if page_num > 50: break
-                            continue
-                
-                await browser.close()
+                            except Exception as e:
+                                logger.error(f"html crawl error on page {page_num}: {e}")
+                                # Don't break on error, try next page
+                                page_num += 1
+                                if page_num > 50: break
+                                continue
 
         logger.info(f"✅ ActionToys (Hybrid): Found {len(results)} total items.")
         return results
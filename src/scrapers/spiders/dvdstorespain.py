@@ -4,6 +4,7 @@ from typing import List, Optional
 from src.scrapers.base import BaseSpider, ScrapedOffer
 from src.core.logger import logger
 from bs4 import BeautifulSoup
+from src.infrastructure.scrapers.parsing import parse_html
 import re
 
 class DVDStoreSpainSpider(BaseSpider):
@@ -81,7 +82,7 @@ class DVDStoreSpainSpider(BaseSpider):
                             logger.error(f"   ❌ HTTP {response.status_code} on page {page}")
                             break
                         
-                        soup = BeautifulSoup(response.text, 'html.parser')
+                        soup = parse_html(response.text)
                         items = soup.select('.product-miniature')
                         logger.info(f"   found {len(items)} items on page {page}")
 
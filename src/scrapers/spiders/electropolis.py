@@ -3,6 +3,7 @@ from typing import List, Optional
 from src.scrapers.base import BaseSpider, ScrapedOffer
 from src.core.logger import logger
 from bs4 import BeautifulSoup
+from src.infrastructure.scrapers.parsing import parse_html
 import re
 
 class ElectropolisSpider(BaseSpider):
@@ -60,7 +61,7 @@ class ElectropolisSpider(BaseSpider):
                         logger.error(f"Electropolis HTTP Error: {response.status_code}")
                         break
                         
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    soup = parse_html(response.text)
                     
                     # Selectors (Magento)
                     items = soup.select('.item.product.product-item')
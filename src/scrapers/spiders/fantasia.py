@@ -3,6 +3,7 @@ from typing import List
 from src.scrapers.base import BaseSpider, ScrapedOffer
 from src.core.logger import logger
 from bs4 import BeautifulSoup
+from src.infrastructure.scrapers.parsing import parse_html
 import re
 
 class FantasiaSpider(BaseSpider):
@@ -52,7 +53,7 @@ class FantasiaSpider(BaseSpider):
                             break
                             
                         html = response.text
-                        soup = BeautifulSoup(html, 'html.parser')
+                        soup = parse_html(html)
                         items = soup.select('.product-miniature')
                         
                         if not items:
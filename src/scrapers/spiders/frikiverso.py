@@ -3,6 +3,7 @@ from typing import List, Optional
 from src.scrapers.base import BaseSpider, ScrapedOffer
 from src.core.logger import logger
 from bs4 import BeautifulSoup
+from src.infrastructure.scrapers.parsing import parse_html
 import re
 
 class FrikiversoSpider(BaseSpider):
@@ -42,7 +43,7 @@ class FrikiversoSpider(BaseSpider):
                         logger.error(f"Frikiverso HTTP Error: {response.status_code}")
                         break
                         
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    soup = parse_html(response.text)
                     
                     # 1. Parse Items
                     items = soup.select('.js-product-miniature')
@@ -3,6 +3,7 @@ from typing import List, Optional
 from src.scrapers.base import BaseSpider, ScrapedOffer
 from src.core.logger import logger
 from bs4 import BeautifulSoup
+from src.infrastructure.scrapers.parsing import parse_html
 import re
 
 class PixelatoySpider(BaseSpider):
@@ -41,7 +42,7 @@ class PixelatoySpider(BaseSpider):
                     logger.error(f"Pixelatoy Error: {response.status_code}")
                     return []
                     
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text)
                 
                 # Selectors (PrestaShop variants)
                 items = soup.select('.product-miniature')
@@ -279,6 +279,8 @@ with st.sidebar:
         if st.sidebar.button("🧹 Limpiar Caché", help="Refrescar memoria del sistema"):
             st.cache_data.clear()
             st.cache_resource.clear()
+            from src.core.catalog_snapshot import invalidate_catalog_snapshot
+            invalidate_catalog_snapshot()
             st.toast("✨ Caché purgada. El sistema está fresco.")
             st.rerun()
 
@@ -4,7 +4,7 @@ import sys
 import subprocess
 import signal
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 
 def render_inline_product_admin(db: Session, p, current_user_id: int):
     from src.domain.models import ProductModel, OfferModel, CollectionItemModel, PendingMatchModel, BlackcludedItemModel
@@ -29,6 +29,8 @@ def render_inline_product_admin(db: Session, p, current_user_id: int):
                         target_p.category = new_cat
                         target_p.image_url = new_img
                         db.commit()
+                        from src.core.catalog_snapshot import invalidate_catalog_snapshot
+                        invalidate_catalog_snapshot() # In-place edit: counts/high-water marks do not move
                         st.toast("Datos actualizados correctamente.")
                         st.rerun()
                     else:
@@ -68,8 +70,13 @@ def render_inline_product_admin(db: Session, p, current_user_id: int):
                             
                             if target_p and current_p:
                                 # Move Offers
-                                for o in current_p.offers:
+                                moved = list(current_p.offers)
+                                for o in moved:
                                     o.product_id = target_id
+                                db.flush()
+                                db.expire(current_p, ["offers"]) # Otherwise the delete-orphan cascade takes the moved offers along
+                                from src.infrastructure.repositories.product import ProductRepository
+                                ProductRepository(db).refresh_deals(moved)
                                 
                                 # Move Collection Items
                                 c_items = db.query(CollectionItemModel).filter(CollectionItemModel.product_id == current_p.id).all()
@@ -85,6 +92,8 @@ def render_inline_product_admin(db: Session, p, current_user_id: int):
                                 
                                 db.delete(current_p)
                                 db.commit()
+                                from src.core.catalog_snapshot import invalidate_catalog_snapshot
+                                invalidate_catalog_snapshot()
                                 st.success(f"Fusionado con éxito en {target_p.name}.")
                                 st.rerun()
                         except Exception as e:
@@ -223,7 +232,11 @@ def render_inline_product_admin(db: Session, p, current_user_id: int):
                             target_o.min_price = new_hist
                             target_o.max_price = new_max
                             target_o.currency = "EUR" # Force currency as requested
+                            from src.infrastructure.repositories.product import ProductRepository
+                            ProductRepository(db).refresh_deals([target_o])
                             db.commit()
+                            from src.core.catalog_snapshot import invalidate_catalog_snapshot
+                            invalidate_catalog_snapshot() # Price edits move neither counts nor last_seen
                             st.toast("Precios actualizados.")
                             st.rerun()
                     except Exception as e:
@@ -251,8 +264,11 @@ def render_inline_product_admin(db: Session, p, current_user_id: int):
 
                                  pending = PendingMatchModel(**pending_data)
                                  db.add(pending)
-                             db.delete(target_o)
+                             from src.infrastructure.repositories.product import ProductRepository
+                             ProductRepository(db).delete_offer(target_o)
                              db.commit()
+                             from src.core.catalog_snapshot import invalidate_catalog_snapshot
+                             invalidate_catalog_snapshot()
                              
                              # LOG HISTORY: UNLINKED
                              try:
@@ -288,8 +304,11 @@ def render_inline_product_admin(db: Session, p, current_user_id: int):
                                     reason="admin_offer_ban"
                                 )
                                 db.add(bl)
-                            db.delete(target_o)
+                            from src.infrastructure.repositories.product import ProductRepository
+                            ProductRepository(db).delete_offer(target_o)
                             db.commit()
+                            from src.core.catalog_snapshot import invalidate_catalog_snapshot
+                            invalidate_catalog_snapshot()
                             st.toast("Baneado.")
                             st.rerun()
                     except Exception:
@@ -489,8 +508,7 @@ def _render_bastion_history(db: Session):
 
 def _render_purgatory_content(db):
     from src.domain.models import ProductModel, OfferModel, PendingMatchModel, BlackcludedItemModel
-    from src.core.matching import SmartMatcher
-    matcher = SmartMatcher()
+    from src.core.purgatory_suggester import PurgatorySuggester, load_suggestions, refresh_in_background
     
     # --- PHASE 20: Reactivity Fix ---
     import streamlit as st
@@ -504,8 +522,14 @@ def _render_purgatory_content(db):
             st.session_state.purgatory_selection.discard(p_id)
     # --------------------------------
     
-    # 1. Cargar catálogo para sugerencias (Cacheado por ejecución de renderizado)
-    all_products = db.query(ProductModel).options(joinedload(ProductModel.offers)).all()
+    # 1. Catálogo ligero (id -> nombre) para el selector; las sugerencias vienen precalculadas
+    product_names = dict(db.query(ProductModel.id, ProductModel.name).order_by(ProductModel.id).all())
+
+    # Sugerencias obsoletas (almas nuevas o catálogo cambiado): el worker las recalcula en segundo plano
+    stale = PurgatorySuggester().stale_count(db)
+    if stale:
+        refresh_in_background()
+        st.caption(f"⏳ El Oráculo está calculando sugerencias para {stale} almas. Recarga en unos segundos.")
     
     # --- Controles Superiores ---
     st.subheader("🕵️ Buscador del Espejo")
@@ -552,6 +576,7 @@ def _render_purgatory_content(db):
 
     offset = st.session_state.purgatory_page * PAGE_SIZE
     pending_items = db.query(PendingMatchModel).offset(offset).limit(PAGE_SIZE).all()
+    suggestions = load_suggestions(db, pending_items)
 
     # --- Barra de Acciones en Bloque ---
     # (Selection set already initialized at the top)
@@ -579,16 +604,11 @@ def _render_purgatory_content(db):
             from src.infrastructure.repositories.product import ProductRepository
             repo = ProductRepository(db)
             for item in pending_items:
-                # Re-match rápido
-                m_best = None
-                m_score = 0.0
-                for p in all_products:
-                    _, sc, _ = matcher.match(p.name, item.scraped_name, item.url)
-                    if sc > m_score:
-                        m_score = sc
-                        m_best = p
+                # Mejor sugerencia precalculada
+                top = suggestions.get(item.id)
+                m_best = db.get(ProductModel, top[0][0]) if top and top[0][1] >= 0.9 else None
                 
-                if m_best and m_score >= 0.9:
+                if m_best:
                     repo.add_offer(m_best, {
                         "shop_name": item.shop_name,
                         "price": item.price,
@@ -599,6 +619,8 @@ def _render_purgatory_content(db):
                     db.delete(item)
                     count += 1
             db.commit()
+            from src.core.catalog_snapshot import invalidate_catalog_snapshot
+            invalidate_catalog_snapshot()
             st.success(f"Vinculadas {count} ofertas de alta confianza.")
             st.rerun()
 
@@ -617,7 +639,8 @@ def _render_purgatory_content(db):
                 # 1. Fetch the actual Offer to trigger cascades (PriceHistory)
                 offer_to_remove = db.query(OfferModel).filter(OfferModel.url == last_action.offer_url).first()
                 if offer_to_remove:
-                    db.delete(offer_to_remove)
+                    from src.infrastructure.repositories.product import ProductRepository
+                    ProductRepository(db).delete_offer(offer_to_remove)
                 
                 # 2. Re-create PendingMatch (Atomic with the delete)
                 import json
@@ -639,10 +662,9 @@ def _render_purgatory_content(db):
                 # 3. Mark action as undone
                 last_action.action_type = "LINKED_MANUAL_UNDONE"
                 db.commit()
+                from src.core.catalog_snapshot import invalidate_catalog_snapshot
+                invalidate_catalog_snapshot()
                 st.toast("⏪ Acción revertida. El ítem ha vuelto al Purgatorio.")
-                # Clear suggestions cache to force re-calculation if needed
-                if "purgatory_suggestions" in st.session_state:
-                    st.session_state.purgatory_suggestions.clear()
                 st.rerun()
             except Exception as e:
                 st.error(f"Error al deshacer: {e}")
@@ -650,34 +672,12 @@ def _render_purgatory_content(db):
 
     st.divider()
 
-    # --- CACHE DE SUGERENCIAS (PHASE 19: Performance) ---
-    if "purgatory_suggestions" not in st.session_state:
-        st.session_state.purgatory_suggestions = {}
-
     # --- RENDER LOOP ---
-    def render_purgatory_item(item, all_products, matcher):
-        # 1. Sugerencia Inteligente: Usar caché de IDs para evitar fallos de instancia
-        best_match = None
-        best_score = 0.0
-        
-        if item.id in st.session_state.purgatory_suggestions:
-            sug_id, best_score = st.session_state.purgatory_suggestions[item.id]
-            # Recuperar el objeto de la lista actual (all_products)
-            if sug_id:
-                for p in all_products:
-                    if p.id == sug_id:
-                        best_match = p
-                        break
-        else:
-            # Recalcular
-            for p in all_products:
-                _, score, _ = matcher.match(p.name, item.scraped_name, item.url, db_ean=p.ean, scraped_ean=item.ean)
-                if score > best_score:
-                    best_score = score
-                    best_match = p
-            
-            # Guardar ID en caché
-            st.session_state.purgatory_suggestions[item.id] = (best_match.id if best_match else None, best_score)
+    def render_purgatory_item(item, top, product_names):
+        # 1. Sugerencia Inteligente: top-k precalculado por el PurgatorySuggester
+        top = [(pid, score) for pid, score in top if pid in product_names]
+        top_scores = dict(top)
+        best_match_id, best_score = top[0] if top else (None, 0.0)
 
         col_select, col_expander = st.columns([0.1, 9.9])
         
@@ -703,11 +703,11 @@ def _render_purgatory_content(db):
                     # Optimized Thumbnails: Using CSS to limit height and avoid layout shift
                     st.markdown(f'<img src="{item.image_url}" style="height:150px; border-radius:10px; margin-bottom:10px; object-fit: contain;">', unsafe_allow_html=True)
                 
-                if best_match:
+                if best_match_id:
                     confidence_color = "green" if best_score > 0.9 else ("orange" if best_score > 0.7 else "gray")
                     st.markdown(f"""
                         <div style="border: 1px solid {confidence_color}; border-left: 5px solid {confidence_color}; padding: 10px; border-radius: 5px; background-color: rgba(0,0,0,0.05); margin-bottom: 10px;">
-                            <span style="color: {confidence_color}; font-weight: bold;">🎯 Sugerencia del Oráculo:</span> {best_match.name} 
+                            <span style="color: {confidence_color}; font-weight: bold;">🎯 Sugerencia del Oráculo:</span> {product_names[best_match_id]} 
                             <br><small>Nivel de Confianza: {best_score:.2%}</small>
                         </div>
                     """, unsafe_allow_html=True)
@@ -717,28 +717,29 @@ def _render_purgatory_content(db):
                 
                 c1, c2, c3 = st.columns([2, 1, 1])
                 
-                # Robust selection logic
-                idx_suggestion = 0
-                if best_match:
-                    try:
-                        # Find the index by ID to avoid reference issues
-                        for i, p in enumerate(all_products):
-                            if p.id == best_match.id:
-                                idx_suggestion = i
-                                break
-                    except Exception: pass
-
-                target_p = c1.selectbox("Vincular a:", all_products, index=idx_suggestion, format_func=lambda x: f"{'✨ ' if best_match and x.id == best_match.id else ''}{x.name}", key=f"purg_sel_{item.id}", help="El Oráculo ha pre-seleccionado la opción más probable.")
+                # Sugerencias primero (mejor = preseleccionada), luego el resto del catálogo por ID
+                options = [pid for pid, _ in top] + [pid for pid in product_names if pid not in top_scores]
+                if not options:
+                    options = [None]
+
+                def _format_option(pid):
+                    if pid is None:
+                        return "(Catálogo vacío)"
+                    if pid in top_scores:
+                        return f"✨ {product_names[pid]} ({top_scores[pid]:.0%})"
+                    return product_names[pid]
+
+                target_id = c1.selectbox("Vincular a:", options, index=0, format_func=_format_option, key=f"purg_sel_{item.id}", help="El Oráculo ha pre-seleccionado la opción más probable.")
                 
                 if c2.button("✅ Vincular", key=f"purg_ok_{item.id}", type="primary"):
-                    if target_p:
+                    if target_id:
                         # RE-FETCH in a local session inside fragment? No, better use a tool or helper.
                         # For now, we'll use a direct DB action.
                         from src.infrastructure.database import SessionLocal
                         with SessionLocal() as local_db:
                             from src.infrastructure.repositories.product import ProductRepository
                             local_repo = ProductRepository(local_db)
-                            fresh_p = local_db.query(ProductModel).filter(ProductModel.id == target_p.id).first()
+                            fresh_p = local_db.query(ProductModel).filter(ProductModel.id == target_id).first()
                             fresh_item = local_db.query(PendingMatchModel).filter(PendingMatchModel.id == item.id).first()
                             
                             if fresh_p and fresh_item:
@@ -770,6 +771,8 @@ def _render_purgatory_content(db):
                                 
                                 local_db.delete(fresh_item)
                                 local_db.commit()
+                                from src.core.catalog_snapshot import invalidate_catalog_snapshot
+                                invalidate_catalog_snapshot()
                                 st.toast("Vinculado con éxito.")
                                 st.rerun()
                 
@@ -787,7 +790,7 @@ def _render_purgatory_content(db):
 
     # Render items
     for item in pending_items:
-        render_purgatory_item(item, all_products, matcher)
+        render_purgatory_item(item, suggestions.get(item.id, []), product_names)
 
 def _render_bunker_control(db):
     """
@@ -807,14 +810,17 @@ def _render_bunker_control(db):
         st.markdown("### 🏰 Bóvedas del Oráculo (Backups DB)")
         vault_path = Path("backups/database")
         if vault_path.exists():
-            vaults = sorted(list(vault_path.glob("*.json")), key=os.path.getmtime, reverse=True)
+            from src.core.backup_manager import BackupManager
+            vaults = BackupManager().list_vaults()
             if vaults:
-                for idx, v in enumerate(vaults[:5]): # Show last 5
-                    mtime = datetime.fromtimestamp(v.stat().st_mtime).strftime("%Y-%m-%d %H:%M")
-                    size = v.stat().st_size / 1024
+                for idx, vault in enumerate(vaults[:5]): # Show last 5
+                    v = vault["path"]
+                    mtime = datetime.fromisoformat(vault["timestamp"]).strftime("%Y-%m-%d %H:%M")
+                    size = vault["size"] / 1024
+                    kind = {"full": "completa", "incremental": f"incremental sobre {vault['base']}", "legacy": "JSON clásica"}.get(vault["kind"], vault["kind"])
                     
                     c1_v, c2_v = st.columns([3, 1])
-                    c1_v.write(f"**{v.name}**\n\n({mtime}) - {size:.1f} KB")
+                    c1_v.write(f"**{v.name}**\n\n({mtime}) - {size:.1f} KB - {kind}")
                     
                     if c2_v.button("♻️", key=f"restore_v_{idx}", help="Restaurar este sello"):
                         st.session_state[f"confirm_restore_{idx}"] = True
@@ -842,14 +848,21 @@ def _render_bunker_control(db):
     with col2:
         st.markdown("### 💾 Caja Negra (Snapshots Scrapers)")
         snap_path = Path("backups/raw_snapshots")
-        if snap_path.exists():
-            snaps = sorted(list(snap_path.glob("*.json")), key=os.path.getmtime, reverse=True)
-            if snaps:
-                for s in snaps[:5]:
-                    mtime = datetime.fromtimestamp(s.stat().st_mtime).strftime("%Y-%m-%d %H:%M")
-                    st.write(f"- {s.name} ({mtime})")
+        if (snap_path / "snapshots.db").exists():
+            from src.core.snapshot_store import SnapshotStore
+            store = SnapshotStore(str(snap_path / "snapshots.db"))
+            try:
+                runs = store.runs(limit=5)
+                stats = store.stats()
+            finally:
+                store.close()
+            if runs:
+                for r in runs:
+                    en_curso = "" if r['closed_at'] else " (en curso)"
+                    st.write(f"- #{r['id']} {r['shop_name']} ({r['created_at'][:16].replace('T', ' ')}) - {r['items']} ofertas, {r['new_objects']} nuevas{en_curso}")
                 
-                st.write(f"Total: {len(snaps)} snapshots guardados.")
+                st.write(f"Total: {stats['runs']} snapshots ({stats['objects']} registros únicos de {stats['items']}, {stats['bytes'] / 1024:.0f} KB).")
+                st.caption("Comparar dos snapshots: `python -m src.core.snapshot_store --diff OLD NEW`")
             else:
                 st.write("No hay snapshots crudos.")
         else:
@@ -859,7 +872,7 @@ def _render_bunker_control(db):
     if st.button("🛡️ Sellar Bóveda Ahora (Manual Backup)"):
         from src.core.backup_manager import BackupManager
         bm = BackupManager()
-        path = bm.create_database_backup(db)
+        path = bm.create_database_backup(db, incremental=False)
         if path:
             st.success(f"Bóveda sellada con éxito: {Path(path).name}")
             st.rerun()
@@ -870,7 +883,7 @@ def _render_bunker_control(db):
         Este panel es la **Llave Maestra** para revertir el estado del Oráculo si ocurre un desastre.
         
         **📍 ¿A dónde van los datos?**
-        La restauración es un "Efecto Espejo". El sistema toma el sello JSON y sobrescribe la base de datos que esté activa en ese momento (**Supabase** si estás en la nube, **SQLite** si estás en local). No necesitas configurar nada adicional; el Oráculo sabe dónde vive su poder.
+        La restauración es un "Efecto Espejo". El sistema toma el sello (NDJSON comprimido; una incremental se combina con su bóveda completa) y sobrescribe la base de datos que esté activa en ese momento (**Supabase** si estás en la nube, **SQLite** si estás en local). No necesitas configurar nada adicional; el Oráculo sabe dónde vive su poder.
 
         **⚙️ ¿Qué es automático y qué no?**
         - **Auto-Protección (Activa):** El sistema ya tiene un *Circuit Breaker* que frena actualizaciones locas y un *Query Shield* que evita errores de esquema. Si algo falla durante el día, el robot intentará auto-corregirse solo.
@@ -6,8 +6,12 @@ from src.web.views.admin import render_inline_product_admin
 from src.infrastructure.repositories.product import ProductRepository
 
 def render(db: Session, img_dir, user, repo: ProductRepository):
-    from src.domain.models import ProductModel, CollectionItemModel, OfferModel, PriceHistoryModel, PriceAlertModel
-    total_products = db.query(ProductModel).count()
+    from src.domain.models import ProductModel, PriceAlertModel
+    from src.core.catalog_snapshot import get_catalog_snapshot, load_price_history, NO_PRICE
+
+    # Shared columnar snapshot (rebuilt only when the catalog changes): totals, categories, shop links
+    snapshot = get_catalog_snapshot()
+    total_products = len(snapshot)
     # Header
     c1, c2 = st.columns([1, 8])
     with c1:
@@ -24,8 +28,7 @@ def render(db: Session, img_dir, user, repo: ProductRepository):
         with col_search:
             search = st.text_input("Buscador", placeholder="Nombre de la figura...", label_visibility="collapsed", key="catalog_search_input")
         with col_cat:
-            cats = [r[0] for r in db.query(ProductModel.category).distinct() if r[0]]
-            sel_cat = st.selectbox("Categoría", ["Todas"] + sorted(cats), label_visibility="collapsed")
+            sel_cat = st.selectbox("Categoría", ["Todas"] + snapshot.categories, label_visibility="collapsed")
         with col_page_jump:
             # Placeholder for page jump - total_pages needed
             page_jump_placeholder = st.empty()
@@ -37,97 +40,34 @@ def render(db: Session, img_dir, user, repo: ProductRepository):
             sort_opt = st.selectbox("Orden", ["Nombre (A-Z)", "Nombre (Z-A)", "Precio (Menor a Mayor)", "Precio (Mayor a Menor)"])
 
     
-    # --- Performance Cache: Master Data Load ---
-    @st.cache_data(ttl=300) # 5m cache
-    def get_master_catalog_df(_current_uid):
-        from src.infrastructure.database import SessionLocal
-        import pandas as pd
-        with SessionLocal() as session:
-            # Eager load offers and price history for total performance
-            from sqlalchemy.orm import joinedload
-            products_raw = session.query(ProductModel).options(
-                joinedload(ProductModel.offers).joinedload(OfferModel.price_history)
-            ).all()
-            owned_ids = {r[0] for r in session.query(CollectionItemModel.product_id).filter(CollectionItemModel.owner_id == _current_uid).all()}
-            
-            data = []
-            for p in products_raw:
-                prices = [o.price for o in p.offers if o.price > 0]
-                min_prices = [o.min_price for o in p.offers if o.min_price > 0]
-                
-                # Serialize offers for the UI with Deduplication (Active Offer logic)
-                # We want the newest offer per shop_name for the actionable links
-                serialized_offers = []
-                serialized_history = []
-                
-                # Deduplication logic: Sort by ID desc (proxy for newest) and pick first per shop
-                deduped_offers = {}
-                sorted_offers = sorted(p.offers, key=lambda x: x.id, reverse=True)
-                
-                for o in sorted_offers:
-                    # Normalize shop name for deduplication (Kaizen: Identity Union)
-                    from src.web.shared import normalize_shop_name
-                    norm_shop = normalize_shop_name(o.shop_name, mode="visual")
-                    
-                    if norm_shop not in deduped_offers:
-                        deduped_offers[norm_shop] = {
-                            "id": o.id,
-                            "shop_name": norm_shop,
-                            "price": o.price,
-                            "url": o.url
-                        }
-                    
-                    # Fill history with EVERYTHING (Deduplication MUST NOT affect analytics)
-                    for ph in o.price_history:
-                        serialized_history.append({
-                            "Fecha": ph.recorded_at,
-                            "Precio": ph.price,
-                            "Tienda": normalize_shop_name(o.shop_name, mode="visual")
-                        })
-                
-                serialized_offers = list(deduped_offers.values())
-                
-                data.append({
-                    "id": p.id,
-                    "name": p.name,
-                    "category": p.category or "MOTU",
-                    "image_url": p.image_url,
-                    "is_owned": p.id in owned_ids,
-                    "best_price": min(prices) if prices else 999999.0,
-                    "historic_low": min(min_prices) if min_prices else 999999.0,
-                    "offers": serialized_offers,
-                    "history": serialized_history
-                })
-            return pd.DataFrame(data)
+    # 1. Query Layer: search, filters, sorting and pagination run in the database
+    from src.infrastructure.repositories.catalog import CatalogRepository
+    catalog_repo = CatalogRepository(db)
+    query_args = {
+        "owner_id": current_user_id,
+        "search": search or None,
+        "category": None if sel_cat == "Todas" else sel_cat,
+        "ownership": {"Adquiridos": "owned", "Faltantes": "missing"}.get(filter_opt),
+    }
+    sort_key = {
+        "Nombre (A-Z)": "name_asc",
+        "Nombre (Z-A)": "name_desc",
+        "Precio (Menor a Mayor)": "price_asc",
+        "Precio (Mayor a Menor)": "price_desc",
+    }[sort_opt]
 
-    # 1. Load Data
-    df = get_master_catalog_df(current_user_id)
-    
-    # 2. Apply Filters (Instant in memory)
-    filtered_df = df.copy()
-    if search:
-        filtered_df = filtered_df[filtered_df['name'].str.contains(search, case=False, na=False)]
-    if sel_cat != "Todas":
-        filtered_df = filtered_df[filtered_df['category'] == sel_cat]
-        
-    if filter_opt == "Adquiridos":
-        filtered_df = filtered_df[filtered_df['is_owned'] == True]
-    elif filter_opt == "Faltantes":
-        filtered_df = filtered_df[filtered_df['is_owned'] == False]
-        
-    # 3. Sort (Instant in memory)
-    if sort_opt == "Nombre (A-Z)":
-        filtered_df = filtered_df.sort_values("name")
-    elif sort_opt == "Nombre (Z-A)":
-        filtered_df = filtered_df.sort_values("name", ascending=False)
-    elif "Precio" in sort_opt:
-        filtered_df = filtered_df.sort_values("best_price", ascending="Menor" in sort_opt)
-
-    # --- Pagination ---
+    # --- Pagination (keyset: page -> cursor of the row before it) ---
     PAGE_SIZE = 50
-    total_items = len(filtered_df)
+    total_items = catalog_repo.count(**query_args)
     total_pages = max(1, math.ceil(total_items / PAGE_SIZE))
     
+    query_sig = (tuple(query_args.values()), sort_key)
+    if st.session_state.get("catalog_query_sig") != query_sig:
+        # New filters/order: known cursors no longer apply
+        st.session_state.catalog_query_sig = query_sig
+        st.session_state.catalog_cursors = {0: None}
+        st.session_state.catalog_page = 0
+    
     if "catalog_page" not in st.session_state:
         st.session_state.catalog_page = 0
     
@@ -142,8 +82,24 @@ def render(db: Session, img_dir, user, repo: ProductRepository):
             st.session_state.catalog_page = jump_page - 1
             st.rerun()
 
-    start_idx = st.session_state.catalog_page * PAGE_SIZE
-    visible_df = filtered_df.iloc[start_idx : start_idx + PAGE_SIZE]
+    page_idx = st.session_state.catalog_page
+    cursors = st.session_state.catalog_cursors
+    if page_idx in cursors:
+        visible_rows, next_cursor = catalog_repo.page(**query_args, sort=sort_key, limit=PAGE_SIZE, after=cursors[page_idx])
+    else:
+        # Direct jump to a page never visited: one OFFSET query, keyset from there on
+        visible_rows, next_cursor = catalog_repo.page(**query_args, sort=sort_key, limit=PAGE_SIZE, offset=page_idx * PAGE_SIZE)
+    if next_cursor is not None:
+        cursors[page_idx + 1] = next_cursor
+
+    # Price history only for the visible page (one query, cached per catalog version)
+    @st.cache_data(ttl=300, max_entries=64)
+    def get_page_history(product_ids, version):
+        from src.infrastructure.database import SessionLocal
+        with SessionLocal() as session:
+            return load_price_history(session, product_ids)
+
+    page_history = get_page_history(tuple(r.id for r in visible_rows), snapshot.version)
     
     st.divider()
     st.caption(f"Encontradas {total_items} figuras. Página {st.session_state.catalog_page+1} de {total_pages}")
@@ -153,21 +109,21 @@ def render(db: Session, img_dir, user, repo: ProductRepository):
         st.session_state.optimistic_updates = {}
     
     # --- Render List ---
-    for _, row in visible_df.iterrows():
-        p_id = row['id']
-        p_name = row['name']
-        p_cat = row['category']
-        p_img = row['image_url']
-        p_best = row['best_price']
-        p_hist = row['historic_low']
-        p_is_owned = row['is_owned']
-        p_offers = row['offers']
-        p_history = row['history']
+    for row in visible_rows:
+        p_id = row.id
+        p_name = row.name
+        p_cat = row.category
+        p_img = row.image_url
+        p_best = row.best_price
+        p_hist = row.historic_low
+        p_is_owned = row.is_owned
+        p_offers = snapshot.offers_for(p_id)
+        p_history = page_history.get(p_id)
         
         is_owned = st.session_state.optimistic_updates.get(p_id, p_is_owned)
         btn_label = "✅ En Colección" if is_owned else "➕ Añadir"
-        current_best = f"{p_best:.2f}€" if p_best < 900000 else "---"
-        historic_low = f"{p_hist:.2f}€" if p_hist < 900000 else "---"
+        current_best = f"{p_best:.2f}€" if p_best < NO_PRICE else "---"
+        historic_low = f"{p_hist:.2f}€" if p_hist < NO_PRICE else "---"
 
         with st.container():
             c_img, c_info, c_price_curr, c_price_hist, c_action = st.columns([1, 3, 1.5, 1.5, 1.5])
@@ -197,11 +153,9 @@ def render(db: Session, img_dir, user, repo: ProductRepository):
                           # Chart Logic
                           st.divider()
                           st.subheader("Evolución Temporal")
-                          if p_history:
+                          if p_history is not None and not p_history.empty:
                                try:
-                                   import pandas as pd
-                                   df_hist = pd.DataFrame(p_history).sort_values("Fecha")
-                                   st.line_chart(df_hist, x="Fecha", y="Precio", color="Tienda")
+                                   st.line_chart(p_history, x="Fecha", y="Precio", color="Tienda")
                                except Exception:
                                    pass
                           else:
@@ -217,13 +171,12 @@ def render(db: Session, img_dir, user, repo: ProductRepository):
                 if st.button(btn_label, key=f"btn_{p_id}", width="stretch"):
                     st.session_state.optimistic_updates[p_id] = not is_owned
                     if toggle_ownership(db, p_id, current_user_id):
-                        st.cache_data.clear() # Cache invalidation on change
-                        st.rerun()
+                        st.rerun() # Ownership is an overlay: the snapshot stays valid
                 
                 # Botón de Alerta Centinela (Añadido Fase 15)
                 with st.popover("🔔 Alerta", use_container_width=True):
                     st.write(f"Vigilar {p_name}")
-                    t_price = st.number_input("Avisar si baja de (€)", min_value=1.0, value=max(1.0, p_best * 0.9 if p_best < 900000 else 20.0), key=f"alrt_in_{p_id}")
+                    t_price = st.number_input("Avisar si baja de (€)", min_value=1.0, value=max(1.0, p_best * 0.9 if p_best < NO_PRICE else 20.0), key=f"alrt_in_{p_id}")
                     if st.button("Activar Centinela", key=f"alrt_btn_{p_id}", type="primary"):
                         # Lógica rápida de inserción
                         exists = db.query(PriceAlertModel).filter(PriceAlertModel.user_id == user.id, PriceAlertModel.product_id == p_id).first()
@@ -1,8 +1,7 @@
 import streamlit as st
 import pandas as pd
 from sqlalchemy.orm import Session
-from src.domain.models import ProductModel, CollectionItemModel, OfferModel, ScraperStatusModel, ScraperExecutionLogModel
-from datetime import datetime, timedelta
+from src.domain.models import CollectionItemModel, ScraperStatusModel, ScraperExecutionLogModel
 
 def render(db: Session, img_dir, user):
     # Header
@@ -14,29 +13,6 @@ def render(db: Session, img_dir, user):
     
     # Optimized Data Fetching
     # Metrics are fast (COUNT queries), so we don't cache them to ensure immediate updates after adding items.
-    @st.cache_data(ttl=60)
-    def get_main_metrics(_user_id):
-        # Note: _user_id is underscored to prevent hashing issues but int is safe.
-        # We re-instantiate session to be thread-safe inside the cache
-        from src.infrastructure.database import SessionLocal
-        with SessionLocal() as session:
-            total = session.query(ProductModel).count()
-            owned = (
-                session.query(ProductModel)
-                .join(CollectionItemModel)
-                .filter(CollectionItemModel.owner_id == _user_id)
-                .count()
-            )
-            return total, owned
-
-    @st.cache_data(ttl=300)
-    def get_offers_overview():
-        from src.infrastructure.database import engine
-        try:
-            return pd.read_sql("SELECT shop_name, price, last_seen FROM offers", engine)
-        except Exception:
-            return pd.DataFrame()
-
     @st.cache_data(ttl=10) # Lower TTL to see immediate changes
     def get_history_log():
         from src.infrastructure.database import SessionLocal
@@ -73,8 +49,12 @@ def render(db: Session, img_dir, user):
 
     current_user_id = user.id
     
-    # 1. Metrics
-    total_products, owned_products = get_main_metrics(current_user_id)
+    # 1. Metrics (shared catalog snapshot + this user's ownership overlay)
+    from src.core.catalog_snapshot import get_catalog_snapshot
+    snapshot = get_catalog_snapshot()
+    owned_ids = [r[0] for r in db.query(CollectionItemModel.product_id).filter(CollectionItemModel.owner_id == current_user_id).all()]
+    total_products = len(snapshot)
+    owned_products = int(snapshot.ownership_mask(owned_ids).sum())
     
     c1, c2, c3 = st.columns(3)
     
@@ -106,17 +86,13 @@ def render(db: Session, img_dir, user):
     # 2. Robot Stats
     st.markdown("### 🤖 Estado de los Robots")
     
-    offers_df = get_offers_overview()
-    if not offers_df.empty:
-        # Normalización Visual Definitiva (KAIZEN) using shared helper
-        from src.web.shared import normalize_shop_name
-        offers_df['shop_name'] = offers_df['shop_name'].map(lambda x: normalize_shop_name(x, mode="visual"))
-        
+    # Offers per shop, already normalized (Visual KAIZEN) in the snapshot
+    counts = snapshot.shop_counts[snapshot.shop_counts > 0]
+    if not counts.empty:
         c_stats1, c_stats2 = st.columns([2, 1])
         
         with c_stats1:
             st.caption("Ofertas detectadas por tienda")
-            counts = offers_df['shop_name'].value_counts()
             st.bar_chart(counts, color="#00ff88")
             
         with c_stats2:
@@ -1,8 +1,11 @@
 import streamlit as st
 from sqlalchemy.orm import Session
 from src.infrastructure.repositories.product import ProductRepository
+from src.core.catalog_snapshot import invalidate_catalog_snapshot
 from src.web.shared import toggle_ownership
 
+DEALS_PER_PAGE = 30
+
 def render(db: Session, img_dir, user, repo: ProductRepository):
     from src.domain.models import OfferModel, PendingMatchModel, BlackcludedItemModel
     # Header
@@ -18,14 +21,23 @@ def render(db: Session, img_dir, user, repo: ProductRepository):
     # Default to 120 as requested
     max_p_filter = st.slider("Precio Máximo Original (Filtrar ofertas caras)", 0, 500, 120, step=10, help="Solo muestra ofertas cuyo precio original era inferior a este valor.")
     
-    # Efficient SQL Filter
-    deals = repo.get_active_deals(min_discount=0.20, max_original_price=max_p_filter)
+    # Efficient SQL Filter (materialized deals table, one page at a time)
+    total_deals = repo.count_active_deals(min_discount=0.20, max_original_price=max_p_filter)
     
-    if not deals:
+    if not total_deals:
         st.info("El Cazador no ha encontrado presas hoy. Vuelve más tarde o ajusta el filtro.")
         return
 
-    st.success(f"¡Se han avistado {len(deals)} oportunidades!")
+    st.success(f"¡Se han avistado {total_deals} oportunidades!")
+
+    total_pages = (total_deals - 1) // DEALS_PER_PAGE + 1
+    page = 1
+    if total_pages > 1:
+        page = st.number_input(f"Página (de {total_pages})", min_value=1, max_value=total_pages, value=1, step=1, key="hunter_page")
+    deals = repo.get_active_deals(
+        min_discount=0.20, max_original_price=max_p_filter,
+        limit=DEALS_PER_PAGE, offset=(page - 1) * DEALS_PER_PAGE
+    )
     
     # Info on Linking
     with st.expander("ℹ️ ¿Por qué veo ofertas incorrectas?", expanded=False):
@@ -102,8 +114,9 @@ def render(db: Session, img_dir, user, repo: ProductRepository):
                                          image_url=product.image_url
                                  )
                                  db.add(pending)
-                                 db.delete(target_o)
+                                 ProductRepository(db).delete_offer(target_o)
                                  db.commit()
+                                 invalidate_catalog_snapshot()
                                  st.toast("Oferta enviada al Purgatorio.")
                                  st.rerun()
                          except Exception as e:
@@ -125,8 +138,9 @@ def render(db: Session, img_dir, user, repo: ProductRepository):
                                      db.add(bl)
                                  
                                  # Always delete the offer
-                                 db.delete(target_o)
+                                 ProductRepository(db).delete_offer(target_o)
                                  db.commit()
+                                 invalidate_catalog_snapshot()
                                  st.toast("Oferta bloqueada y eliminada.")
                                  st.rerun()
                          except Exception as e:
@@ -139,8 +153,9 @@ def render(db: Session, img_dir, user, repo: ProductRepository):
                                      # Retry delete only
                                      target_o = db.query(OfferModel).filter(OfferModel.id == offer.id).first()
                                      if target_o:
-                                         db.delete(target_o)
+                                         ProductRepository(db).delete_offer(target_o)
                                          db.commit()
+                                         invalidate_catalog_snapshot()
                                          st.toast("Oferta eliminada (Ya estaba en Blacklist).")
                                          st.rerun()
                                  except Exception as e2:
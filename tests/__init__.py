@@ -0,0 +1,5 @@
+import os
+
+# Modules that bind the app engine at import (jobs, repositories) must never
+# reach the database configured in .env: the environment wins over .env
+os.environ.setdefault("DATABASE_URL", "sqlite://")
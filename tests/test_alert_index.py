@@ -0,0 +1,60 @@
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.core.alert_index import AlertIndex
+from src.domain.models import Base, PriceAlertModel
+
+
+class TestAlertIndex(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine, tables=[PriceAlertModel.__table__])
+        self.db = sessionmaker(bind=engine)()
+        recent = datetime.utcnow() - timedelta(hours=1)
+        old = datetime.utcnow() - timedelta(days=2)
+        self.db.add_all([
+            PriceAlertModel(id=1, product_id=10, user_id=1, target_price=20.0),
+            PriceAlertModel(id=2, product_id=10, user_id=2, target_price=15.0),
+            PriceAlertModel(id=3, product_id=10, user_id=3, target_price=30.0, last_notified_at=recent),
+            PriceAlertModel(id=4, product_id=10, user_id=4, target_price=25.0, last_notified_at=old),
+            PriceAlertModel(id=5, product_id=10, user_id=5, target_price=99.0, is_active=False),
+            PriceAlertModel(id=6, product_id=11, user_id=1, target_price=50.0),
+        ])
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_triggers_targets_at_or_above_price_outside_cooldown(self):
+        index = AlertIndex.load(self.db, [10])
+        fired = index.triggered(10, 20.0)
+        # 15 is below the price, 30 is in cooldown, 99 is inactive
+        self.assertEqual(sorted(e.alert_id for e in fired), [1, 4])
+
+    def test_same_batch_does_not_retrigger(self):
+        index = AlertIndex.load(self.db, [10])
+        self.assertTrue(index.triggered(10, 10.0))
+        self.assertEqual(index.triggered(10, 9.0), [])
+
+    def test_flush_stamps_notified_alerts_once(self):
+        index = AlertIndex.load(self.db, [10])
+        index.triggered(10, 20.0)
+        self.assertEqual(index.flush(self.db), 2)
+        self.assertEqual(index.flush(self.db), 0)
+        self.db.commit()
+        reloaded = AlertIndex.load(self.db, [10])
+        self.assertEqual(reloaded.triggered(10, 1.0)[0].alert_id, 2)
+        self.assertEqual(len(reloaded.triggered(10, 1.0)), 0)
+
+    def test_load_filters_products(self):
+        self.assertEqual(len(AlertIndex.load(self.db, [11])), 1)
+        self.assertEqual(len(AlertIndex.load(self.db, [])), 0)
+        self.assertEqual(len(AlertIndex.load(self.db)), 5)
+        self.assertEqual(AlertIndex.load(self.db, [11]).triggered(10, 1.0), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from types import SimpleNamespace
+
+from src.core.batch_matcher import BatchMatcher
+from src.core.matching import SmartMatcher
+
+
+def _product(pid, name, ean=None):
+    return SimpleNamespace(id=pid, name=name, ean=ean)
+
+
+def _item(name, url="", ean=None):
+    return SimpleNamespace(scraped_name=name, url=url, ean=ean)
+
+
+class TestBatchMatcherParity(unittest.TestCase):
+    def setUp(self):
+        self.matcher = SmartMatcher()
+        self.products = [
+            _product(1, "He-Man Filmation", ean="8445484123456"),
+            _product(2, "Skeletor 200x", ean="12345678"),
+            _product(3, ""),
+            _product(4, "Battle Cat"),
+            _product(5, "Skeletor Filmation"),
+        ]
+        self.items = [
+            # Same name, different EAN-13: the code wins over the name
+            _item("He-Man Filmation Figura", "https://shop.es/he-man-filmation", ean="8445484999999"),
+            # Unrelated name, same short GTIN
+            _item("Lote sorpresa", "https://shop.es/lote", ean="1234-5678"),
+            # Filmation vs 200x: conflicting series (recall already rejects the pair)
+            _item("Skeletor Filmation", "https://shop.es/skeletor"),
+            # Nothing to tokenize
+            _item("", ""),
+            # Dirty EAN: semantic fallback
+            _item("Battle Cat Deluxe", "https://shop.es/battle-cat", ean="123"),
+        ]
+        self.engine = BatchMatcher(self.products, matcher=self.matcher, chunk_size=2)
+
+    def test_scores_equal_pairwise_match(self):
+        scores = self.engine.score_matrix(self.items)
+        self.assertEqual(scores.shape, (len(self.items), len(self.products)))
+        for i, it in enumerate(self.items):
+            for j, p in enumerate(self.products):
+                _, expected, reason = self.matcher.match(p.name, it.scraped_name, it.url, p.ean, it.ean)
+                with self.subTest(item=it.scraped_name, product=p.name, reason=reason):
+                    self.assertAlmostEqual(scores[i, j], expected)
+
+    def test_ean13_mismatch_vetoes_name_match(self):
+        scores = self.engine.score_matrix(self.items[:1])
+        self.assertEqual(scores[0, 0], 0.0)
+
+    def test_short_gtin_match(self):
+        scores = self.engine.score_matrix(self.items[1:2])
+        self.assertEqual(scores[0, 1], 1.0)
+
+    def test_series_conflict_and_empty_names_score_zero(self):
+        scores = self.engine.score_matrix(self.items[2:4])
+        self.assertEqual(scores[0, 1], 0.0)
+        self.assertGreater(scores[0, 4], 0.0)
+        self.assertFalse(scores[1].any())
+        self.assertFalse(scores[:, 2].any())
+
+    def test_top_k_across_chunks(self):
+        top = self.engine.top_k(self.items, k=1)
+        self.assertEqual(top[1], [(2, 1.0)])
+        self.assertEqual(top[2][0][0], 5)
+        self.assertEqual(top[3], [])
+        self.assertEqual(top[4][0][0], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
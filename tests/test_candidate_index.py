@@ -0,0 +1,64 @@
+import unittest
+from types import SimpleNamespace
+
+from src.core.matching import SmartMatcher, CandidateIndex
+
+
+def product(pid, name, ean=None):
+    return SimpleNamespace(id=pid, name=name, ean=ean)
+
+
+CATALOG = [
+    product(1, "He-Man Masters of the Universe Origins"),
+    product(2, "Skeletor Masters of the Universe Origins"),
+    product(3, "He-Man Masterverse Revelation"),
+    product(4, "Battle Cat Origins Deluxe", ean="0194735012345"),
+    product(5, "Sun-Man Rulers of the Sun"),
+    product(6, "Teela Origins", ean="12345678"),
+    product(7, ""),
+]
+
+OFFERS = [
+    ("Masters of the Universe Origins He-Man Figura 14 cm", "https://shop.es/he-man-origins.html", None),
+    ("Skeletor Origins", "https://shop.es/skeletor", None),
+    ("He-Man Masterverse Revelation Mattel", "https://shop.es/p/123", None),
+    ("Gato de batalla", "https://shop.es/battle", "0194735012345"),
+    ("Sun Man Rulers of the Sun Origins", "https://shop.es/sun-man", None),
+    ("Figura sin nombre", "https://shop.es/x", "1234-5678"),
+    ("", "", None),
+]
+
+
+class TestCandidateIndex(unittest.TestCase):
+    def setUp(self):
+        self.matcher = SmartMatcher()
+        self.index = CandidateIndex(self.matcher, CATALOG)
+
+    def test_never_prunes_a_matching_product(self):
+        """Every product that SmartMatcher.match accepts must be a candidate."""
+        for title, url, ean in OFFERS:
+            with self.subTest(title=title):
+                candidates = {p.id for p in self.index.candidates(title, url, ean)}
+                for p in CATALOG:
+                    is_match, _, _ = self.matcher.match(p.name, title, url, db_ean=p.ean, scraped_ean=ean)
+                    if is_match:
+                        self.assertIn(p.id, candidates)
+
+    def test_candidates_keep_catalog_order(self):
+        ids = [p.id for p in self.index.candidates("He-Man Skeletor Origins", "https://shop.es/x")]
+        self.assertEqual(ids, sorted(ids))
+
+    def test_ean_lookup_ignores_formatting(self):
+        ids = [p.id for p in self.index.candidates("Nada", "https://shop.es/x", "1234 5678")]
+        self.assertEqual(ids, [6])
+
+    def test_short_ean_is_not_indexed(self):
+        self.assertIsNone(CandidateIndex._clean_ean("1234567"))
+        self.assertEqual(self.index.candidates("zzz", "", "1234567"), [])
+
+    def test_unrelated_offer_has_no_candidates(self):
+        self.assertEqual(self.index.candidates("Funko Pop Spiderman", "https://shop.es/spiderman"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.domain.models import Base, DealModel, OfferModel, PriceHistoryModel, ProductModel
+from src.infrastructure.repositories.product import ProductRepository
+
+
+class TestDealMaintenance(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine, tables=[
+            ProductModel.__table__, OfferModel.__table__,
+            PriceHistoryModel.__table__, DealModel.__table__,
+        ])
+        self.db = sessionmaker(bind=engine)()
+        self.repo = ProductRepository(self.db)
+        self.product = ProductModel(name="He-Man Origins")
+        self.db.add(self.product)
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def _offer(self, url, price, max_price, age_hours):
+        offer = OfferModel(
+            product_id=self.product.id, shop_name="ActionToys", url=url,
+            price=price, min_price=price, max_price=max_price,
+            last_seen=datetime.utcnow() - timedelta(hours=age_hours),
+        )
+        self.db.add(offer)
+        self.db.flush()
+        return offer
+
+    def _deal(self):
+        return self.db.query(DealModel).filter(DealModel.product_id == self.product.id).one_or_none()
+
+    def test_add_offer_with_commit_materializes_deal(self):
+        self._offer("https://shop/a", 20.0, 20.0, age_hours=1)
+        self.db.commit()
+        offer, _ = self.repo.add_offer(self.product, {
+            "shop_name": "ActionToys", "url": "https://shop/a", "price": 10.0, "is_available": True,
+        })
+        deal = self._deal()
+        self.assertIsNotNone(deal)
+        self.assertEqual(deal.offer_id, offer.id)
+
+    def test_delete_offer_hands_deal_to_next_qualifying_offer(self):
+        older = self._offer("https://shop/old", 12.0, 20.0, age_hours=5)
+        newer = self._offer("https://shop/new", 10.0, 20.0, age_hours=1)
+        self.repo.refresh_deals([older, newer])
+        self.db.commit()
+        self.assertEqual(self._deal().offer_id, newer.id)
+
+        older_id = older.id
+        self.repo.delete_offer(newer)
+        self.db.commit()
+        deal = self._deal()
+        self.assertEqual(deal.offer_id, older_id)
+        self.assertEqual(deal.price, 12.0)
+
+    def test_delete_last_offer_drops_deal(self):
+        offer = self._offer("https://shop/only", 10.0, 20.0, age_hours=1)
+        self.repo.refresh_deals([offer])
+        self.db.commit()
+        self.repo.delete_offer(offer)
+        self.db.commit()
+        self.assertIsNone(self._deal())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+
+from src.core.delay_controller import AdaptiveDelayController
+
+
+class TestAdaptiveDelayController(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "delay_state.json")
+        self.ctl = AdaptiveDelayController(
+            self.path, initial_delay=4.0, min_delay=1.0, max_delay=10.0, decrease_step=0.5, backoff=2.0
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_domain_ignores_www_and_case(self):
+        self.assertEqual(AdaptiveDelayController.domain_of("https://WWW.Shop.es/a"), "shop.es")
+
+    def test_healthy_responses_decrease_additively_down_to_min(self):
+        url = "https://shop.es/p"
+        self.ctl.record(url, 200, 1.0)
+        self.assertAlmostEqual(self.ctl.current(url), 3.5)
+        for _ in range(20):
+            self.ctl.record(url, 200, 1.0)
+        self.assertAlmostEqual(self.ctl.current(url), 1.0)
+
+    def test_unhealthy_responses_back_off_multiplicatively_up_to_max(self):
+        url = "https://shop.es/p"
+        self.ctl.record(url, 429)
+        self.assertAlmostEqual(self.ctl.current(url), 8.0)
+        self.ctl.record(url, 200, elapsed=30.0) # Slow counts as unhealthy
+        self.assertAlmostEqual(self.ctl.current(url), 10.0)
+        self.ctl.record(url, 200, blocked=True)
+        self.assertAlmostEqual(self.ctl.current(url), 10.0)
+
+    def test_domains_are_independent(self):
+        self.ctl.record("https://a.es/x", 403)
+        self.assertAlmostEqual(self.ctl.current("https://b.es/x"), 4.0)
+
+    def test_delay_jitter_and_scale(self):
+        url = "https://shop.es/p"
+        for _ in range(50):
+            self.assertTrue(3.2 <= self.ctl.delay_for(url) <= 4.8)
+        self.ctl.record(url, 200, 1.0)
+        self.assertAlmostEqual(self.ctl.scale(url), 3.5 / 4.0)
+        self.ctl.record(url, 500)
+        self.assertEqual(self.ctl.scale(url), 1.0)
+
+    def test_state_round_trip_is_clamped(self):
+        self.ctl.record("https://a.es/x", 200, 1.0)
+        self.ctl.save()
+        reloaded = AdaptiveDelayController(self.path, initial_delay=4.0, min_delay=1.0, max_delay=3.0)
+        self.assertAlmostEqual(reloaded.current("https://a.es/y"), 3.0)
+
+    def test_corrupt_state_falls_back_to_defaults(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("{not json")
+        ctl = AdaptiveDelayController(self.path, initial_delay=4.0)
+        self.assertEqual(ctl.snapshot(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
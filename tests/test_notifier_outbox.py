@@ -0,0 +1,65 @@
+import hashlib
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.core.notifier import NotifierService
+from src.core.throttle_store import ThrottleStore
+from src.domain.models import Base, NotificationOutboxModel
+
+
+class TestOutboxThrottle(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ThrottleStore(os.path.join(self.tmp.name, "throttle.db"))
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine, tables=[NotificationOutboxModel.__table__])
+        self.Session = sessionmaker(bind=engine)
+        self.notifier = NotifierService(throttle_store=self.store)
+        self.notifier.api_url, self.notifier.chat_id = "https://telegram.invalid", "1"
+        self.product = SimpleNamespace(name="He-Man")
+        self.offer = SimpleNamespace(price=10.0, max_price=20.0, shop_name="Shop", url="https://shop.es/he-man")
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def queued(self):
+        db = self.Session()
+        try:
+            return db.query(NotificationOutboxModel).count()
+        finally:
+            db.close()
+
+    def test_commit_keeps_the_claim(self):
+        db = self.Session()
+        self.notifier.enqueue_deal_alert(db, self.product, self.offer, 0.5)
+        self.notifier.enqueue_deal_alert(db, self.product, self.offer, 0.5) # Same window: throttled
+        db.commit()
+        db.close()
+        self.assertEqual(self.queued(), 1)
+        self.assertTrue(self.store.hit("deal_He-Man", 60))
+
+    def test_rollback_releases_the_claim(self):
+        db = self.Session()
+        self.notifier.enqueue_deal_alert(db, self.product, self.offer, 0.5)
+        db.rollback()
+        self.notifier.enqueue_deal_alert(db, self.product, self.offer, 0.5)
+        db.commit()
+        db.close()
+        self.assertEqual(self.queued(), 1)
+
+    def test_close_without_commit_releases_the_claim(self):
+        db = self.Session()
+        self.notifier.enqueue_message(db, "⚠️ Empty scan")
+        db.close()
+        self.assertEqual(self.queued(), 0)
+        self.assertFalse(self.store.hit(f"msg_{hashlib.md5('⚠️ Empty scan'.encode()).hexdigest()}", 60))
+
+
+if __name__ == '__main__':
+    unittest.main()
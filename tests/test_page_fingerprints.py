@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from src.core.page_fingerprints import PageFingerprintStore
+
+
+def offer(url, price, available=True):
+    return SimpleNamespace(url=url, price=price, is_available=available)
+
+
+class TestPageFingerprints(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "fp.db")
+        self.store = PageFingerprintStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_fingerprint_ignores_order(self):
+        a = [offer("u1", 10), offer("u2", 20)]
+        self.assertEqual(PageFingerprintStore.fingerprint(a), PageFingerprintStore.fingerprint(a[::-1]))
+
+    def test_fingerprint_tracks_price_and_availability(self):
+        base = PageFingerprintStore.fingerprint([offer("u1", 10)])
+        self.assertNotEqual(base, PageFingerprintStore.fingerprint([offer("u1", 10.5)]))
+        self.assertNotEqual(base, PageFingerprintStore.fingerprint([offer("u1", 10, available=False)]))
+        # Sub-cent noise is not a change
+        self.assertEqual(base, PageFingerprintStore.fingerprint([offer("u1", 10.001)]))
+
+    def test_unchanged_only_after_save(self):
+        fp = PageFingerprintStore.fingerprint([offer("u1", 10)])
+        self.assertFalse(self.store.is_unchanged("Shop", "1", fp))
+        self.store.save("Shop", "1", fp)
+        self.assertTrue(self.store.is_unchanged("Shop", "1", fp))
+        self.assertFalse(self.store.is_unchanged("Shop", "2", fp))
+        self.assertFalse(self.store.is_unchanged("Other", "1", fp))
+        self.assertEqual(self.store.stats, {"unchanged": 1, "changed": 3, "saved": 1})
+
+    def test_expired_fingerprint_forces_a_pass(self):
+        fp = PageFingerprintStore.fingerprint([offer("u1", 10)])
+        self.store.save("Shop", "1", fp)
+        self.store.max_age_seconds = -1
+        self.assertFalse(self.store.is_unchanged("Shop", "1", fp))
+
+    def test_persists_across_instances(self):
+        fp = PageFingerprintStore.fingerprint([offer("u1", 10)])
+        self.store.save("Shop", "1", fp)
+        reopened = PageFingerprintStore(self.path)
+        try:
+            self.assertTrue(reopened.is_unchanged("Shop", "1", fp))
+        finally:
+            reopened.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+import src.jobs.restore_vault as restore_vault
+from src.domain.models import Base, ProductModel, UserModel
+
+
+class _Interrupted(Exception):
+    pass
+
+
+class TestRestoreCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        cwd = os.getcwd()
+        os.chdir(self._tmp.name) # BackupManager() and the checkpoint use relative paths
+        self.addCleanup(os.chdir, cwd)
+
+        self.engine = create_engine(f"sqlite:///{Path(self._tmp.name) / 'restore.db'}")
+        Base.metadata.create_all(self.engine)
+        for name, value in (("engine", self.engine), ("SessionLocal", sessionmaker(bind=self.engine))):
+            patcher = mock.patch.object(restore_vault, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        with self.engine.begin() as conn:
+            conn.execute(ProductModel.__table__.insert(), [{"name": "Stale product"}])
+
+        self.vault = Path(self._tmp.name) / "eternia_vault_legacy.json"
+        self.vault.write_text(json.dumps({"data": {
+            "users": [{"id": 1, "username": "adam", "email": "adam@eternia", "hashed_password": "x", "role": "admin", "is_active": True}],
+            "products": [{"id": i, "name": f"Figure {i}", "created_at": "2026-01-01T00:00:00"} for i in range(1, 6)],
+        }}), encoding="utf-8")
+
+    def tearDown(self):
+        self.engine.dispose()
+        self._tmp.cleanup()
+
+    def _count(self, model):
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(model.__table__)).scalar()
+
+    def test_resume_after_interruption_skips_committed_rows(self):
+        save = restore_vault._save_checkpoint
+        calls = []
+
+        def crash_on_fifth(checkpoint):
+            # cleared, users batch, users done, products batch 1, then products batch 2
+            calls.append(checkpoint.get("table"))
+            if len(calls) == 5:
+                raise _Interrupted("killed before the checkpoint caught up")
+            save(checkpoint)
+
+        with mock.patch.object(restore_vault, "_save_checkpoint", crash_on_fifth):
+            restore_vault.restore_from_vault(str(self.vault), batch_size=2)
+
+        # Second products batch committed, checkpoint one batch behind
+        checkpoint = json.loads(restore_vault.CHECKPOINT_PATH.read_text(encoding="utf-8"))
+        self.assertEqual((checkpoint["table"], checkpoint["rows"]), ("products", 2))
+        self.assertEqual(self._count(ProductModel), 4)
+
+        restore_vault.restore_from_vault(str(self.vault), batch_size=2)
+
+        self.assertFalse(restore_vault.CHECKPOINT_PATH.exists())
+        self.assertEqual(self._count(UserModel), 1)
+        with self.engine.connect() as conn:
+            names = conn.execute(select(ProductModel.name).order_by(ProductModel.id)).scalars().all()
+        self.assertEqual(names, [f"Figure {i}" for i in range(1, 6)])
+
+    def test_restart_ignores_checkpoint_of_another_vault(self):
+        restore_vault._save_checkpoint({"vault": "/elsewhere.json", "cleared": True, "done": ["users", "products"], "table": None, "rows": 0})
+        restore_vault.restore_from_vault(str(self.vault), batch_size=2)
+        self.assertEqual(self._count(ProductModel), 5)
+        self.assertEqual(self._count(UserModel), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from src.core.matching import SmartMatcher
+
+
+class TestNormalizeCache(unittest.TestCase):
+    def setUp(self):
+        SmartMatcher.clear_cache()
+
+    def test_cached_tokens_match_uncached(self):
+        m = SmartMatcher()
+        text = "He-Man Masters of the Universe Origins Figura 14 cm"
+        self.assertEqual(m.normalize(text), m._normalize_uncached(text))
+        self.assertEqual(m.normalize(text), m._normalize_uncached(text))
+        self.assertEqual(SmartMatcher.cache_stats()["hits"], 1)
+
+    def test_configurations_do_not_share_entries(self):
+        default = SmartMatcher()
+        custom = SmartMatcher(stop_words={"figura"})
+        text = "Figura Skeletor Origins"
+        self.assertEqual(default.normalize(text), frozenset({"skeletor"}))
+        self.assertEqual(custom.normalize(text), frozenset({"skeletor", "origins"}))
+        self.assertEqual(default.normalize(text), frozenset({"skeletor"}))
+
+    def test_same_configuration_shares_entries(self):
+        SmartMatcher().normalize("Battle Cat")
+        SmartMatcher().normalize("Battle Cat")
+        self.assertEqual(SmartMatcher.cache_stats()["hits"], 1)
+
+    def test_cache_is_bounded(self):
+        m = SmartMatcher()
+        original = SmartMatcher.CACHE_MAX_SIZE
+        SmartMatcher.CACHE_MAX_SIZE = 3
+        try:
+            for i in range(10):
+                m.normalize(f"item {i}")
+            self.assertEqual(SmartMatcher.cache_stats()["size"], 3)
+        finally:
+            SmartMatcher.CACHE_MAX_SIZE = original
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from src.core.snapshot_store import SnapshotStore
+
+
+def _offer(url, price, name="Skeletor"):
+    return {"url": url, "price": price, "product_name": name, "scraped_at": "ignored"}
+
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "snapshots.db")
+        self.store = SnapshotStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self._tmp.cleanup()
+
+    def test_run_appended_in_batches_keeps_order(self):
+        run = self.store.open_run("ActionToys")
+        self.assertEqual(self.store.append_run(run, [_offer("a", 10.0), _offer("b", 12.0)]), 2)
+        # Same record again: appended to the manifest, stored once
+        self.assertEqual(self.store.append_run(run, [_offer("a", 10.0), _offer("c", 9.0)]), 1)
+        self.store.close_run(run)
+
+        self.assertEqual([r["url"] for r in self.store.load_run(run)], ["a", "b", "a", "c"])
+        info = self.store.runs("ActionToys")[0]
+        self.assertEqual((info["items"], info["new_objects"]), (4, 3))
+        self.assertIsNotNone(info["closed_at"])
+        self.assertEqual(self.store.stats()["objects"], 3)
+
+    def test_diff_pairs_records_by_url_and_occurrence(self):
+        old = self.store.save_run("ActionToys", [
+            _offer("a", 10.0), _offer("dup", 5.0), _offer("dup", 6.0), _offer("gone", 1.0),
+        ])
+        new = self.store.save_run("ActionToys", [
+            _offer("a", 10.0), _offer("dup", 5.0), _offer("dup", 7.0), _offer("fresh", 2.0),
+        ])
+        d = self.store.diff(old, new)
+        self.assertEqual(d.unchanged, 2)
+        self.assertEqual([(b["price"], a["price"]) for b, a in d.changed], [(6.0, 7.0)])
+        self.assertEqual([r["url"] for r in d.removed], ["gone"])
+        self.assertEqual([r["url"] for r in d.added], ["fresh"])
+
+    def test_prune_drops_old_runs_and_orphan_records(self):
+        old = self.store.save_run("ActionToys", [_offer("shared", 10.0), _offer("orphan", 3.0)])
+        kept = self.store.save_run("ActionToys", [_offer("shared", 10.0)])
+        self.store._conn.execute("UPDATE runs SET created_at = '2020-01-01T00:00:00' WHERE id = ?", (old,))
+        self.store._conn.commit()
+
+        self.assertEqual(self.store.prune(keep_days=30), {"runs": 1, "objects": 1})
+        self.assertEqual([r["id"] for r in self.store.runs()], [kept])
+        self.assertEqual(self.store.load_run(kept), [{"url": "shared", "price": 10.0, "product_name": "Skeletor"}])
+        with self.assertRaises(KeyError):
+            self.store.load_run(old)
+        self.assertEqual(self.store.prune(keep_days=30), {"runs": 0, "objects": 0})
+
+
+class TestSnapshotStoreMigration(unittest.TestCase):
+    def test_packed_manifests_move_to_run_items(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "snapshots.db")
+            store = SnapshotStore(path)
+            run = store.save_run("Fantasia", [_offer("a", 1.0), _offer("b", 2.0), _offer("a", 1.0)])
+            digests = store._manifest(run)
+            store.close()
+
+            # Rewind to the packed-blob layout
+            conn = sqlite3.connect(path)
+            conn.execute("UPDATE runs SET manifest = ? WHERE id = ?", (b"".join(digests), run))
+            conn.execute("DROP TABLE run_items")
+            conn.commit()
+            conn.close()
+
+            store = SnapshotStore(path)
+            try:
+                self.assertEqual([r["url"] for r in store.load_run(run)], ["a", "b", "a"])
+                (manifest,) = store._conn.execute("SELECT manifest FROM runs WHERE id = ?", (run,)).fetchone()
+                self.assertEqual(manifest, b"")
+            finally:
+                store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
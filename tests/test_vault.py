@@ -0,0 +1,102 @@
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import src.core.backup_manager as backup_manager
+from src.core.backup_manager import BackupManager, VAULT_TABLES
+from src.domain.models import Base, OfferModel, PriceHistoryModel, ProductModel, ScraperExecutionLogModel
+
+
+class _Clock(datetime):
+    """Vault names have one-second resolution: tests move the clock by hand."""
+    current = datetime(2026, 1, 5, 3, 0, 0)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+class TestVaultRoundTrip(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.manager = BackupManager(self._tmp.name)
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        clock = mock.patch.object(backup_manager, "datetime", _Clock)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+        product = ProductModel(name="Skeletor Origins")
+        self.db.add(product)
+        self.db.flush()
+        offer = OfferModel(product_id=product.id, shop_name="ActionToys", url="https://shop/s", price=20.0)
+        self.db.add(offer)
+        self.db.flush()
+        self.db.add_all([
+            PriceHistoryModel(offer_id=offer.id, price=25.0),
+            PriceHistoryModel(offer_id=offer.id, price=20.0),
+            ScraperExecutionLogModel(spider_name="actiontoys", status="success", end_time=datetime(2026, 1, 4)),
+            ScraperExecutionLogModel(spider_name="fantasia", status="running"),
+        ])
+        self.db.commit()
+        self.offer_id = offer.id
+
+    def tearDown(self):
+        self.db.close()
+        self._tmp.cleanup()
+
+    def _seal(self, incremental: bool, when: datetime):
+        _Clock.current = when
+        path = self.manager.create_database_backup(self.db, incremental=incremental)
+        self.assertIsNotNone(path)
+        return path
+
+    def _db_rows(self):
+        import src.domain.models as models
+        rows = {}
+        for table_name, model_name in VAULT_TABLES:
+            table = getattr(models, model_name).__table__
+            rows[table_name] = {r.id: dict(r._mapping) for r in self.db.execute(table.select())}
+        return rows
+
+    def _vault_rows(self, path):
+        return {table: {r["id"]: r for r in rows} for table, rows in self.manager.iter_vault(path)}
+
+    def test_full_vault_round_trip(self):
+        path = self._seal(False, datetime(2026, 1, 5, 3, 0, 0))
+        restored = self._vault_rows(path)
+        for table, rows in self._db_rows().items():
+            self.assertEqual(set(restored.get(table, {})), set(rows), table)
+        self.assertEqual(restored["price_history"][1]["price"], 25.0)
+
+    def test_incremental_vault_resolves_against_base(self):
+        self._seal(False, datetime(2026, 1, 5, 3, 0, 0))
+
+        # Deletion below the watermark, new rows above it, an open log closing
+        self.db.delete(self.db.get(PriceHistoryModel, 1))
+        self.db.add(PriceHistoryModel(offer_id=self.offer_id, price=18.0))
+        self.db.get(ScraperExecutionLogModel, 2).status = "success"
+        self.db.get(ScraperExecutionLogModel, 2).end_time = datetime(2026, 1, 6)
+        self.db.add(ProductModel(name="Battle Cat"))
+        self.db.commit()
+
+        path = self._seal(True, datetime(2026, 1, 6, 3, 0, 0))
+        manifest = self.manager.load_manifest(path)
+        self.assertEqual(manifest["kind"], "incremental")
+        self.assertEqual(manifest["tables"]["price_history"]["mode"], "delta")
+        self.assertEqual(manifest["tables"]["price_history"]["rows"], 1)
+
+        restored = self._vault_rows(path)
+        for table, rows in self._db_rows().items():
+            self.assertEqual(set(restored.get(table, {})), set(rows), table)
+        self.assertEqual(restored["scraper_execution_logs"][2]["status"], "success")
+        self.assertEqual(restored["price_history"][3]["price"], 18.0)
+
+
+if __name__ == '__main__':
+    unittest.main()